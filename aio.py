@@ -0,0 +1,210 @@
+"""
+asyncio interface of the long-running number and matrix routines, which does not block the event loop
+
+Streams of prime and Fibonacci numbers are async generators, which give control back to the event loop after
+every few items. Whole calculations are offloaded to a thread or process executor and awaited, optionally
+with a timeout and through a Limiter, which bounds the number of calculations running at the same time.
+
+    async def handler(request):
+        return json_response(await aio.factors(int(request.query['n']), timeout=1.0, limiter=LIMITER))
+
+"""
+import asyncio
+import functools
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Iterable, List, Optional, Union
+
+from pzeug import matrix
+from pzeug.number import prime
+from pzeug.number.sequence import fib_range
+
+YIELD_EVERY = 1024  # items of a stream between two switches to the event loop
+EXECUTORS = ('thread', 'process')
+
+_executor = None  # created on first use by get_executor()
+_owned = False  # the executor was created here and is shut down on change
+
+
+def set_executor(executor: Union[str, Executor] = 'thread', workers: Optional[int] = None):
+    """Select the executor of the offloaded calls
+
+    Threads keep the event loop responsive, but the pure Python calculations share the GIL with it,
+    so CPU-heavy services should use processes. Arguments and results are pickled to the processes,
+    which pays off for calls longer than a few milliseconds.
+
+    :param executor: one of EXECUTORS or an Executor, which stays owned by the caller
+    :param workers: number of threads or processes, the default of the executor class otherwise
+    :raises
+        ValueError for unknown executors
+    """
+    global _executor, _owned
+    if isinstance(executor, str):
+        if executor not in EXECUTORS:
+            raise ValueError("Unknown executor '{}', expected one of {} or an Executor".format(executor, EXECUTORS))
+        executor, owned = (ThreadPoolExecutor if executor == 'thread' else ProcessPoolExecutor)(workers), True
+    else:
+        owned = False
+    shutdown(wait=False)
+    _executor, _owned = executor, owned
+
+
+def get_executor() -> Executor:
+    if _executor is None:
+        set_executor()
+    return _executor
+
+
+def shutdown(wait: bool = True):
+    """Shut down the executor created by set_executor(), the next call creates a new thread executor"""
+    global _executor, _owned
+    if _owned:
+        _executor.shutdown(wait=wait, cancel_futures=True)
+    _executor, _owned = None, False
+
+
+class Limiter:
+    """At most limit offloaded calls run at the same time, the others wait for a free slot
+
+    A slot is held until the call really finishes. A call, which is cancelled or times out while it is running
+    in a thread or process, can not be interrupted, so it keeps its slot until it returns.
+
+    Examples:
+        >>> async def main():
+        ...     limiter = Limiter(2)
+        ...     return await asyncio.gather(*(run(prime.is_prime, n, limiter=limiter) for n in range(7)))
+        >>> asyncio.run(main())
+        [False, False, True, True, False, True, False]
+    """
+
+    def __init__(self, limit: int):
+        """
+        :param limit: number of concurrent calls
+        :raises
+            ValueError if limit < 1
+        """
+        if limit < 1:
+            raise ValueError("The limit of concurrent calls must be positive, supplied {}".format(limit))
+        self.limit = limit
+        self._semaphore = asyncio.Semaphore(limit)
+
+    def locked(self) -> bool:
+        """True if all slots are taken"""
+        return self._semaphore.locked()
+
+
+async def run(function: Callable, *args, timeout: Optional[float] = None, limiter: Optional[Limiter] = None,
+              executor: Optional[Executor] = None, **kwargs):
+    """Await function(*args, **kwargs) calculated in an executor
+
+    :param function: picklable (module level) function if the executor runs processes
+    :param timeout: seconds until asyncio.TimeoutError is raised, including the wait for a slot of the limiter
+    :param limiter: bounds the number of concurrent calls
+    :param executor: the executor selected by set_executor() by default
+    :raises
+        asyncio.TimeoutError if the result is not ready in time, or whatever function raises
+
+    Examples:
+        >>> asyncio.run(run(pow, 3, 4, 5))
+        1
+    """
+    return await asyncio.wait_for(_offload(functools.partial(function, *args, **kwargs), limiter, executor),
+                                  timeout)
+
+
+async def _offload(call: Callable, limiter: Optional[Limiter], executor: Optional[Executor]):
+    loop = asyncio.get_running_loop()
+    if limiter is not None:
+        await limiter._semaphore.acquire()
+    try:
+        future = (executor or get_executor()).submit(call)
+    except BaseException:
+        if limiter is not None:
+            limiter._semaphore.release()
+        raise
+    if limiter is not None:
+        # released when the call is done, not when the awaiting task is cancelled
+        future.add_done_callback(lambda _: loop.is_closed() or loop.call_soon_threadsafe(limiter._semaphore.release))
+    # cancelling the task cancels the call, if it has not started yet
+    return await asyncio.wrap_future(future)
+
+
+def _to_list(function: Callable, *args) -> list:
+    return list(function(*args))
+
+
+async def sieve_of_eratosthenes(limit: int, **options) -> List[int]:
+    """List of the prime numbers in range [2, limit] calculated in an executor, options of run()
+
+    Examples:
+        >>> asyncio.run(sieve_of_eratosthenes(30, timeout=10))
+        [2, 3, 5, 7, 11, 13, 17, 19, 23, 29]
+    """
+    return await run(_to_list, prime.sieve_of_eratosthenes, limit, **options)
+
+
+async def factors(n: int, **options) -> List[tuple]:
+    """Prime factorization [(prime, degree), ...] of n > 0 calculated in an executor, options of run()
+
+    Examples:
+        >>> asyncio.run(factors(2 ** 64 + 1))
+        [(274177, 1), (67280421310721, 1)]
+    """
+    return await run(_to_list, prime.factors, n, **options)
+
+
+async def gauss(a: matrix.TMatrix, b: matrix.TMatrix, **options) -> (float, matrix.TMatrix):
+    """matrix.gauss(a, b) calculated in an executor, options of run()"""
+    return await run(matrix.gauss, a, b, **options)
+
+
+async def invert(m: matrix.TMatrix, **options) -> matrix.TMatrix:
+    """matrix.invert(m) calculated in an executor, options of run()
+
+    Examples:
+        >>> asyncio.run(invert([[2, 1], [1, 1]]))
+        [[Fraction(1, 1), Fraction(-1, 1)], [Fraction(-1, 1), Fraction(2, 1)]]
+    """
+    return await run(matrix.invert, m, **options)
+
+
+async def stream(iterable: Iterable, every: int = YIELD_EVERY) -> AsyncIterator:
+    """Iterate over iterable and switch to the event loop after each batch of every items
+
+    The items are produced in the event loop, so a single item must be cheap.
+
+    Examples:
+        >>> async def main():
+        ...     return [x async for x in stream(range(5), every=2)]
+        >>> asyncio.run(main())
+        [0, 1, 2, 3, 4]
+    """
+    for i, item in enumerate(iterable, 1):
+        yield item
+        if i % every == 0:
+            await asyncio.sleep(0)
+
+
+def primes(start: int = 2, stop: Optional[int] = None, every: int = YIELD_EVERY) -> AsyncIterator[int]:
+    """Prime numbers in range [start, stop), endless if stop is None
+
+    Examples:
+        >>> async def main():
+        ...     return [p async for p in primes(90, 110)]
+        >>> asyncio.run(main())
+        [97, 101, 103, 107, 109]
+    """
+    if stop is None:
+        return stream(prime.lazy_sieve_of_eratosthenes(start), every)
+    return stream(prime.primes_in_range(start, stop), every)
+
+
+def fibonacci(lo: int = 0, hi: Optional[int] = None, every: int = YIELD_EVERY) -> AsyncIterator[int]:
+    """Fibonacci numbers F(lo), F(lo + 1), ..., F(hi - 1), endless if hi is None
+
+    Examples:
+        >>> async def main():
+        ...     return [f async for f in fibonacci(10, 15)]
+        >>> asyncio.run(main())
+        [55, 89, 144, 233, 377]
+    """
+    return stream(fib_range(lo, hi), every)
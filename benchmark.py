@@ -0,0 +1,228 @@
+"""
+Benchmarks of the prime, number, op and matrix hot paths with warmup, repeated trials, memory peaks
+and regression checks against a stored baseline
+
+    python -m pzeug.benchmark run --output baseline.json
+    ... change the code ...
+    python -m pzeug.benchmark run --output current.json
+    python -m pzeug.benchmark compare baseline.json current.json
+
+"""
+import argparse
+import collections
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from collections import namedtuple
+from typing import Callable, Dict, List, Optional, Sequence
+
+from pzeug import matrix
+from pzeug.number.number import binomial_coefficient
+from pzeug.number.op import factorial
+from pzeug.number.prime import factors, is_prime, prime_factorizations, sieve_of_eratosthenes
+
+REGRESSION_THRESHOLD = 0.1  # relative slowdown of the median time, which counts as a regression
+
+Benchmark = namedtuple('Benchmark', ['name', 'sizes', 'setup', 'run'])
+Regression = namedtuple('Regression', ['name', 'size', 'baseline', 'current', 'ratio'])
+
+
+def _consume(iterable):
+    collections.deque(iterable, maxlen=0)
+
+
+def _semiprime(digits):
+    """Product of the two smallest prime numbers >= 10**(digits // 2), hard for trial division"""
+    p = 10 ** (digits // 2) + 1
+    while not is_prime(p):
+        p += 2
+    q = p + 2
+    while not is_prime(q):
+        q += 2
+    return p * q
+
+
+def _float_matrix(n, seed=0):
+    """Random diagonally dominant n x n matrix, which is well conditioned"""
+    rng = random.Random(seed)
+    return [[rng.uniform(-1, 1) + (n if i == j else 0) for j in range(n)] for i in range(n)]
+
+
+def _binomial(n):
+    binomial_coefficient.cache_clear()
+    return binomial_coefficient(n, n // 2)
+
+
+BENCHMARKS = (
+    Benchmark('sieve_of_eratosthenes', (10 ** 4, 10 ** 5, 10 ** 6),
+              lambda n: (n,), lambda n: _consume(sieve_of_eratosthenes(n))),
+    Benchmark('is_prime', (10 ** 6, 10 ** 12, 10 ** 18),  # 1000 consecutive numbers from size
+              lambda n: (range(n, n + 1000),), lambda numbers: _consume(map(is_prime, numbers))),
+    Benchmark('factors', (12, 18, 24),  # digits of a semiprime
+              lambda digits: (_semiprime(digits),), lambda n: _consume(factors(n))),
+    Benchmark('prime_factorizations', (10 ** 4, 10 ** 5, 10 ** 6),
+              lambda n: (n,), prime_factorizations),
+    Benchmark('binomial_coefficient', (100, 1000, 10000),
+              lambda n: (n,), _binomial),
+    Benchmark('factorial', (10 ** 3, 10 ** 4, 10 ** 5),
+              lambda n: (n,), factorial),
+    Benchmark('matmul', (16, 64, 128),
+              lambda n: (_float_matrix(n), _float_matrix(n, seed=1)), matrix.matmul),
+    Benchmark('gauss', (16, 64, 128),
+              lambda n: (_float_matrix(n), [[1.0] for _ in range(n)]), matrix.gauss),
+    Benchmark('invert', (16, 64, 128),
+              lambda n: (_float_matrix(n),), matrix.invert),
+)
+
+
+def measure(function: Callable, args: Sequence = (), repeat: int = 5, warmup: int = 1,
+            memory: bool = True) -> Dict[str, float]:
+    """Time repeated calls of function(*args)
+
+    Memory is measured in one extra call, since tracemalloc slows down allocations and would distort the times.
+
+    :param repeat: number of timed trials
+    :param warmup: number of untimed calls before the trials
+    :param memory: measure the peak of the allocated memory
+    :return:
+        dict of min, median, mean, stdev and max of the trials in seconds, and memory_peak in bytes
+    """
+    for _ in range(warmup):
+        function(*args)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        function(*args)
+        times.append((time.perf_counter_ns() - start) / 1e9)
+    result = {
+        'min': min(times),
+        'median': statistics.median(times),
+        'mean': statistics.mean(times),
+        'stdev': statistics.stdev(times) if len(times) > 1 else 0.0,
+        'max': max(times),
+        'memory_peak': None,
+    }
+    if memory:
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        start_memory = tracemalloc.get_traced_memory()[0]
+        function(*args)
+        result['memory_peak'] = tracemalloc.get_traced_memory()[1] - start_memory
+        if not tracing:
+            tracemalloc.stop()
+    return result
+
+
+def run(names: Optional[Sequence[str]] = None, repeat: int = 5, warmup: int = 1, memory: bool = True,
+        quick: bool = False, progress: Optional[Callable[[dict], None]] = None) -> dict:
+    """Run the benchmarks
+
+    :param names: names of the benchmarks to run, all by default
+    :param quick: only the smallest size of every benchmark
+    :param progress: called with every result as soon as it is measured
+    :return:
+        dict with the environment and the list of results, ready to be saved as JSON
+    :raises
+        ValueError for unknown benchmark names
+    """
+    known = {benchmark.name for benchmark in BENCHMARKS}
+    unknown = set(names or ()) - known
+    if unknown:
+        raise ValueError("Unknown benchmarks {}, available: {}".format(sorted(unknown), sorted(known)))
+    results = []
+    for benchmark in BENCHMARKS:
+        if names and benchmark.name not in names:
+            continue
+        for size in benchmark.sizes[:1] if quick else benchmark.sizes:
+            result = {'name': benchmark.name, 'size': size}
+            result.update(measure(benchmark.run, benchmark.setup(size), repeat, warmup, memory))
+            results.append(result)
+            if progress is not None:
+                progress(result)
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'matrix_backend': matrix.get_backend(),
+        'repeat': repeat,
+        'results': results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float = REGRESSION_THRESHOLD) -> List[Regression]:
+    """Find benchmarks, whose median time grew by more than threshold relative to the baseline.
+    Benchmarks missing in one of the runs are ignored.
+
+    Examples:
+        >>> baseline = {'results': [{'name': 'f', 'size': 1, 'median': 1.0}, {'name': 'g', 'size': 1, 'median': 1.0}]}
+        >>> current = {'results': [{'name': 'f', 'size': 1, 'median': 1.5}, {'name': 'g', 'size': 1, 'median': 1.05}]}
+        >>> compare(baseline, current)
+        [Regression(name='f', size=1, baseline=1.0, current=1.5, ratio=1.5)]
+    """
+    medians = {(r['name'], r['size']): r['median'] for r in baseline['results']}
+    regressions = []
+    for r in current['results']:
+        old = medians.get((r['name'], r['size']))
+        if old and r['median'] > old * (1 + threshold):
+            regressions.append(Regression(r['name'], r['size'], old, r['median'], r['median'] / old))
+    return regressions
+
+
+def _format(result: dict) -> str:
+    memory = result['memory_peak']
+    return "{:<22} {:>20} median {:>10.6f}s  min {:>10.6f}s  stdev {:>9.6f}s  memory {:>12}".format(
+        result['name'], result['size'], result['median'], result['min'], result['stdev'],
+        '-' if memory is None else '{:,} B'.format(memory))
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m pzeug.benchmark', description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    run_parser = commands.add_parser('run', help='run the benchmarks and print the results')
+    run_parser.add_argument('names', nargs='*', help='benchmarks to run, all by default: {}'.format(
+        ', '.join(benchmark.name for benchmark in BENCHMARKS)))
+    run_parser.add_argument('--repeat', type=int, default=5, help='timed trials per benchmark and size')
+    run_parser.add_argument('--warmup', type=int, default=1, help='untimed calls before the trials')
+    run_parser.add_argument('--no-memory', action='store_true',
+                            help='skip the memory peaks, their traced extra call is much slower than the trials')
+    run_parser.add_argument('--quick', action='store_true', help='only the smallest size of every benchmark')
+    run_parser.add_argument('--output', help='JSON file to save the results into')
+    compare_parser = commands.add_parser('compare', help='flag regressions of a run against a baseline run')
+    compare_parser.add_argument('baseline', help='JSON file of the baseline run')
+    compare_parser.add_argument('current', help='JSON file of the current run')
+    compare_parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                                help='relative slowdown of the median, which counts as a regression')
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        try:
+            results = run(args.names, args.repeat, args.warmup, not args.no_memory, args.quick,
+                          progress=lambda result: print(_format(result), flush=True))
+        except ValueError as e:
+            parser.error(str(e))
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(results, f, indent=2)
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    regressions = compare(baseline, current, args.threshold)
+    for r in regressions:
+        print("REGRESSION {:<22} {:>20} {:.6f}s -> {:.6f}s ({:+.0%})".format(
+            r.name, r.size, r.baseline, r.current, r.ratio - 1))
+    if not regressions:
+        print("No regressions above {:.0%}".format(args.threshold))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
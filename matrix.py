@@ -3,125 +3,571 @@ Set of functions for performing operations on matrices
 """
 
 import copy
+import itertools
+import math
+import os
+from array import array
+from bisect import bisect_left
 from fractions import Fraction
-from typing import List, Callable, TypeVar
+from operator import mul, sub
+from typing import List, Callable, TypeVar, Union, Sequence, Optional
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import scipy.linalg as scipy_linalg
+except ImportError:
+    scipy_linalg = None
 
 TNum = TypeVar('TNum', int, float, Fraction)
+MATMUL_BLOCK = 64  # columns of the result computed per tile
+LU_BLOCK = 32  # columns of a panel of the NumPy LU decomposition
+
+
+class Matrix:
+    """Dense matrix stored row-major in one flat sequence (list, or array for float/int typecodes)
+
+    Element (i, j) is data[i * cols + j]. Indexing with a single row number returns a copy of the row,
+    so code reading List[List] matrices via a[i][j] keeps working.
+
+    Examples:
+        >>> m = Matrix.from_lists([[1, 2], [3, 4]])
+        >>> m[1, 0], m[1], m.shape
+        (3, [3, 4], (2, 2))
+        >>> (m @ m).tolist()
+        [[7, 10], [15, 22]]
+    """
+    __slots__ = ('rows', 'cols', 'data')
+
+    def __init__(self, rows: int, cols: int, data: Optional[Sequence] = None):
+        """
+        :param rows: number of rows
+        :param cols: number of columns
+        :param data: row-major elements, filled with 0's if omitted
+        """
+        if data is None:
+            data = [0] * (rows * cols)
+        elif len(data) != rows * cols:
+            raise ValueError("{} elements do not fit a {}x{} matrix".format(len(data), rows, cols))
+        self.rows = rows
+        self.cols = cols
+        self.data = data
+
+    @classmethod
+    def from_lists(cls, a: List[List], typecode: Optional[str] = None) -> 'Matrix':
+        """Convert a List[List] matrix, optionally packing the elements into array(typecode)
+        """
+        data = [x for row in a for x in row]
+        return cls(len(a), len(a[0]) if a else 0, array(typecode, data) if typecode else data)
+
+    @classmethod
+    def filled(cls, rows: int, cols: int, fill_val=0) -> 'Matrix':
+        return cls(rows, cols, [fill_val] * (rows * cols))
+
+    @classmethod
+    def identity(cls, n: int) -> 'Matrix':
+        m = cls(n, n)
+        m.data[::n + 1] = [1] * n
+        return m
+
+    @property
+    def shape(self) -> (int, int):
+        return self.rows, self.cols
+
+    def row(self, i: int) -> Sequence:
+        """Copy of the i-th row, of the same type as data"""
+        return self.data[i * self.cols:(i + 1) * self.cols]
+
+    def tolist(self) -> List[List]:
+        return [list(self.row(i)) for i in range(self.rows)]
+
+    def transpose(self) -> 'Matrix':
+        data = self.data
+        transposed = [data[j::self.cols] for j in range(self.cols)]
+        if isinstance(data, array):
+            return Matrix(self.cols, self.rows, array(data.typecode, [x for col in transposed for x in col]))
+        return Matrix(self.cols, self.rows, [x for col in transposed for x in col])
+
+    def copy(self) -> 'Matrix':
+        return Matrix(self.rows, self.cols, self.data[:])
+
+    def __len__(self):
+        return self.rows
+
+    def __iter__(self):
+        return iter(self.tolist())
+
+    def __getitem__(self, index):
+        if isinstance(index, tuple):
+            i, j = index
+            return self.data[i * self.cols + j]
+        return list(self.row(index))
+
+    def __setitem__(self, index, value):
+        i, j = index
+        self.data[i * self.cols + j] = value
+
+    def __eq__(self, other):
+        if isinstance(other, Matrix):
+            return self.shape == other.shape and list(self.data) == list(other.data)
+        return self.tolist() == other
+
+    def __repr__(self):
+        return 'Matrix({})'.format(self.tolist())
+
+    def __matmul__(self, other):
+        return matmul(self, other)
+
+
+TMatrix = Union[List[List], Matrix]
+
+
+def _as_lists(m: TMatrix) -> List[List]:
+    return m.tolist() if isinstance(m, Matrix) else m
+
+
+BACKENDS = ('auto', 'numpy', 'python')
+BACKEND_ENV = 'PZEUG_MATRIX_BACKEND'
+_backend = None
+
+
+def set_backend(name: str):
+    """Select the implementation of matmul, gauss and invert for float matrices
+
+    'auto' uses NumPy if it is importable, 'numpy' requires it, 'python' never uses it.
+    int and Fraction matrices are always calculated exactly in pure Python.
+    The initial backend is taken from the PZEUG_MATRIX_BACKEND environment variable, 'auto' by default.
+
+    :param name: one of BACKENDS
+    :raises
+        ValueError for unknown backends, ImportError if 'numpy' is selected but not installed
+    """
+    global _backend
+    if name not in BACKENDS:
+        raise ValueError("Unknown matrix backend '{}', expected one of {}".format(name, BACKENDS))
+    if name == 'numpy' and numpy is None:
+        raise ImportError("The numpy matrix backend is selected, but numpy is not installed")
+    _backend = name
+
+
+def get_backend() -> str:
+    if _backend is None:
+        set_backend(os.environ.get(BACKEND_ENV, 'auto'))
+    return _backend
+
+
+def _is_float_matrix(m: TMatrix) -> bool:
+    if isinstance(m, Matrix) and isinstance(m.data, array):
+        return m.data.typecode in 'fd'
+    return all(isinstance(x, float) for row in _as_lists(m) for x in row)
+
+
+def _use_numpy(*matrices: TMatrix) -> bool:
+    return get_backend() != 'python' and numpy is not None and all(map(_is_float_matrix, matrices))
+
+
+def _to_numpy(m: TMatrix):
+    if isinstance(m, Matrix):
+        return numpy.array(m.data, dtype=float).reshape(m.rows, m.cols)
+    return numpy.array(m, dtype=float)
+
+
+def _from_numpy(result, like: TMatrix) -> TMatrix:
+    """Convert a 2D numpy array of floats into the matrix type of like"""
+    if isinstance(like, Matrix):
+        data = result.ravel().tolist()
+        if isinstance(like.data, array):
+            data = array(like.data.typecode, data)
+        return Matrix(result.shape[0], result.shape[1], data)
+    return result.tolist()
+
+
+def _numpy_lu(a_np, eps: float):
+    """LU decomposition with partial pivoting of a square numpy array, packed like LUFactorization.
+
+    The factorization is LAPACK's if SciPy is installed. Otherwise the columns are eliminated in panels
+    of LU_BLOCK, so the O(n^3) trailing updates are matrix products.
+    A pivot with absolute value <= eps is rejected by the same rule on both backends, whereas LAPACK
+    only fails on an exact zero and returns huge garbage for a nearly singular matrix.
+
+    :return:
+        (lu, pivots, det), pivots are LAPACK row interchanges with SciPy, a row permutation otherwise
+    :raises
+        ValueError if a pivot is <= eps
+    """
+    if scipy_linalg is not None:
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            lu, pivots = scipy_linalg.lu_factor(a_np, check_finite=False)
+        diagonal = numpy.diagonal(lu)
+        if diagonal.size and numpy.abs(diagonal).min() <= eps:
+            raise ValueError('Input matrix A is a singular matrix, there a no solutions!')
+        swaps = int(numpy.count_nonzero(pivots != numpy.arange(len(pivots))))
+        return lu, pivots, float(numpy.prod(diagonal)) * (-1) ** swaps
+    lu = a_np.copy()
+    n = lu.shape[0]
+    perm = numpy.arange(n)
+    determinant = 1.0
+    for k in range(0, n, LU_BLOCK):
+        end = min(k + LU_BLOCK, n)
+        for i in range(k, end):
+            max_row = i + int(numpy.argmax(numpy.abs(lu[i:, i])))  # Find max pivot
+            pivot = lu[max_row, i]
+            if abs(pivot) <= eps:
+                raise ValueError('Input matrix A is a singular matrix, there a no solutions!')
+            if max_row != i:
+                lu[[i, max_row]] = lu[[max_row, i]]
+                perm[[i, max_row]] = perm[[max_row, i]]
+                determinant = -determinant
+            determinant *= pivot
+            lu[i + 1:, i] /= pivot
+            lu[i + 1:, i + 1:end] -= numpy.outer(lu[i + 1:, i], lu[i, i + 1:end])
+        if end < n:  # rows of U right of the panel, then the trailing block
+            lu[k:end, end:] = numpy.linalg.solve(_unit_lower(lu[k:end, k:end]), lu[k:end, end:])
+            lu[end:, end:] -= lu[end:, k:end] @ lu[k:end, end:]
+    return lu, perm, float(determinant)
+
+
+def _unit_lower(block):
+    return numpy.tril(block, -1) + numpy.eye(block.shape[0])
+
+
+def _numpy_lu_solve(lu, pivots, b_np):
+    """Solve ax=b for the columns of b_np with the packed LU of a, by blocked substitutions"""
+    if scipy_linalg is not None:
+        return scipy_linalg.lu_solve((lu, pivots), b_np, check_finite=False)
+    n = lu.shape[0]
+    x = b_np[pivots]
+    for k in range(0, n, LU_BLOCK):  # Forward substitution with L
+        end = min(k + LU_BLOCK, n)
+        x[k:end] = numpy.linalg.solve(_unit_lower(lu[k:end, k:end]), x[k:end])
+        x[end:] -= lu[end:, k:end] @ x[k:end]
+    for k in reversed(range(0, n, LU_BLOCK)):  # Back substitution with U
+        end = min(k + LU_BLOCK, n)
+        x[k:end] = numpy.linalg.solve(numpy.triu(lu[k:end, k:end]), x[k:end])
+        x[:k] -= lu[:k, k:end] @ x[k:end]
+    return x
+
+
+def _numpy_solve(a: TMatrix, b: TMatrix, eps: float) -> (float, TMatrix):
+    a_np = _to_numpy(a)
+    b_np = _to_numpy(b)
+    m = a_np.shape[1]
+    assert a_np.shape[0] >= m, "Solution is not possible if number of rows < number of columns. A:{}".format(a)
+    lu, pivots, determinant = _numpy_lu(a_np[:m], eps)
+    x = _numpy_lu_solve(lu, pivots, b_np[:m])
+    return determinant, _from_numpy(numpy.vstack((x, b_np[m:])), b)
+
+
+def _numpy_invert(m: TMatrix, eps: float) -> TMatrix:
+    m_np = _to_numpy(m)
+    p = m_np.shape[1]
+    lu, pivots, _ = _numpy_lu(m_np[:p], eps)
+    return _from_numpy(_numpy_lu_solve(lu, pivots, numpy.eye(p)), m)
+
+
+class LUFactorization:
+    """LU decomposition with partial pivoting, PA = LU, where L is unit lower triangular.
+
+    L (below the diagonal) and U (on and above the diagonal) are packed into one matrix. The O(n^3)
+    elimination runs once, every following solve() costs O(n^2).
+
+    Examples:
+        >>> lu = LUFactorization([[Fraction(2), 1], [Fraction(4), 3]])
+        >>> lu.det(), lu.solve([3, 7])
+        (Fraction(2, 1), [Fraction(1, 1), Fraction(1, 1)])
+    """
+
+    def __init__(self, a: TMatrix, eps: float = 1.0 / (10 ** 10)):
+        """Factorize the leading square block of a
+
+        :param a: input matrix nxm, n >= m
+        :param eps: pivots with absolute value <= eps are treated as zero
+        :raises
+            ValueError if 'a' is a singular matrix
+        """
+        a = _as_lists(a)
+        n = len(a[0])
+        assert len(a) >= n, "Solution is not possible if number of rows < number of columns. A:{}".format(a)
+        lu = [list(row) for row in a[:n]]
+        perm = list(range(n))
+        sign = 1
+        for i in range(n):
+            max_row = max(range(i, n), key=lambda j: abs(lu[j][i]))  # Find max pivot
+            if abs(lu[max_row][i]) <= eps:
+                raise ValueError('Input matrix A is a singular matrix, there a no solutions!')
+            if max_row != i:
+                lu[i], lu[max_row] = lu[max_row], lu[i]
+                perm[i], perm[max_row] = perm[max_row], perm[i]
+                sign = -sign
+            pivot_row = lu[i]
+            pivot_tail = pivot_row[i + 1:]
+            for row in lu[i + 1:]:  # Eliminate values in column i, keep the multipliers in place
+                t = row[i] / pivot_row[i]
+                row[i] = t
+                if t:
+                    row[i + 1:] = [x - t * y for x, y in zip(row[i + 1:], pivot_tail)]
+        self.n = n
+        self.lu = lu
+        self.perm = perm
+        self.sign = sign
+
+    def solve(self, b: Sequence[TNum]) -> List[TNum]:
+        """Solve ax=b for one right-hand side vector b"""
+        lu = self.lu
+        y = []
+        for i, row in enumerate(lu):  # Forward substitution with L
+            y.append(b[self.perm[i]] - sum(map(mul, row[:i], y)))
+        x = [0] * self.n
+        for i in range(self.n - 1, -1, -1):  # Back substitution with U
+            row = lu[i]
+            x[i] = (y[i] - sum(map(mul, row[i + 1:], x[i + 1:]))) / row[i]
+        return x
+
+    def solve_many(self, b: TMatrix) -> TMatrix:
+        """Solve ax=b for every column of b
+
+        :param b: matrix nxp
+        :return:
+            x matrix nxp, of the same matrix type as b
+        """
+        columns = [self.solve(column) for column in zip(*_as_lists(b))]
+        x = [list(row) for row in zip(*columns)]
+        return Matrix.from_lists(x) if isinstance(b, Matrix) else x
+
+    def det(self) -> TNum:
+        determinant = self.sign
+        for i, row in enumerate(self.lu):
+            determinant *= row[i]
+        return determinant
+
+    def inverse(self) -> List[List]:
+        identity = [[int(i == j) for j in range(self.n)] for i in range(self.n)]
+        return self.solve_many(identity)
+
+
+def _is_exact(m: TMatrix) -> bool:
+    """Check if all elements of m are ints or Fractions"""
+    return all(isinstance(x, (int, Fraction)) for row in _as_lists(m) for x in row)
+
+
+def _bareiss(a: List[List[TNum]], b: List[List[TNum]]) -> (int, List[List[int]], List[int]):
+    """Fraction-free (Bareiss) elimination of the square matrix a, applied to b as well
+
+    Every row of a and b is multiplied by the lcm of its denominators first, after that all the arithmetic
+    is exact integer division on minors of the input, so the numbers grow only polynomially.
+
+    :return:
+        (sign of the row permutation, eliminated integer rows of [a|b], row scale factors)
+    :raises
+        ValueError if 'a' is a singular matrix
+    """
+    n = len(a)
+    rows = []
+    scales = []
+    for a_row, b_row in zip(a, b):
+        scale = 1
+        for x in itertools.chain(a_row, b_row):
+            if isinstance(x, Fraction):
+                scale = scale * x.denominator // math.gcd(scale, x.denominator)
+        rows.append([int(x * scale) for x in itertools.chain(a_row, b_row)])
+        scales.append(scale)
+
+    sign = 1
+    previous_pivot = 1
+    for k in range(n):
+        if rows[k][k] == 0:
+            for j in range(k + 1, n):
+                if rows[j][k] != 0:
+                    rows[k], rows[j] = rows[j], rows[k]
+                    scales[k], scales[j] = scales[j], scales[k]
+                    sign = -sign
+                    break
+            else:
+                raise ValueError('Input matrix A is a singular matrix, there a no solutions!')
+        pivot_row = rows[k]
+        pivot = pivot_row[k]
+        pivot_tail = pivot_row[k + 1:]
+        for row in rows[k + 1:]:
+            factor = row[k]
+            row[k] = 0
+            row[k + 1:] = [(pivot * x - factor * y) // previous_pivot for x, y in zip(row[k + 1:], pivot_tail)]
+        previous_pivot = pivot
+    return sign, rows, scales
+
+
+def exact_solve(a: TMatrix, b: TMatrix) -> (Fraction, List[List[Fraction]]):
+    """Calculate x matrix in equation ax=b for int/Fraction matrices with fraction-free elimination
+
+    :param a: input matrix nxn
+    :param b: input matrix nxp
+    :return:
+        (determinant of a, x matrix), both as Fractions
+    :raises
+        ValueError if 'a' is a singular matrix
+
+    Examples:
+        >>> exact_solve([[2, 3], [5, 7]], [[11], [13]])
+        (Fraction(-1, 1), [[Fraction(-38, 1)], [Fraction(29, 1)]])
+    """
+    a, b = _as_lists(a), _as_lists(b)
+    n = len(a)
+    sign, rows, scales = _bareiss(a, b)
+    determinant = rows[-1][n - 1]  # det(a) multiplied by the scales, with the permutation applied
+    # determinant * x is an integer matrix (Cramer's rule), so the back substitution divides exactly
+    scaled_x = [[0] * len(b[0]) for _ in range(n)]
+    for i in range(n - 1, -1, -1):
+        row = rows[i]
+        for k in range(len(b[0])):
+            total = determinant * row[n + k] - sum(row[j] * scaled_x[j][k] for j in range(i + 1, n))
+            scaled_x[i][k] = total // row[i]
+    x = [[Fraction(v, determinant) for v in row] for row in scaled_x]
+    return Fraction(sign * determinant, math.prod(scales)), x
+
+
+def exact_det(a: TMatrix) -> Fraction:
+    """Determinant of an int/Fraction square matrix, 0 for singular matrices"""
+    a = _as_lists(a)
+    try:
+        sign, rows, scales = _bareiss(a, [[] for _ in a])
+    except ValueError:
+        return Fraction(0)
+    return Fraction(sign * rows[-1][-1], math.prod(scales))
 
 
-def gauss(a: List[List[TNum]], b: List[List[TNum]], eps: float = 1.0 / (10 ** 10)) -> (float, List[List[TNum]]):
-    """Calculate x matrix in equation ax=b. It is recommended to apply on items, supporting fractions.
-    Applying on int matrices may lead to an incorrect result, because int / int = int, i.e. they will be truncated.
-    Should work for matrices of any size.
+def exact_invert(a: TMatrix) -> List[List[Fraction]]:
+    """Inverse of an int/Fraction square matrix, as Fractions"""
+    n = len(a)
+    return exact_solve(a, [[int(i == j) for j in range(n)] for i in range(n)])[1]
+
+
+def gauss(a: TMatrix, b: TMatrix, eps: float = 1.0 / (10 ** 10)) -> (float, TMatrix):
+    """Calculate x matrix in equation ax=b. Should work for matrices of any size.
+
+    If all elements are ints or Fractions, the result is calculated exactly with exact_solve() and
+    returned as Fractions. Float matrices are solved with NumPy, if the backend allows it (see set_backend()).
+    Otherwise a is factorized with LUFactorization on every call, use LUFactorization directly to solve
+    the same a for many right-hand sides.
 
     :param a: input matrix A (2D array)
     :param b: input matrix b (2D array)
-    :param eps: optional parameter for avoiding division to zero
+    :param eps: pivots with absolute value <= eps are treated as zero, on both float backends
     :return:
         (determinant of a, x matrix)
     :raises
         ValueError if 'a' is a singular matrix
     """
-    a = copy.deepcopy(a)
-    b = copy.deepcopy(b)
-    n, m = len(a), len(a[0])
-    assert n >= m, "Solution is not possible if number of rows < number of columns. A:{}".format(a)
-    n = min(n, m)
-    p = len(b[0])
-
-    determinant = 1
-    for i in range(n - 1):
-        max_row = i
-        for j in range(i + 1, n):  # Find max pivot (leftmost nonzero entry, or leading coefficient)
-            if abs(a[j][i]) > abs(a[max_row][i]):
-                max_row = j
-        if max_row != i:
-            a[i], a[max_row] = a[max_row], a[i]
-            b[i], b[max_row] = b[max_row], b[i]
-            determinant = -determinant
-        if abs(a[i][i]) <= eps:
-            raise ValueError('Input matrix A is a singular matrix, there a no solutions!')
-
-        for j in range(i + 1, n):  # Eliminate values in column i
-            t = a[j][i] / a[i][i]
-            for k in range(i + 1, n):
-                a[j][k] -= t * a[i][k]
-            for k in range(p):
-                b[j][k] -= t * b[i][k]
-    # Put the matrix into reduced row echelon form (back substitute)
-    for i in range(n - 1, -1, -1):
-        for j in range(i + 1, n):
-            t = a[i][j]
-            for k in range(p):
-                b[i][k] -= t * b[j][k]
-        determinant *= a[i][i]
-        if abs(determinant) <= eps:
-            raise ValueError('Input matrix A is a singular matrix, there a no solutions!')
-        t = 1 / a[i][i]
-        for j in range(p):  # Normalize row i
-            b[i][j] *= t
-    return determinant, b
+    b_rows = _as_lists(b)
+    if _is_exact(a) and _is_exact(b_rows):
+        a_rows = _as_lists(a)
+        n, m = len(a_rows), len(a_rows[0])
+        assert n >= m, "Solution is not possible if number of rows < number of columns. A:{}".format(a)
+        determinant, x = exact_solve([row[:m] for row in a_rows[:m]], b_rows[:m])
+        x += copy.deepcopy(b_rows[m:])
+        return determinant, Matrix.from_lists(x) if isinstance(b, Matrix) else x
+    if _use_numpy(a):
+        return _numpy_solve(a, b, eps)
+    lu = LUFactorization(a, eps)
+    x = lu.solve_many(b_rows[:lu.n]) + copy.deepcopy(b_rows[lu.n:])
+    return lu.det(), Matrix.from_lists(x) if isinstance(b, Matrix) else x
 
 
-def invert(m: List[List]) -> List[List]:
-    """Invert matrix by creating an identity matrix and applying gauss elimination
+def invert(m: TMatrix, eps: float = 1.0 / (10 ** 10)) -> TMatrix:
+    """Invert matrix with LU decomposition (or NumPy, see set_backend()),
+    or exactly with exact_invert() for int/Fraction matrices
 
     :param m: input matrix nxp, n>=p
+    :param eps: pivots with absolute value <= eps are treated as zero, on both float backends
     :return:
-        inverse matrix of m
+        inverse matrix of m (of its leading pxp block, if n>p)
     """
     n, p = len(m), len(m[0])
     assert n >= p, "No inverse matrix exists for m:{}".format(m)
-
-    # generate identity matrix, 1's, where i==j, 0's otherwise
-    b = [[int(i == j) for j in range(p)] for i in range(n)]
-    # extract the appended matrix (kind of m2[m:,...]
-    return gauss(m, b)[1]
+    if _is_exact(m):
+        inverse = exact_invert(_as_lists(m)[:p])
+    elif _use_numpy(m):
+        return _numpy_invert(m, eps)
+    else:
+        inverse = LUFactorization(m, eps).inverse()
+    return Matrix.from_lists(inverse) if isinstance(m, Matrix) else inverse
 
 
-def filled_matrix(p: int, q: int, fill_val=0) -> List[List]:
+def filled_matrix(p: int, q: int, fill_val=0, flat: bool = False) -> TMatrix:
     """Create matrix of size p x q and fill it with fill_val
      
     :param p:   number of rows 
     :param q:   number of columns
     :param fill_val: every element of matrix is going to be equal fill_val
+    :param flat: return a Matrix instead of List[List]
     :return: matrix of size p x q 
     """
+    if flat:
+        return Matrix.filled(p, q, fill_val)
     return [[fill_val] * q for _ in range(p)]
 
 
-def matmul(a: List[List], b: List[List]) -> List[List]:
+def _matmul_rows(a_rows: Sequence[Sequence], bt_rows: Sequence[Sequence], block: int = MATMUL_BLOCK) -> List[List]:
+    """Multiply rows of a with the rows of transposed b, one tile of block columns at a time,
+    so that the tile of b stays in the cache while all rows of a pass by.
+    """
+    result = [[] for _ in a_rows]
+    for j in range(0, len(bt_rows), block):
+        tile = bt_rows[j:j + block]
+        for row, result_row in zip(a_rows, result):
+            result_row += [sum(map(mul, row, col)) for col in tile]
+    return result
+
+
+def matmul(a: TMatrix, b: TMatrix) -> TMatrix:
     """Multiply matrices a (nxp) and b [pxq]
 
+    B is transposed up front, so that every element of the result is a dot product of two rows.
+    Float matrices are multiplied with NumPy, if the backend allows it (see set_backend()).
+
     :param a: input matrix a
     :param b: input matrix b
     :return:
-        matrix nxq
+        matrix nxq, a Matrix if a or b is a Matrix, List[List] otherwise, see sparse_matmul() for sparse matrices
     """
+    if isinstance(a, (DOKMatrix, CSRMatrix)) or isinstance(b, (DOKMatrix, CSRMatrix)):
+        return sparse_matmul(a, b)
     n, p = len(a), len(a[0])
     p1, q = len(b), len(b[0])
 
     assert p == p1, "Incompatible dimensions of a:{} and b:{}".format(a, b)
 
-    result = filled_matrix(n, q)
-    for i in range(n):
-        for j in range(q):
-            result[i][j] = sum(a[i][k] * b[k][j] for k in range(p))
+    if _use_numpy(a, b):
+        return _from_numpy(_to_numpy(a) @ _to_numpy(b), a if isinstance(a, Matrix) else b)
+
+    a_rows = a.tolist() if isinstance(a, Matrix) else a
+    bt_rows = b.transpose().tolist() if isinstance(b, Matrix) else list(zip(*b))
+    result = _matmul_rows(a_rows, bt_rows)
+    if isinstance(a, Matrix) or isinstance(b, Matrix):
+        data = [x for row in result for x in row]
+        for m in (a, b):
+            if isinstance(m, Matrix) and isinstance(m.data, array) and m.data.typecode in 'fd':
+                data = array(m.data.typecode, data)
+                break
+        return Matrix(n, q, data)
     return result
 
 
-def map_matrix(f: Callable, a: List[List]) -> List[List]:
+def map_matrix(f: Callable, a: TMatrix) -> TMatrix:
     """Apply f function/operator on every element of a
 
     :param f: some function
     :param a: input matrix
     :return:
-        result of map operations
+        result of map operations, of the same matrix type as a
     """
+    if isinstance(a, Matrix):
+        return Matrix(a.rows, a.cols, list(map(f, a.data)))
     return [list(map(f, v)) for v in a]
 
 
-def to_rational_matrix(a: List[List[TNum]]) -> List[List[Fraction]]:
+def to_rational_matrix(a: TMatrix) -> TMatrix:
     """Convert elements of matrix to Fractions
 
     :param a: input Matrix
@@ -131,6 +577,459 @@ def to_rational_matrix(a: List[List[TNum]]) -> List[List[Fraction]]:
     return map_matrix(Fraction, a)
 
 
+def _mul2(a: Sequence, b: Sequence, mod: Optional[int]) -> tuple:
+    """Product of 2x2 matrices given as flat row-major tuples"""
+    a0, a1, a2, a3 = a
+    b0, b1, b2, b3 = b
+    c = (a0 * b0 + a1 * b2, a0 * b1 + a1 * b3,
+         a2 * b0 + a3 * b2, a2 * b1 + a3 * b3)
+    return c if mod is None else tuple(x % mod for x in c)
+
+
+def _mul3(a: Sequence, b: Sequence, mod: Optional[int]) -> tuple:
+    """Product of 3x3 matrices given as flat row-major tuples"""
+    a0, a1, a2, a3, a4, a5, a6, a7, a8 = a
+    b0, b1, b2, b3, b4, b5, b6, b7, b8 = b
+    c = (a0 * b0 + a1 * b3 + a2 * b6, a0 * b1 + a1 * b4 + a2 * b7, a0 * b2 + a1 * b5 + a2 * b8,
+         a3 * b0 + a4 * b3 + a5 * b6, a3 * b1 + a4 * b4 + a5 * b7, a3 * b2 + a4 * b5 + a5 * b8,
+         a6 * b0 + a7 * b3 + a8 * b6, a6 * b1 + a7 * b4 + a8 * b7, a6 * b2 + a7 * b5 + a8 * b8)
+    return c if mod is None else tuple(x % mod for x in c)
+
+
+def _mul_rows(a: List[List], b: List[List], mod: Optional[int]) -> List[List]:
+    """Product of List[List] matrices, every element reduced modulo mod"""
+    result = _matmul_rows(a, list(zip(*b)))
+    return result if mod is None else [[x % mod for x in row] for row in result]
+
+
+def matpow(a: TMatrix, k: int, mod: Optional[int] = None) -> TMatrix:
+    """Raise square matrix a to the power k by binary exponentiation, O(n^3 log k)
+
+    With mod, every product is reduced, so the elements stay below mod however large k is.
+    2x2 and 3x3 matrices are multiplied by unrolled kernels on flat tuples.
+
+    :param a: square matrix nxn
+    :param k: exponent >= 0
+    :param mod: optional modulus of int matrices
+    :return:
+        a**k (mod mod), a Matrix if a is a Matrix, List[List] otherwise
+    :raises
+        ValueError if a is not square or k < 0
+
+    Examples:
+        >>> matpow([[1, 1], [1, 0]], 90)
+        [[4660046610375530309, 2880067194370816120], [2880067194370816120, 1779979416004714189]]
+        >>> matpow([[1, 1], [1, 0]], 10 ** 18, mod=10 ** 9 + 7)[0][1]
+        209783453
+    """
+    rows = _as_lists(a)
+    n = len(rows)
+    if any(len(row) != n for row in rows) or k < 0:
+        raise ValueError("matpow requires a square matrix and k >= 0, supplied {}x{} and k={}".format(
+            n, len(rows[0]) if rows else 0, k))
+    one = 1 if mod is None else 1 % mod
+    if n in (2, 3):
+        multiply = _mul2 if n == 2 else _mul3
+        base = tuple(x for row in rows for x in row)
+        if mod is not None:
+            base = tuple(x % mod for x in base)
+        result = tuple(one if i % (n + 1) == 0 else 0 for i in range(n * n))
+    else:
+        multiply = _mul_rows
+        base = rows if mod is None else [[x % mod for x in row] for row in rows]
+        result = [[one if i == j else 0 for j in range(n)] for i in range(n)]
+    while k:
+        if k & 1:
+            result = multiply(result, base, mod)
+        k >>= 1
+        if k:
+            base = multiply(base, base, mod)
+    if n in (2, 3):
+        result = [list(result[i:i + n]) for i in range(0, n * n, n)]
+    return Matrix.from_lists(result) if isinstance(a, Matrix) else result
+
+
+def _polymul_mod(p: List[int], q: List[int], coeffs: Sequence[int], mod: Optional[int]) -> List[int]:
+    """p * q reduced modulo the characteristic polynomial x^d - c1 x^(d-1) - ... - cd of the recurrence"""
+    d = len(coeffs)
+    product = [0] * (2 * d - 1)
+    for i, x in enumerate(p):
+        if x:
+            for j, y in enumerate(q):
+                product[i + j] += x * y
+    for i in range(2 * d - 2, d - 1, -1):  # x^i = x^(i-d) * (c1 x^(d-1) + ... + cd)
+        t = product[i]
+        if t:
+            if mod is not None:
+                t %= mod
+            for j, c in enumerate(coeffs, 1):
+                product[i - j] += t * c
+    return product[:d] if mod is None else [x % mod for x in product[:d]]
+
+
+def linear_recurrence_nth(coeffs: Sequence[int], init: Sequence[int], n: int, mod: Optional[int] = None,
+                          method: str = 'kitamasa') -> int:
+    """n-th term of the linear recurrence a[i] = coeffs[0] * a[i - 1] + ... + coeffs[d - 1] * a[i - d]
+
+    'kitamasa' computes x^n modulo the characteristic polynomial in O(d^2 log n), a[n] is then the combination
+    of the initial terms with its coefficients. 'matrix' raises the dxd companion matrix with matpow()
+    in O(d^3 log n), which is competitive for d <= 3 thanks to the unrolled kernels.
+
+    :param coeffs: d coefficients of the recurrence
+    :param init: initial terms a[0], ..., a[d - 1]
+    :param n: index of the term >= 0
+    :param mod: optional modulus
+    :param method: 'kitamasa' or 'matrix'
+    :return:
+        a[n] (mod mod)
+    :raises
+        ValueError for an unknown method, n < 0 or a different number of coeffs and init terms
+
+    Examples:
+        >>> linear_recurrence_nth([1, 1], [0, 1], 90)  # Fibonacci numbers
+        2880067194370816120
+        >>> linear_recurrence_nth([1, 1, 1], [0, 0, 1], 10 ** 18, mod=10 ** 9 + 7, method='matrix')  # Tribonacci
+        913728402
+    """
+    d = len(coeffs)
+    if method not in ('kitamasa', 'matrix') or n < 0 or d != len(init) or not d:
+        raise ValueError("Unsupported arguments: method={}, n={}, {} coefficients, {} initial terms".format(
+            method, n, d, len(init)))
+    if n < d:
+        return init[n] if mod is None else init[n] % mod
+    if method == 'matrix':
+        companion = [list(coeffs)] + [[int(j == i) for j in range(d)] for i in range(d - 1)]
+        row = matpow(companion, n - d + 1, mod)[0]  # (a[n], ..., a[n - d + 1]) = C^(n-d+1) (a[d-1], ..., a[0])
+        result = sum(map(mul, row, reversed(init)))
+        return result if mod is None else result % mod
+    if mod is not None:
+        coeffs = [c % mod for c in coeffs]
+    if d == 1:
+        result = init[0] * pow(coeffs[0], n, mod)
+        return result if mod is None else result % mod
+    power = [1] + [0] * (d - 1)  # x^0
+    for bit in bin(n)[2:]:
+        power = _polymul_mod(power, power, coeffs, mod)
+        if bit == '1':  # multiply by x: shift, the overflowing x^d is reduced by the recurrence
+            top = power[-1]
+            power = [0] + power[:-1]
+            for j, c in enumerate(coeffs):
+                power[d - 1 - j] += top * c
+            if mod is not None:
+                power = [x % mod for x in power]
+    result = sum(map(mul, power, init))
+    return result if mod is None else result % mod
+
+
+class DOKMatrix:
+    """Sparse matrix as a dictionary of keys {(i, j): value}, cheap to build element by element.
+    Zero elements are not stored.
+
+    Examples:
+        >>> m = DOKMatrix(2, 3)
+        >>> m[0, 2] = 5
+        >>> m[1, 1] = 1
+        >>> m.to_dense(), m.nnz
+        ([[0, 0, 5], [0, 1, 0]], 2)
+    """
+    __slots__ = ('rows', 'cols', 'entries')
+
+    def __init__(self, rows: int, cols: int, entries: Optional[dict] = None):
+        self.rows = rows
+        self.cols = cols
+        self.entries = {} if entries is None else {k: v for k, v in entries.items() if v}
+
+    @classmethod
+    def from_dense(cls, a: TMatrix) -> 'DOKMatrix':
+        a = _as_lists(a)
+        m = cls(len(a), len(a[0]) if a else 0)
+        m.entries = {(i, j): x for i, row in enumerate(a) for j, x in enumerate(row) if x}
+        return m
+
+    @property
+    def shape(self) -> (int, int):
+        return self.rows, self.cols
+
+    @property
+    def nnz(self) -> int:
+        return len(self.entries)
+
+    def __getitem__(self, index):
+        return self.entries.get(index, 0)
+
+    def __setitem__(self, index, value):
+        if value:
+            self.entries[index] = value
+        else:
+            self.entries.pop(index, None)
+
+    def to_dense(self) -> List[List]:
+        result = filled_matrix(self.rows, self.cols)
+        for (i, j), x in self.entries.items():
+            result[i][j] = x
+        return result
+
+    def tocsr(self) -> 'CSRMatrix':
+        return CSRMatrix.from_dok(self)
+
+    def __matmul__(self, other):
+        return matmul(self, other)
+
+
+class CSRMatrix:
+    """Sparse matrix in compressed sparse row format
+
+    The column indices and values of row i are indices[indptr[i]:indptr[i + 1]] and data[indptr[i]:indptr[i + 1]],
+    column indices are sorted within a row. Memory usage is O(rows + nnz).
+
+    Examples:
+        >>> m = CSRMatrix.from_dense([[1, 0, 2], [0, 0, 3]])
+        >>> list(m.indptr), list(m.indices), m.data
+        ([0, 2, 3], [0, 2, 2], [1, 2, 3])
+        >>> m.dot([1, 1, 1]), (m @ m.transpose()).to_dense()
+        ([3, 3], [[5, 6], [6, 9]])
+    """
+    __slots__ = ('rows', 'cols', 'indptr', 'indices', 'data')
+
+    def __init__(self, rows: int, cols: int, indptr: Sequence[int], indices: Sequence[int], data: List):
+        if len(indptr) != rows + 1 or len(indices) != len(data) or indptr[-1] != len(data):
+            raise ValueError("Inconsistent CSR structure of a {}x{} matrix".format(rows, cols))
+        self.rows = rows
+        self.cols = cols
+        self.indptr = array('q', indptr)
+        self.indices = array('q', indices)
+        self.data = list(data)
+
+    @classmethod
+    def from_dense(cls, a: TMatrix) -> 'CSRMatrix':
+        a = _as_lists(a)
+        indptr, indices, data = [0], [], []
+        for row in a:
+            for j, x in enumerate(row):
+                if x:
+                    indices.append(j)
+                    data.append(x)
+            indptr.append(len(data))
+        return cls(len(a), len(a[0]) if a else 0, indptr, indices, data)
+
+    @classmethod
+    def from_dok(cls, m: DOKMatrix) -> 'CSRMatrix':
+        indptr = [0] * (m.rows + 1)
+        keys = sorted(m.entries)
+        for i, _ in keys:
+            indptr[i + 1] += 1
+        for i in range(m.rows):
+            indptr[i + 1] += indptr[i]
+        return cls(m.rows, m.cols, indptr, [j for _, j in keys], [m.entries[k] for k in keys])
+
+    @property
+    def shape(self) -> (int, int):
+        return self.rows, self.cols
+
+    @property
+    def nnz(self) -> int:
+        return len(self.data)
+
+    def row(self, i: int) -> (Sequence[int], List):
+        """Column indices and values of the nonzero elements of the i-th row"""
+        start, end = self.indptr[i], self.indptr[i + 1]
+        return self.indices[start:end], self.data[start:end]
+
+    def __getitem__(self, index):
+        i, j = index
+        start, end = self.indptr[i], self.indptr[i + 1]
+        k = bisect_left(self.indices, j, start, end)
+        return self.data[k] if k < end and self.indices[k] == j else 0
+
+    def todok(self) -> DOKMatrix:
+        m = DOKMatrix(self.rows, self.cols)
+        for i in range(self.rows):
+            for k in range(self.indptr[i], self.indptr[i + 1]):
+                m.entries[i, self.indices[k]] = self.data[k]
+        return m
+
+    def to_dense(self) -> List[List]:
+        result = filled_matrix(self.rows, self.cols)
+        for i, row in enumerate(result):
+            for k in range(self.indptr[i], self.indptr[i + 1]):
+                row[self.indices[k]] = self.data[k]
+        return result
+
+    def transpose(self) -> 'CSRMatrix':
+        counts = [0] * (self.cols + 1)
+        for j in self.indices:
+            counts[j + 1] += 1
+        for j in range(self.cols):
+            counts[j + 1] += counts[j]
+        indptr = counts[:]
+        indices = [0] * self.nnz
+        data = [0] * self.nnz
+        for i in range(self.rows):  # rows are visited in order, so the new rows come out sorted
+            for k in range(self.indptr[i], self.indptr[i + 1]):
+                position = counts[self.indices[k]]
+                counts[self.indices[k]] += 1
+                indices[position] = i
+                data[position] = self.data[k]
+        return CSRMatrix(self.cols, self.rows, indptr, indices, data)
+
+    def diagonal(self) -> List:
+        return [self[i, i] for i in range(min(self.rows, self.cols))]
+
+    def dot(self, x: Sequence[TNum]) -> List[TNum]:
+        """Multiply the matrix by the vector x"""
+        indptr, indices, data = self.indptr, self.indices, self.data
+        return [sum(data[k] * x[indices[k]] for k in range(indptr[i], indptr[i + 1])) for i in range(self.rows)]
+
+    def __matmul__(self, other):
+        return matmul(self, other)
+
+
+TSparse = Union[DOKMatrix, CSRMatrix]
+
+
+def _as_csr(m: TSparse) -> CSRMatrix:
+    return m.tocsr() if isinstance(m, DOKMatrix) else m
+
+
+def sparse_matmul(a: Union[TMatrix, TSparse], b: Union[TMatrix, TSparse]):
+    """Multiply matrices a (nxp) and b [pxq], where at least one of them is sparse
+
+    :return:
+        CSRMatrix if both a and b are sparse, otherwise a dense matrix of the type of the dense operand
+    """
+    a_shape = a.shape if isinstance(a, (DOKMatrix, CSRMatrix)) else (len(a), len(a[0]))
+    b_shape = b.shape if isinstance(b, (DOKMatrix, CSRMatrix)) else (len(b), len(b[0]))
+    assert a_shape[1] == b_shape[0], "Incompatible dimensions of a:{} and b:{}".format(a_shape, b_shape)
+    if isinstance(a, (DOKMatrix, CSRMatrix)) and isinstance(b, (DOKMatrix, CSRMatrix)):
+        a, b = _as_csr(a), _as_csr(b)
+        indptr, indices, data = [0], [], []
+        for i in range(a.rows):  # Gustavson's row-by-row product
+            accumulator = {}
+            for k in range(a.indptr[i], a.indptr[i + 1]):
+                x = a.data[k]
+                row = a.indices[k]
+                for t in range(b.indptr[row], b.indptr[row + 1]):
+                    j = b.indices[t]
+                    accumulator[j] = accumulator.get(j, 0) + x * b.data[t]
+            for j in sorted(accumulator):
+                if accumulator[j]:
+                    indices.append(j)
+                    data.append(accumulator[j])
+            indptr.append(len(data))
+        return CSRMatrix(a.rows, b.cols, indptr, indices, data)
+    if isinstance(a, (DOKMatrix, CSRMatrix)):
+        a, dense = _as_csr(a), b
+        b_rows = _as_lists(b)
+        result = []
+        for i in range(a.rows):
+            row = [0] * len(b_rows[0])
+            for k in range(a.indptr[i], a.indptr[i + 1]):
+                x = a.data[k]
+                row = [r + x * y for r, y in zip(row, b_rows[a.indices[k]])]
+            result.append(row)
+    else:
+        b, dense = _as_csr(b), a
+        result = []
+        for a_row in _as_lists(a):
+            row = [0] * b.cols
+            for k, x in enumerate(a_row):
+                if x:
+                    for t in range(b.indptr[k], b.indptr[k + 1]):
+                        row[b.indices[t]] += x * b.data[t]
+            result.append(row)
+    return Matrix.from_lists(result) if isinstance(dense, Matrix) else result
+
+
+def _diagonal(a: CSRMatrix) -> List:
+    diagonal = a.diagonal()
+    if not all(diagonal):
+        raise ValueError('Input matrix A has zeros on the diagonal')
+    return diagonal
+
+
+def jacobi(a: TSparse, b: Sequence[float], x0: Optional[Sequence[float]] = None, tol: float = 1e-10,
+           max_iter: int = 10000) -> List[float]:
+    """Solve ax=b with Jacobi iterations, converges for strictly diagonally dominant a
+
+    :param a: sparse square matrix
+    :param b: right-hand side vector
+    :param x0: initial guess, zeros by default
+    :param tol: stop when no element of x changes by more than tol
+    :param max_iter: max number of iterations
+    :return:
+        x vector
+    :raises
+        ValueError if a has zeros on the diagonal or the iterations do not converge
+    """
+    a = _as_csr(a)
+    diagonal = _diagonal(a)
+    x = list(x0) if x0 is not None else [0.0] * a.rows
+    for _ in range(max_iter):
+        ax = a.dot(x)
+        new_x = [xi + (bi - axi) / d for xi, bi, axi, d in zip(x, b, ax, diagonal)]
+        change = max(map(abs, map(sub, new_x, x)), default=0)
+        x = new_x
+        if change <= tol:
+            return x
+    raise ValueError('Jacobi iterations did not converge in {} steps'.format(max_iter))
+
+
+def gauss_seidel(a: TSparse, b: Sequence[float], x0: Optional[Sequence[float]] = None, tol: float = 1e-10,
+                 max_iter: int = 10000) -> List[float]:
+    """Solve ax=b with Gauss-Seidel iterations, converges for strictly diagonally dominant
+    or symmetric positive definite a. Arguments are the same as of jacobi().
+    """
+    a = _as_csr(a)
+    diagonal = _diagonal(a)
+    indptr, indices, data = a.indptr, a.indices, a.data
+    x = list(x0) if x0 is not None else [0.0] * a.rows
+    for _ in range(max_iter):
+        change = 0
+        for i in range(a.rows):
+            total = sum(data[k] * x[indices[k]] for k in range(indptr[i], indptr[i + 1]))
+            delta = (b[i] - total) / diagonal[i]
+            x[i] += delta
+            change = max(change, abs(delta))
+        if change <= tol:
+            return x
+    raise ValueError('Gauss-Seidel iterations did not converge in {} steps'.format(max_iter))
+
+
+def conjugate_gradient(a: TSparse, b: Sequence[float], x0: Optional[Sequence[float]] = None, tol: float = 1e-10,
+                       max_iter: Optional[int] = None) -> List[float]:
+    """Solve ax=b with the conjugate gradient method, a must be symmetric positive definite
+
+    :param a: sparse square matrix
+    :param b: right-hand side vector
+    :param x0: initial guess, zeros by default
+    :param tol: stop when the norm of the residual b - ax is <= tol * norm of b
+    :param max_iter: max number of iterations, 10 times the size of a by default
+    :return:
+        x vector
+    :raises
+        ValueError if the iterations do not converge
+    """
+    a = _as_csr(a)
+    x = list(x0) if x0 is not None else [0.0] * a.rows
+    r = [bi - axi for bi, axi in zip(b, a.dot(x))]
+    direction = r[:]
+    rr = sum(map(mul, r, r))
+    threshold = tol * tol * sum(map(mul, b, b))
+    for _ in range(max_iter or 10 * a.rows):
+        if rr <= threshold:
+            return x
+        ad = a.dot(direction)
+        alpha = rr / sum(map(mul, direction, ad))
+        x = [xi + alpha * di for xi, di in zip(x, direction)]
+        r = [ri - alpha * adi for ri, adi in zip(r, ad)]
+        new_rr = sum(map(mul, r, r))
+        direction = [ri + new_rr / rr * di for ri, di in zip(r, direction)]
+        rr = new_rr
+    if rr <= threshold:
+        return x
+    raise ValueError('Conjugate gradient did not converge')
+
+
 def test_case(result, answer):
     print(result)
     assert result == answer
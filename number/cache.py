@@ -0,0 +1,152 @@
+"""
+Thread-safe, size-bounded memoization shared by the number modules
+
+"""
+import sys
+import threading
+import weakref
+from collections import OrderedDict, namedtuple
+from functools import wraps
+from typing import Callable, Hashable, Optional
+
+CACHE_BYTES = 64 * 2 ** 20  # bound of the caches of big int results, e.g. one C(10**6, 5*10**5) takes 133 KB
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+_MISSING = object()
+_KWARGS = object()  # separates the positional from the keyword arguments in memoize keys
+_caches = weakref.WeakSet()
+
+
+def value_size(value) -> int:
+    """Approximate memory of a cached value in bytes, the magnitude of ints, sys.getsizeof() of anything else"""
+    if type(value) is int:
+        return (value.bit_length() + 7) // 8
+    return sys.getsizeof(value)
+
+
+class LRUCache:
+    """Dictionary with a max number of entries and optionally a max total size of the values, evicting
+    the least recently used entries when full. All operations are guarded by a lock, so an instance can be
+    shared between threads.
+
+    Examples:
+        >>> cache = LRUCache(maxsize=2)
+        >>> cache.put('a', 1); cache.put('b', 2); cache.get('a')
+        1
+        >>> cache.put('c', 3)  # evicts 'b'
+        >>> 'b' in cache, cache.info()
+        (False, CacheInfo(hits=1, misses=0, maxsize=2, currsize=2))
+        >>> cache = LRUCache(maxsize=None, maxbytes=100)
+        >>> cache.put('a', 2 ** 400); cache.put('b', 2 ** 400)  # 51 bytes each, evicts 'a'
+        >>> len(cache), cache.nbytes
+        (1, 51)
+    """
+
+    def __init__(self, maxsize: Optional[int] = 1024, maxbytes: Optional[int] = None,
+                 sizeof: Callable[[object], int] = value_size):
+        """
+        :param maxsize: max number of entries, None for an unbounded cache
+        :param maxbytes: max total size of the values, None for no bound. A single value larger
+            than maxbytes is not cached at all.
+        :param sizeof: size of a value in bytes
+        """
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.nbytes = 0  # total size of the cached values
+        self.hits = 0
+        self.misses = 0
+        self._sizeof = sizeof
+        self._data = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.RLock()
+        _caches.add(self)
+
+    def get(self, key: Hashable, default=None):
+        """Return the value of key and mark it as recently used, count a hit or a miss"""
+        with self._lock:
+            value = self._data.get(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value):
+        size = self._sizeof(value) if self.maxbytes is not None else 0
+        with self._lock:
+            self._pop(key)
+            if self.maxbytes is not None and size > self.maxbytes:
+                return
+            self._data[key] = value
+            self._sizes[key] = size
+            self.nbytes += size
+            while (self.maxsize is not None and len(self._data) > self.maxsize
+                   or self.maxbytes is not None and self.nbytes > self.maxbytes):
+                self._pop(next(iter(self._data)))
+
+    def _pop(self, key: Hashable):
+        if self._data.pop(key, _MISSING) is not _MISSING:
+            self.nbytes -= self._sizes.pop(key)
+
+    def clear(self):
+        """Remove all entries and reset the statistics"""
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self.nbytes = 0
+            self.hits = self.misses = 0
+
+    def info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.maxsize, len(self._data))
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+
+def memoize(maxsize: Optional[int] = 1024, maxbytes: Optional[int] = None) -> Callable:
+    """Decorator caching results of a function in an LRUCache, bounded by the number of entries and
+    optionally by their total size in bytes
+
+    The cache is available as the 'cache' attribute of the decorated function, together with
+    cache_info() and cache_clear().
+
+    Examples:
+        >>> @memoize(maxsize=10)
+        ... def square(x):
+        ...     return x * x
+        >>> square(3), square(3), square.cache_info()
+        (9, 9, CacheInfo(hits=1, misses=1, maxsize=10, currsize=1))
+    """
+
+    def decorator(f):
+        cache = LRUCache(maxsize, maxbytes)
+
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            # the marker keeps f(a, k=v) apart from a positional call with the same flattened key
+            key = args + (_KWARGS,) + tuple(sorted(kwargs.items())) if kwargs else args
+            result = cache.get(key, _MISSING)
+            if result is _MISSING:
+                result = f(*args, **kwargs)
+                cache.put(key, result)
+            return result
+
+        wrapper.cache = cache
+        wrapper.cache_info = cache.info
+        wrapper.cache_clear = cache.clear
+        return wrapper
+
+    return decorator
+
+
+def clear_all():
+    """Clear every LRUCache alive, e.g. to release memory in a long-running process"""
+    for cache in list(_caches):
+        cache.clear()
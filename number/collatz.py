@@ -0,0 +1,122 @@
+"""
+A module with functions for working with Collatz (3n + 1) sequences
+
+"""
+from array import array
+from typing import Iterable, Iterator, List, Optional
+
+DEFAULT_CACHE_SIZE = 1 << 20
+
+
+def collatz_sequence(n: int) -> Iterator[int]:
+    """Generate the Collatz sequence from n > 0 down to 1
+
+    Examples:
+        >>> list(collatz_sequence(6))
+        [6, 3, 10, 5, 16, 8, 4, 2, 1]
+    """
+    yield n
+    while n != 1:
+        n = n >> 1 if n & 1 == 0 else 3 * n + 1
+        yield n
+
+
+class CollatzCache:
+    """Lengths of Collatz sequences (number of terms, including n and 1) for all n < limit, computed on demand
+
+    The lengths are kept in one array('I') of limit entries, 0 stands for a not yet known length.
+    Every computed trajectory stores the lengths of the terms < limit it visits (path compression),
+    so later trajectories stop as soon as they reach a known term.
+
+    Examples:
+        >>> cache = CollatzCache(100)
+        >>> cache.length(27), cache.lengths[41]  # 27, 82, 41, ...: 41 has been cached on the way
+        (112, 110)
+    """
+
+    def __init__(self, limit: int = DEFAULT_CACHE_SIZE):
+        self.limit = max(limit, 2)
+        self.lengths = array('I', [0]) * self.limit
+        self.lengths[1] = 1
+
+    def length(self, n: int) -> int:
+        """Length of the Collatz sequence starting at n > 0, ValueError for n < 1, which never reaches 1"""
+        if n < 1:
+            raise ValueError("The Collatz sequence is defined for n > 0, supplied n={}".format(n))
+        lengths, limit = self.lengths, self.limit
+        path = []
+        steps = 0
+        while n >= limit or not lengths[n]:
+            path.append((n, steps))
+            if n & 1:
+                n = (3 * n + 1) >> 1  # 3n + 1 is even, do both steps at once
+                steps += 2
+            else:
+                n >>= 1
+                steps += 1
+        total = lengths[n] + steps
+        for m, m_steps in path:
+            if m < limit:
+                lengths[m] = total - m_steps
+        return total
+
+
+_default_cache = None
+
+
+def _cache(cache: Optional[CollatzCache]) -> CollatzCache:
+    global _default_cache
+    if cache is not None:
+        return cache
+    if _default_cache is None:
+        _default_cache = CollatzCache()
+    return _default_cache
+
+
+def collatz_length(n: int, cache: Optional[CollatzCache] = None) -> int:
+    """Length of the Collatz sequence starting at n > 0, using the shared module cache by default
+
+    Examples:
+        >>> collatz_length(1), collatz_length(6), collatz_length(837799)
+        (1, 9, 525)
+    """
+    return _cache(cache).length(n)
+
+
+def collatz_lengths(numbers: Iterable[int], cache: Optional[CollatzCache] = None) -> List[int]:
+    """Lengths of the Collatz sequences of a batch of starting values
+
+    Examples:
+        >>> collatz_lengths(range(1, 10))
+        [1, 2, 8, 3, 6, 9, 17, 4, 20]
+    """
+    length = _cache(cache).length
+    return [length(n) for n in numbers]
+
+
+def longest_under(limit: int) -> (int, int):
+    """Find the starting value n < limit with the longest Collatz sequence
+
+    Lengths of all n < limit are filled into one array in ascending order, so every even n
+    costs one lookup of n / 2, and odd trajectories stop at the first smaller value.
+
+    Returns:
+        (n, length of its sequence), the smallest such n in case of ties
+
+    Examples:
+        >>> longest_under(10), longest_under(10 ** 6)
+        ((9, 20), (837799, 525))
+    """
+    if limit < 2:
+        raise ValueError("There are no starting values < {}".format(limit))
+    cache = CollatzCache(limit)
+    lengths, length = cache.lengths, cache.length
+    best, best_length = 1, 1
+    for n in range(2, limit):
+        if n & 1:
+            n_length = lengths[n] or length(n)
+        else:
+            n_length = lengths[n] = lengths[n >> 1] + 1
+        if n_length > best_length:
+            best, best_length = n, n_length
+    return best, best_length
@@ -0,0 +1,93 @@
+"""
+Combinatorics modulo a prime number without big integer arithmetic
+
+"""
+from array import array
+from typing import Iterable, List, Sequence, Tuple
+
+from pzeug.number.prime import is_prime
+
+
+class ModCombinatorics:
+    """Precomputed factorials and inverse factorials modulo a prime p up to limit
+
+    nCr, nPr and multinomial coefficients are answered in O(1) for arguments within the table,
+    binomial coefficients of larger n are reduced to the table with Lucas' theorem.
+
+    Examples:
+        >>> mc = ModCombinatorics(10 ** 9 + 7, 1000)
+        >>> mc.ncr(1000, 500), mc.npr(10, 3), mc.multinomial([2, 3, 4])
+        (159835829, 720, 1260)
+        >>> ModCombinatorics(7, 6).ncr(10 ** 6, 7 ** 3)  # Lucas' theorem
+        3
+    """
+
+    def __init__(self, p: int, limit: int):
+        """
+        :param p: prime modulus
+        :param limit: max n of the tables, limit >= p - 1 allows any n with Lucas' theorem
+        :raises
+            ValueError if p is not a prime number
+        """
+        if not is_prime(p):
+            raise ValueError("The modulus must be a prime number, supplied p={}".format(p))
+        size = min(limit, p - 1) + 1
+        typecode = 'Q' if p < 2 ** 32 else None
+        fact = [1] * size
+        for i in range(1, size):
+            fact[i] = fact[i - 1] * i % p
+        inv_fact = [1] * size
+        inv_fact[-1] = pow(fact[-1], p - 2, p)
+        for i in range(size - 1, 0, -1):
+            inv_fact[i - 1] = inv_fact[i] * i % p
+        self.p = p
+        self.limit = size - 1
+        self.fact = array(typecode, fact) if typecode else fact
+        self.inv_fact = array(typecode, inv_fact) if typecode else inv_fact
+
+    def _check(self, n):
+        if n > self.limit:
+            raise ValueError("{} exceeds the limit of the factorial table {}".format(n, self.limit))
+
+    def ncr(self, n: int, k: int) -> int:
+        """Binomial coefficient n choose k modulo p"""
+        if k < 0 or k > n:
+            return 0
+        p, fact, inv_fact = self.p, self.fact, self.inv_fact
+        if n <= self.limit:
+            return fact[n] * inv_fact[k] % p * inv_fact[n - k] % p
+        result = 1
+        while k:  # Lucas' theorem: the product of binomial coefficients of the base p digits
+            n, n_digit = divmod(n, p)
+            k, k_digit = divmod(k, p)
+            if k_digit > n_digit:
+                return 0
+            self._check(n_digit)
+            result = result * fact[n_digit] % p * inv_fact[k_digit] % p * inv_fact[n_digit - k_digit] % p
+        return result
+
+    def npr(self, n: int, k: int) -> int:
+        """Number of k-permutations of n elements, n! / (n - k)!, modulo p"""
+        if k < 0 or k > n:
+            return 0
+        p = self.p
+        if n // p != (n - k) // p:  # one of the factors n - k + 1, ..., n is divisible by p
+            return 0
+        n, m = n % p, (n - k) % p
+        self._check(n)
+        return self.fact[n] * self.inv_fact[m] % p
+
+    def multinomial(self, ks: Iterable[int]) -> int:
+        """Multinomial coefficient (k1 + k2 + ...)! / (k1! * k2! * ...) modulo p"""
+        result = 1
+        total = 0
+        for k in ks:
+            total += k
+            result = result * self.ncr(total, k) % self.p
+        return result
+
+    def ncr_many(self, queries: Sequence[Tuple[int, int]]) -> List[int]:
+        """Binomial coefficients modulo p for a batch of (n, k) queries"""
+        p, limit, fact, inv_fact, ncr = self.p, self.limit, self.fact, self.inv_fact, self.ncr
+        return [fact[n] * inv_fact[k] % p * inv_fact[n - k] % p if 0 <= k <= n <= limit else ncr(n, k)
+                for n, k in queries]
@@ -0,0 +1,182 @@
+"""
+A module with functions for working with digits of numbers in any base
+
+"""
+from typing import Iterator, List, Optional, Sequence
+
+_POWERS = {}
+
+
+def powers(base: int, count: int) -> List[int]:
+    """Table of base**0, base**1, ..., at least count entries long, shared between calls
+
+    Examples:
+        >>> powers(10, 4)[:4]
+        [1, 10, 100, 1000]
+    """
+    table = _POWERS.setdefault(base, [1])
+    while len(table) < count:
+        table.append(table[-1] * base)
+    return table
+
+
+def num_digits(n: int, base: int = 10) -> int:
+    """Number of digits of n >= 0, 0 has one digit"""
+    if base == 10:
+        return len(str(n))
+    count = 1
+    while n >= base:
+        n //= base
+        count += 1
+    return count
+
+
+def to_digits(n: int, base: int = 10) -> List[int]:
+    """Digits of n >= 0, most significant first
+
+    Examples:
+        >>> to_digits(1203), to_digits(10, 2)
+        ([1, 2, 0, 3], [1, 0, 1, 0])
+    """
+    if base == 10:
+        return list(map(int, str(n)))
+    result = []
+    while True:
+        n, digit = divmod(n, base)
+        result.append(digit)
+        if not n:
+            return result[::-1]
+
+
+def from_digits(digits: Sequence[int], base: int = 10) -> int:
+    """Number from its digits, most significant first
+
+    Examples:
+        >>> from_digits([1, 2, 0, 3]), from_digits([1, 0, 1, 0], 2)
+        (1203, 10)
+    """
+    if base == 10 and digits:
+        return int(''.join(map(str, digits)))
+    n = 0
+    for digit in digits:
+        n = n * base + digit
+    return n
+
+
+def reverse(n: int, base: int = 10) -> int:
+    """Number with the digits of n >= 0 in reversed order, trailing zeros of n disappear"""
+    if base == 10:
+        return int(str(n)[::-1])
+    return from_digits(to_digits(n, base)[::-1], base)
+
+
+def is_palindrome(n: int, base: int = 10) -> bool:
+    if base == 10:
+        s = str(n)
+        return s == s[::-1]
+    digits = to_digits(n, base)
+    return digits == digits[::-1]
+
+
+def palindromes(length: int, base: int = 10, descending: bool = False, start: Optional[int] = None) -> Iterator[int]:
+    """Generate palindromes with exactly length digits in ascending (or descending) order
+
+    Every palindrome is built from its first half, so there is nothing to test. If start is given,
+    the generation begins with the palindrome of the first half start, smaller (larger) halves are skipped.
+
+    Examples:
+        >>> list(palindromes(3))[:4], next(palindromes(4, descending=True))
+        ([101, 111, 121, 131], 9999)
+        >>> next(palindromes(6, start=123))
+        123321
+    """
+    half_length = (length + 1) // 2
+    table = powers(base, half_length + 1)
+    shift = table[length // 2]
+    halves = range(0 if length == 1 else table[half_length - 1], table[half_length])
+    if start is not None:
+        halves = halves[:max(start - halves.start + 1, 0)] if descending else halves[max(start - halves.start, 0):]
+    for half in (reversed(halves) if descending else halves):
+        mirrored = half // base if length % 2 else half
+        yield half * shift + reverse(mirrored, base)
+
+
+def palindromes_in_range(lo: int, hi: int, base: int = 10) -> List[int]:
+    """All palindromes in range [lo, hi), generated directly instead of testing every number.
+    Only the palindromes from the first half of lo up to hi are generated.
+
+    Examples:
+        >>> palindromes_in_range(90, 200)
+        [99, 101, 111, 121, 131, 141, 151, 161, 171, 181, 191]
+        >>> palindromes_in_range(10 ** 13, 10 ** 13 + 100)
+        [10000000000001]
+    """
+    lo = max(lo, 0)
+    if lo >= hi:
+        return []
+    result = []
+    length = num_digits(lo, base)
+    start = lo // powers(base, length // 2 + 1)[length // 2]  # the first half of lo
+    while True:
+        for p in palindromes(length, base, start=start):
+            if p >= hi:
+                return result
+            if p >= lo:
+                result.append(p)
+        length += 1
+        start = None
+
+
+def distinct_permutations(items: Sequence) -> Iterator[tuple]:
+    """Generate distinct permutations of items in lexicographic order, without duplicates
+    for repeated items (unlike itertools.permutations)
+
+    Examples:
+        >>> list(distinct_permutations([1, 2, 1]))
+        [(1, 1, 2), (1, 2, 1), (2, 1, 1)]
+    """
+    items = sorted(items)
+    n = len(items)
+    while True:
+        yield tuple(items)
+        i = n - 2  # the rightmost position, which can be increased
+        while i >= 0 and items[i] >= items[i + 1]:
+            i -= 1
+        if i < 0:
+            return
+        j = n - 1
+        while items[j] <= items[i]:
+            j -= 1
+        items[i], items[j] = items[j], items[i]
+        items[i + 1:] = items[:i:-1]
+
+
+def digit_permutations(n: int, base: int = 10) -> Iterator[int]:
+    """Generate numbers formed by distinct permutations of the digits of n, in ascending order.
+    Permutations with leading zeros give numbers with less digits.
+
+    Examples:
+        >>> list(digit_permutations(1022))
+        [122, 212, 221, 1022, 1202, 1220, 2012, 2021, 2102, 2120, 2201, 2210]
+    """
+    for digits in distinct_permutations(to_digits(n, base)):
+        yield from_digits(digits, base)
+
+
+def rotations(n: int, length: int = None, base: int = 10) -> Iterator[int]:
+    """Generate the length - 1 nontrivial rotations of n, moving the leading digit to the end in O(1) each
+
+    :param n: number to rotate
+    :param length: number of digits, including leading zeros, the number of digits of n by default
+
+    Examples:
+        >>> list(rotations(197)), list(rotations(5, length=3))
+        ([971, 719], [50, 500])
+    """
+    if length is None:
+        length = num_digits(n, base)
+    leading = powers(base, length)[length - 1]
+    for _ in range(length - 1):
+        top, rest = divmod(n, leading)
+        n = rest * base + top
+        yield n
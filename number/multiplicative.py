@@ -0,0 +1,102 @@
+"""
+A module with sieves of multiplicative arithmetic functions over whole ranges [0, n]
+
+Every function accepts an optional SPFTable, so that several of them can share one precomputation.
+
+"""
+from array import array
+from typing import Optional
+
+from pzeug.number.prime import SPFTable, factors
+
+
+def _table(n: int, table: Optional[SPFTable]) -> SPFTable:
+    if table is None:
+        return SPFTable(n)
+    if table.limit < n:
+        raise ValueError("The SPFTable limit {} is less than n={}".format(table.limit, n))
+    return table
+
+
+def totient(n: int) -> int:
+    """Euler's totient function, number of integers in range [1, n] coprime to n
+
+    Examples:
+        >>> totient(36)
+        12
+    """
+    result = n
+    for p, _ in factors(n):
+        result -= result // p
+    return result
+
+
+def totients(n: int, table: Optional[SPFTable] = None) -> array:
+    """Euler's totient function of every number in range [0, n]
+
+    Examples:
+        >>> list(totients(10))
+        [0, 1, 1, 2, 2, 4, 2, 6, 4, 6, 4]
+    """
+    return _table(n, table).multiplicative(lambda p, e: p ** (e - 1) * (p - 1), 'I')[:n + 1]
+
+
+def mobius(n: int, table: Optional[SPFTable] = None) -> array:
+    """Moebius function of every number in range [0, n]
+
+    Examples:
+        >>> list(mobius(10))
+        [0, 1, -1, -1, 0, -1, 1, -1, 0, 0, 1]
+    """
+    return _table(n, table).multiplicative(lambda p, e: -1 if e == 1 else 0, 'b')[:n + 1]
+
+
+def divisor_sigma(n: int, k: int = 1, table: Optional[SPFTable] = None):
+    """Sum of the k-th powers of the divisors of every number in range [0, n]
+
+    :param n: upper bound, inclusive
+    :param k: power of the divisors, sigma_0 is the number of divisors
+    :param table: optional precomputed SPFTable
+    :return:
+        array('Q') if all values fit into 64 bits, list of ints otherwise
+
+    Examples:
+        >>> list(divisor_sigma(10))
+        [0, 1, 3, 4, 7, 6, 12, 8, 15, 13, 18]
+        >>> list(divisor_sigma(6, 2))
+        [0, 1, 5, 10, 21, 26, 50]
+    """
+    if k == 0:
+        return divisor_counts(n, table)
+    table = _table(n, table)
+    # the whole table is sieved, so its limit decides the type
+    # sigma_k(m) < zeta(k) * m**k <= 2 * m**k for k >= 2, and sigma_1(m) < m * (ln(m) + 1)
+    fits = (table.limit + 1) ** k * max(2, table.limit.bit_length()) < 2 ** 64
+    return table.multiplicative(lambda p, e: (p ** (k * (e + 1)) - 1) // (p ** k - 1),
+                                'Q' if fits else None)[:n + 1]
+
+
+def divisor_counts(n: int, table: Optional[SPFTable] = None) -> array:
+    """Number of divisors of every number in range [0, n]
+
+    Examples:
+        >>> list(divisor_counts(10))
+        [0, 1, 2, 2, 3, 2, 4, 2, 4, 3, 4]
+    """
+    return _table(n, table).multiplicative(lambda p, e: e + 1, 'I')[:n + 1]
+
+
+def aliquot_sums(n: int, table: Optional[SPFTable] = None):
+    """Sum of proper divisors of every number in range [0, n], the sum for 0 is set to 0
+
+    Examples:
+        >>> list(aliquot_sums(10))
+        [0, 0, 1, 1, 3, 1, 6, 1, 7, 4, 8]
+        >>> s = aliquot_sums(300)
+        >>> [m for m in range(301) if m < s[m] <= 300 and s[s[m]] == m]  # amicable pairs
+        [220]
+    """
+    result = divisor_sigma(n, 1, table)
+    for m in range(1, n + 1):
+        result[m] -= m
+    return result
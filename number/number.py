@@ -5,115 +5,81 @@ A module with auxiliary functions for working with all around numbers
 
 import itertools
 import math
-from collections import deque
+from typing import Iterable, List, Sequence
 
-from pzeug.number.prime import sieve_of_eratosthenes
+from pzeug.number import digits
+from pzeug.number.cache import CACHE_BYTES, memoize
+from pzeug.number.collatz import collatz_sequence
+from pzeug.number.multiplicative import totient
+from pzeug.number.prime import factors, sieve_of_eratosthenes
 
 
 def reverse(n):
-    reversed_n = 0
-    while n > 0:
-        reversed_n = 10 * reversed_n + (n % 10)
-        n //= 10
-    return reversed_n
+    return digits.reverse(n)
 
 
 def is_palindrome(number):
-    return number == reverse(number)
+    return digits.is_palindrome(number)
 
 
 def digits_in_number(number):
-    while number:
-        yield number % 10
-        number //= 10
+    """Generate digits of number, the least significant first"""
+    if number:
+        yield from reversed(digits.to_digits(number))
 
 
-def digits_to_number(digits):
-    number = 0
-    for i, d in enumerate(reversed(digits)):
-        number += d * 10 ** i
-    return number
+def digits_to_number(digits_list):
+    """Number from its digits, the most significant first"""
+    return digits.from_digits(digits_list)
 
 
 def combinations(n):
-    for digits in set(itertools.permutations(digits_in_number(n))):
-        degree = len(digits) - 1
-        digit_sum = 0
-        for digit in digits:
-            digit_sum += digit * 10 ** degree
-            degree -= 1
-        yield digit_sum
+    """Generate distinct numbers formed by permutations of the digits of n, in ascending order"""
+    return digits.digit_permutations(n)
 
 
+@memoize(maxsize=4096, maxbytes=CACHE_BYTES)
 def binomial_coefficient(n: int, k: int) -> int:
     """Returns n choose k, number of ways to choose an unordered subset of k elements
      from a fixed set of n elements.
 
+    Calculated multiplicatively, results are kept in an LRU cache bounded by count and CACHE_BYTES
+    (binomial_coefficient.cache).
+
     Args:
         n: n elements
         k: k elements to choose
+
+    Examples:
+      >>> binomial_coefficient(40, 20)
+      137846528820
     """
 
     if k > n:
         raise ValueError("The following must be True: n >= k. Supplied n={}, k={}.".format(n, k))
+    return math.comb(n, k)
+
+
+def circulars(digits_list):
+    """Generate rotations of a number, given as its digits with the least significant first, other than itself"""
+    digits_list = list(digits_list)
+    return digits.rotations(digits.from_digits(digits_list[::-1]), len(digits_list))
+
 
-    try:
-        if (n, k) in binomial_coefficient.cache:
-            return binomial_coefficient.cache[(n, k)]
-    except AttributeError:
-        binomial_coefficient.cache = {}
-
-    def _binomial_coefficient(n: int, k: int) -> int:
-        if k == 0 or n == k:
-            return 1
-        elif (n, k) in binomial_coefficient.cache:
-            return binomial_coefficient.cache[(n, k)]
-        result = _binomial_coefficient(n - 1, k) + _binomial_coefficient(n - 1, k - 1)
-        binomial_coefficient.cache[(n, k)] = result
-        return result
-
-    return _binomial_coefficient(n, k)
-
-
-def circulars(digits):
-    digits = deque(digits)
-    length = len(digits)
-    for i in range(1, length):
-        digits.rotate(1)
-        degree = 0
-        digit_sum = 0
-        for digit in digits:
-            digit_sum += digit * 10 ** degree
-            degree += 1
-        yield digit_sum
-
-
-# def prim_root(n):
-#     totient = tot(n)
-#     roots = []
-#     exp = len(totient)
-#     for x in totient:
-#         y = 1
-#         while pow(x, y, n) != 1:
-#             y += 1
-#         if y == exp:
-#             roots.append(x)
-#     return roots
-#
-#
-# def colliatz_len(n, prev_len=0):
-#     if n == 1:
-#         return prev_len + 1
-#     if n in len_hash:
-#         return prev_len + len_hash[n]
-#
-#     return colliatz_len(n // 2 if n % 2 == 0 else 3 * n + 1, prev_len + 1)
+def prim_root(n: int) -> list:
+    """Find all primitive roots modulo n, i.e. numbers of multiplicative order totient(n)
+
+    Examples:
+      >>> prim_root(14)
+      [3, 5]
+    """
+    totient_n = totient(n)
+    prime_divisors = [p for p, _ in factors(totient_n)]
+    return [x for x in range(1, n) if gcd(x, n) == 1 and all(pow(x, totient_n // p, n) != 1 for p in prime_divisors)]
 
 
 def colliatz_sequence(n):
-    yield n
-    if n != 1:
-        yield from colliatz_sequence(n // 2 if n % 2 == 0 else 3 * n + 1)
+    return collatz_sequence(n)
 
 
 def gcd(a: int, b: int) -> int:
@@ -122,9 +88,10 @@ def gcd(a: int, b: int) -> int:
     Unless b==0, the result will have the same sign as b (so that when
     b is divided by it, the result comes out positive).
     """
-    while b:
-        a, b = b, a % b
-    return a
+    if not b:
+        return a
+    g = math.gcd(a, b)
+    return g if b > 0 else -g
 
 
 def lcm(a: int, b: int) -> int:
@@ -137,52 +104,135 @@ def lcm(a: int, b: int) -> int:
     return a * b // gcd(a, b)
 
 
+GCD_CHUNK = 1024  # numbers passed to one call of math.gcd/math.lcm
+
+
+def gcd_many(numbers: Iterable[int]) -> int:
+    """Greatest Common Divisor of all numbers (non-negative), 0 for no numbers.
+    Stops reading numbers as soon as the result is 1.
+
+    Examples:
+      >>> gcd_many([84, 126, 210]), gcd_many(itertools.count(6))
+      (42, 1)
+    """
+    numbers = iter(numbers)
+    result = 0
+    while True:
+        chunk = tuple(itertools.islice(numbers, GCD_CHUNK))
+        if not chunk:
+            return result
+        result = math.gcd(result, *chunk)
+        if result == 1:
+            return result
+
+
+def lcm_many(numbers: Iterable[int]) -> int:
+    """Least Common Multiple of all numbers (non-negative), 1 for no numbers.
+    Stops reading numbers as soon as the result is 0.
+
+    Examples:
+      >>> lcm_many([4, 6, 10])
+      60
+    """
+    numbers = iter(numbers)
+    result = 1
+    while True:
+        chunk = tuple(itertools.islice(numbers, GCD_CHUNK))
+        if not chunk:
+            return result
+        result = math.lcm(result, *chunk)
+        if result == 0:
+            return result
+
+
+def product_tree(numbers: Sequence[int]) -> List[List[int]]:
+    """Levels of the product tree of numbers: the numbers, products of pairs, ..., [product of all].
+    Multiplying numbers of similar size is much faster than a running product of a growing number.
+
+    Examples:
+      >>> product_tree([2, 3, 5, 7, 11])
+      [[2, 3, 5, 7, 11], [6, 35, 11], [210, 11], [2310]]
+    """
+    tree = [list(numbers) or [1]]
+    while len(tree[-1]) > 1:
+        level = tree[-1]
+        tree.append([level[i] * level[i + 1] for i in range(0, len(level) - 1, 2)] + level[len(level) & ~1:])
+    return tree
+
+
+def lcm_range(k: int) -> int:
+    """Least Common Multiple of 1, 2, ..., k as the product of the largest prime powers p**e <= k
+
+    Examples:
+      >>> lcm_range(10), lcm_range(1)
+      (2520, 1)
+    """
+    powers = []
+    for p in sieve_of_eratosthenes(k):
+        power = p
+        while power * p <= k:
+            power *= p
+        powers.append(power)
+    return product_tree(powers)[-1][0]
+
+
+def batch_gcd(numbers: Sequence[int]) -> List[int]:
+    """gcd(n, product of all other numbers) for every n > 0 of numbers, e.g. to find RSA moduli with shared primes
+
+    Bernstein's algorithm: the product P of all numbers is computed with a product tree and reduced
+    down the same tree modulo n**2 of every node, then gcd(P mod n**2 / n, n) is the result for n.
+    Quasi-linear in the total size of the numbers instead of len(numbers)**2 pairwise gcds.
+
+    Examples:
+      >>> batch_gcd([3 * 5, 7 * 11, 5 * 13, 17 * 19])
+      [5, 1, 5, 1]
+    """
+    if not numbers:
+        return []
+    tree = product_tree(numbers)
+    remainders = tree.pop()
+    while tree:
+        level = tree.pop()
+        remainders = [remainders[i >> 1] % (n * n) for i, n in enumerate(level)]
+    return [math.gcd(r // n, n) for r, n in zip(remainders, numbers)]
+
+
 def largest_palindrome(min_factor, max_factor):
     """Find largest palindrome given range of factors [min_factor, max_factor]
 
-    Consider the digits of P – let them be x, y and z.
-    P must be at least 6 digits long since the palindrome 111111 = 143×777 – the product of two 3-digit integers.
-    Since P is palindromic:
-        P=100000x10000y1000z100z10yx
-        P=100001x10010y1100z
-        P=119091x910y100z
-    Since 11 is prime, at least one of the integers a or b must have a factor of 11.
-    So if a is not divisible by 11 then we know b must be. Using this information
-    we can determine what values of b we check depending on a.
-    """
+    Palindromes are generated directly in descending order, starting from the largest one <= max_factor**2.
+    The first palindrome with a factor b in range [sqrt(palindrome), max_factor], where palindrome // b
+    is >= min_factor, is the answer.
 
-    max_palindrome = 0
-    max_a = 0
-    max_b = 0
-    for a in range(max_factor, min_factor - 1, -1):
-        if a % 11 == 0:
-            b = max_factor
-            b_step = -1
-        else:
-            b = max_factor - max_factor % 11
-            b_step = -11
-        for k in range(b, a - 1, b_step):
-            multiplication = a * k
-            if multiplication <= max_palindrome:
+    Examples:
+      >>> largest_palindrome(100, 999)
+      (906609, 913, 993)
+
+    Returns:
+        (palindrome, a, b), where a * b == palindrome and a <= b, (0, 0, 0) if there is none
+    """
+    min_factor = max(min_factor, 1)  # only positive products count, as 0 is never the answer
+    low, high = min_factor * min_factor, max_factor * max_factor
+    for length in range(len(str(high)), len(str(low)) - 1, -1):
+        for palindrome in digits.palindromes(length, descending=True):
+            if palindrome > high:
+                continue
+            if palindrome < low:
                 break
-            if is_palindrome(multiplication):
-                max_palindrome = a * k
-                max_a = a
-                max_b = k
-    return max_palindrome, max_a, max_b
-
-    def smallest_num_divisible_by_each_to(k):
-        """Calculate smallest number that can be divided by each of the numbers from 1 to k without any remainder.
-        """
-        check_limit = int(math.sqrt(k))
-        result = 1
-        for prime in sieve_of_eratosthenes(k):
-            if prime > check_limit:
-                result *= prime
-            else:
-                degree = int(math.log10(k) / math.log10(prime))
-                result *= (prime ** degree)
-        return result
+            for b in range(min(max_factor, palindrome // min_factor), math.isqrt(palindrome - 1), -1):
+                if palindrome % b == 0:
+                    return palindrome, palindrome // b, b
+    return 0, 0, 0
+
+
+def smallest_num_divisible_by_each_to(k):
+    """Calculate smallest number that can be divided by each of the numbers from 1 to k without any remainder.
+
+    Examples:
+      >>> smallest_num_divisible_by_each_to(20)
+      232792560
+    """
+    return lcm_range(k)
 
 
 if __name__ == "__main__":
@@ -1,6 +1,15 @@
 """
 Set of functions for performing operations on numbers
 """
+import math
+
+from pzeug.number.cache import CACHE_BYTES, memoize
+from pzeug.number.prime import is_prime, sieve_of_eratosthenes
+
+
+# Quadratic residues as bit masks: bit r of _QUADRATIC_RESIDUES[m] is set iff r is a square modulo m
+_QUADRATIC_RESIDUES = {m: sum(1 << r for r in {i * i % m for i in range(m)}) for m in (64, 63, 65, 11)}
+FACTORIAL_SWING_THRESHOLD = 64  # below it the plain product is faster than the prime swing
 
 
 def exact_sqrt(x):
@@ -10,7 +19,18 @@ def exact_sqrt(x):
     a is the largest integer such that a**2 <= x, and r is the "remainder".  If
     x is a perfect square, then r will be zero.
 
-    Around two orders slower than math.sqrt!
+    Uses Newton's iteration of math.isqrt, O(M(n)) instead of the O(n^2) "long-hand square root".
+
+    Examples:
+        >>> exact_sqrt(10 ** 40 + 1)
+        (100000000000000000000, 1)
+    """
+    a = math.isqrt(x)
+    return a, x - a * a
+
+
+def _long_hand_sqrt(x):
+    """The former exact_sqrt(), two bits per iteration, kept as a baseline for the benchmark below.
 
     The algorithm used is the "long-hand square root" algorithm, as described at
     http://mathforum.org/library/drmath/view/52656.html
@@ -40,38 +60,142 @@ def exact_sqrt(x):
     return a, N - a * a
 
 
+def iroot(x: int, k: int) -> int:
+    """Integer k-th root, the largest integer a such that a**k <= x, for x >= 0
+
+    Examples:
+        >>> iroot(10 ** 30, 3), iroot(10 ** 30 - 1, 3)
+        (10000000000, 9999999999)
+    """
+    if x < 0 or k < 1:
+        raise ValueError("iroot requires x >= 0 and k >= 1, supplied x={}, k={}".format(x, k))
+    if k == 1 or x < 2:
+        return x
+    if k == 2:
+        return math.isqrt(x)
+    a = 1 << -(-x.bit_length() // k)  # an upper bound of the root
+    while True:  # Newton's iteration decreases monotonically towards the root
+        b = ((k - 1) * a + x // a ** (k - 1)) // k
+        if b >= a:
+            return a
+        a = b
+
+
+def is_perfect_square(x: int) -> bool:
+    """Check if x is a square of an integer, most non-squares are rejected by quadratic residues
+
+    Examples:
+        >>> [x for x in range(50) if is_perfect_square(x)]
+        [0, 1, 4, 9, 16, 25, 36, 49]
+    """
+    if x < 0:
+        return False
+    for m, residues in _QUADRATIC_RESIDUES.items():
+        if not residues >> (x % m) & 1:
+            return False
+    return math.isqrt(x) ** 2 == x
+
+
+def perfect_power(x: int) -> (int, int):
+    """Represent x > 1 as a**k with the largest possible k
+
+    Examples:
+        >>> perfect_power(2 ** 60), perfect_power(3 ** 10 * 5 ** 5), perfect_power(12)
+        ((2, 60), (45, 5), (12, 1))
+    """
+    base, exponent = x, 1
+    k = 2
+    while base.bit_length() > k:  # base >= 2**k is required for a k-th power
+        if k == 2:
+            root = math.isqrt(base) if is_perfect_square(base) else None
+        else:
+            root = iroot(base, k)
+            if root ** k != base:
+                root = None
+        if root is None:
+            k += 1
+            while not is_prime(k):
+                k += 1
+        else:
+            base, exponent = root, exponent * k  # try the same k again, e.g. 2**8 = ((2**2)**2)**2
+    return base, exponent
+
+
+def is_perfect_power(x: int) -> bool:
+    """Check if x = a**k for integers a and k > 1
+
+    Examples:
+        >>> [x for x in range(2, 50) if is_perfect_power(x)]
+        [4, 8, 9, 16, 25, 27, 32, 36, 49]
+    """
+    if x in (0, 1):
+        return True
+    return x > 1 and perfect_power(x)[1] > 1
+
+
+def _product(values, lo, hi):
+    """Product of values[lo:hi] by binary splitting, so that the factors of each multiplication have similar size"""
+    if hi - lo <= 8:
+        result = 1
+        for i in range(lo, hi):
+            result *= values[i]
+        return result
+    middle = (lo + hi) // 2
+    return _product(values, lo, middle) * _product(values, middle, hi)
+
+
+def _swing(n, primes):
+    """Swinging factorial n! / (n // 2)!**2 as a product of prime powers"""
+    factors = []
+    for p in primes:
+        if p > n:
+            break
+        q, exponent = n, 0
+        while q:
+            q //= p
+            exponent += q & 1
+        if exponent:
+            factors.append(p ** exponent if exponent > 1 else p)
+    return _product(factors, 0, len(factors))
+
+
 def factorial(n):
     """Factorial of n without memoization. Can be used for calculation for very large numbers
 
+    Uses the prime swing algorithm n! = (n // 2)!**2 * swing(n), where swing(n) is a product of prime powers
+    calculated by binary splitting, so big numbers are multiplied with numbers of similar size.
+
     :param n (int): number to calculate for
     :return:
         n * (n-1) * (n-2) * ... * 1
+
+    Examples:
+        >>> factorial(0), factorial(10), factorial(100) == math.factorial(100)
+        (1, 3628800, True)
     """
-    result = 1
-    for i in range(2, n + 1):
-        result *= i
-    return result
+    return _swing_factorial(n, list(sieve_of_eratosthenes(n)) if n >= FACTORIAL_SWING_THRESHOLD else [])
+
 
+def _swing_factorial(n, primes):
+    if n < FACTORIAL_SWING_THRESHOLD:
+        result = 1
+        for i in range(2, n + 1):
+            result *= i
+        return result
+    return _swing_factorial(n // 2, primes) ** 2 * _swing(n, primes)
 
+
+@memoize(maxsize=1024, maxbytes=CACHE_BYTES)
 def cached_factorial(n: int) -> int:
-    """Factorial of n, uses memoization of all previously calculated results. Useful if you need
-    a lot of calculations for not so large numbers.
+    """Factorial of n, uses memoization of the recently calculated results (LRU cache bounded
+    by count and CACHE_BYTES, see cached_factorial.cache).
+    Useful if you need a lot of calculations for not so large numbers.
 
     :param n (int): number to calculate for
     :return:
         n * (n-1) * (n-2) * ... * 1
     """
-    try:
-        if n < len(cached_factorial.cache):
-            return cached_factorial.cache[n]
-    except AttributeError:
-        cached_factorial.cache = [1, 1]
-    cache_size = len(cached_factorial.cache)
-    largest_in_cache = cached_factorial.cache[cache_size - 1]
-    for i in range(cache_size, n + 1):
-        largest_in_cache *= i
-        cached_factorial.cache.append(largest_in_cache)
-    return largest_in_cache
+    return math.factorial(n)
 
 
 if __name__ == "__main__":
@@ -79,29 +203,32 @@ if __name__ == "__main__":
     from timeit import default_timer
 
     doctest.testmod()
-    start_time = default_timer()
-    # assert math.factorial(large_number) == factorial(large_number)
-    import math
-
-    # for i in range(0, 1000):
-    #     gold_standard = math.factorial(i)
-    #     assert gold_standard == cached_factorial(i) == factorial(i)
-    #
-    # large_number = 9999
-    # assert math.factorial(large_number) == factorial(large_number)
-    #
-    # end_time = default_timer()
-    # print("Execution time: {:.3f}s".format(end_time - start_time))
-    very_large_number = 99999999999999
 
-    second_run = default_timer()
-    for i in range(1000):
-        int(math.sqrt(very_large_number))
-    end_second_run = default_timer()
-    print("Execution time, math.sqrt: {:.3f}s".format(end_second_run - second_run))
-
-    first_run = default_timer()
-    for i in range(1000):
-        exact_sqrt(very_large_number)
-    end_first_run = default_timer()  #
-    print("Execution time, exact_sqrt: {:.3f}s".format(end_first_run - first_run))
+
+    def benchmark(title, f, *args, repeat=1):
+        start = default_timer()
+        for _ in range(repeat):
+            f(*args)
+        print("Execution time, {}: {:.3f}s".format(title, default_timer() - start))
+
+
+    def sequential_factorial(n):
+        result = 1
+        for i in range(2, n + 1):
+            result *= i
+        return result
+
+
+    very_large_number = 99999999999999
+    benchmark("math.sqrt", lambda x: int(math.sqrt(x)), very_large_number, repeat=1000)
+    benchmark("exact_sqrt", exact_sqrt, very_large_number, repeat=1000)
+    benchmark("long-hand sqrt (former exact_sqrt)", _long_hand_sqrt, very_large_number, repeat=1000)
+
+    huge_number = 7 ** 5000
+    benchmark("exact_sqrt of a 14000 bit number", exact_sqrt, huge_number)
+    benchmark("long-hand sqrt of a 14000 bit number", _long_hand_sqrt, huge_number)
+
+    large_number = 100000
+    benchmark("math.factorial({})".format(large_number), math.factorial, large_number)
+    benchmark("factorial({}), prime swing".format(large_number), factorial, large_number)
+    benchmark("factorial({}), sequential product".format(large_number), sequential_factorial, large_number)
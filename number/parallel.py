@@ -0,0 +1,210 @@
+"""
+Map/reduce of number-theory functions over integer ranges on a pool of worker processes
+
+Ranges are split into contiguous chunks, which are pickled as small range objects, and the results
+are merged in the order of the input. Precomputed SPFTable and PrimeTable instances are copied once into
+shared memory and attached by every worker at startup, instead of being pickled with every task.
+
+"""
+import functools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Callable, Iterable, List, Optional, Sequence
+
+from pzeug.number.prime import SPFTable, _odd_segments, factors, primes_in_range
+
+CHUNKS_PER_WORKER = 4  # more chunks than workers even out chunks of different cost
+
+_worker_table = None  # the shared table attached by the worker initializer
+_worker_memory = None
+
+
+class SharedTable:
+    """Copy of an SPFTable or PrimeTable in a block of shared memory, which can be attached by other
+    processes without copying
+
+    Examples:
+        >>> with SharedTable(SPFTable(100)) as shared:
+        ...     shared.memory.size >= 4 * 101
+        True
+    """
+
+    def __init__(self, table):
+        """
+        :param table: SPFTable or PrimeTable
+        :raises
+            ValueError if the table type can not be shared
+        """
+        if hasattr(table, 'spf'):  # SPFTable
+            fields = (('spf', table.spf),)
+        elif hasattr(table, '_bits'):  # PrimeTable
+            fields = (('_index', table._index), ('_bits', table._bits))
+        else:
+            raise ValueError("Only SPFTable and PrimeTable can be shared, supplied {}".format(type(table).__name__))
+        views = [memoryview(value).cast('B') for _, value in fields]
+        self.memory = shared_memory.SharedMemory(create=True, size=max(sum(map(len, views)), 1))
+        layout = []
+        offset = 0
+        for (name, value), view in zip(fields, views):
+            self.memory.buf[offset:offset + len(view)] = view
+            typecode = value.typecode if hasattr(value, 'typecode') else memoryview(value).format
+            layout.append((name, typecode, offset, len(view)))
+            offset += len(view)
+            view.release()
+        self.spec = (type(table), table.limit, tuple(layout), self.memory.name)
+
+    @staticmethod
+    def attach(spec):
+        """Rebuild a read-only table from the spec of a SharedTable
+
+        :return:
+            (table, SharedMemory), the memory must be kept alive as long as the table is used
+        """
+        cls, limit, layout, name = spec
+        memory = shared_memory.SharedMemory(name=name)
+        table = cls.__new__(cls)
+        table.limit = limit
+        for field, typecode, offset, size in layout:
+            setattr(table, field, memory.buf[offset:offset + size].cast(typecode))
+        if hasattr(table, 'spf'):
+            table._parts = None
+        else:
+            table._mmap = None
+        return table, memory
+
+    def close(self):
+        """Release and remove the shared memory"""
+        self.memory.close()
+        self.memory.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def _attach_worker(spec):
+    global _worker_table, _worker_memory
+    _worker_table, _worker_memory = SharedTable.attach(spec)
+
+
+def _run_chunk(chunk_function, chunk):
+    return chunk_function(_worker_table, chunk)
+
+
+def _chunks(items: Sequence, count: int) -> list:
+    """Split items into at most count contiguous slices of similar length, slices of a range are ranges"""
+    size = max(-(-len(items) // count), 1)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def map_chunks(chunk_function: Callable, items: Iterable, workers: Optional[int] = None, table=None) -> list:
+    """Apply chunk_function(table, chunk) to contiguous chunks of items in worker processes
+
+    :param chunk_function: picklable (module level) function of the shared table (None if no table is given)
+        and a slice of items
+    :param items: range or any other iterable, which is turned into a list
+    :param workers: number of processes, os.cpu_count() by default, 1 runs everything in this process
+    :param table: SPFTable or PrimeTable to be shared with the workers
+    :return:
+        results of the chunks in the order of items
+    """
+    if not isinstance(items, range):
+        items = list(items)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(items) <= 1:
+        return [chunk_function(table, items)] if items else []
+    chunks = _chunks(items, workers * CHUNKS_PER_WORKER)
+    if table is None:
+        with ProcessPoolExecutor(min(workers, len(chunks))) as executor:
+            return list(executor.map(_run_chunk, [chunk_function] * len(chunks), chunks))
+    with SharedTable(table) as shared:
+        with ProcessPoolExecutor(min(workers, len(chunks)), initializer=_attach_worker,
+                                 initargs=(shared.spec,)) as executor:
+            return list(executor.map(_run_chunk, [chunk_function] * len(chunks), chunks))
+
+
+def _map_chunk(f, table, chunk):
+    if table is None:
+        return [f(x) for x in chunk]
+    return [f(table, x) for x in chunk]
+
+
+def _reduce_chunk(f, reducer, initial, table, chunk):
+    return functools.reduce(reducer, _map_chunk(f, table, chunk), initial)
+
+
+def parallel_map(f: Callable, items: Iterable, workers: Optional[int] = None, table=None) -> list:
+    """[f(x) for x in items] computed in worker processes, or [f(table, x) ...] if a table is shared
+
+    Examples:
+        >>> from pzeug.number.prime import is_prime
+        >>> sum(parallel_map(is_prime, range(10 ** 4), workers=2))
+        1229
+        >>> parallel_map(SPFTable.factorize, range(90, 93), workers=2, table=SPFTable(100))
+        [[2, 3, 3, 5], [7, 13], [2, 2, 23]]
+    """
+    chunks = map_chunks(functools.partial(_map_chunk, f), items, workers, table)
+    return [y for chunk in chunks for y in chunk]
+
+
+def parallel_reduce(f: Callable, items: Iterable, reducer: Callable, initial, workers: Optional[int] = None,
+                    table=None):
+    """reduce(reducer, map(f, items), initial) with every chunk reduced in a worker process
+
+    :param reducer: associative picklable function, e.g. operator.add
+    :param initial: identity of reducer, it starts the reduction of every chunk
+
+    Examples:
+        >>> import operator
+        >>> from pzeug.number.multiplicative import totient
+        >>> parallel_reduce(totient, range(1, 1001), operator.add, 0, workers=2)
+        304192
+    """
+    partial = functools.partial(_reduce_chunk, f, reducer, initial)
+    return functools.reduce(reducer, map_chunks(partial, items, workers, table), initial)
+
+
+def _primes_chunk(table, chunk):
+    return list(primes_in_range(chunk.start, chunk.stop))
+
+
+def _count_chunk(table, chunk):
+    lo, hi = chunk.start, chunk.stop
+    return (lo <= 2 < hi) + sum(flags.count(1) for _, flags in _odd_segments(max(lo, 3), hi))
+
+
+def _factors_chunk(table, chunk):
+    return [list(factors(n)) for n in chunk]
+
+
+def parallel_primes_in_range(lo: int, hi: int, workers: Optional[int] = None) -> List[int]:
+    """Prime numbers in range [lo, hi), every worker sieves its own segments
+
+    Examples:
+        >>> parallel_primes_in_range(90, 110, workers=2)
+        [97, 101, 103, 107, 109]
+    """
+    return [p for chunk in map_chunks(_primes_chunk, range(lo, hi), workers) for p in chunk]
+
+
+def parallel_prime_count(n: int, workers: Optional[int] = None) -> int:
+    """Count prime numbers in range [2, n]
+
+    Examples:
+        >>> parallel_prime_count(10 ** 6, workers=2)
+        78498
+    """
+    return sum(map_chunks(_count_chunk, range(2, n + 1), workers))
+
+
+def parallel_factors(numbers: Iterable[int], workers: Optional[int] = None) -> List[list]:
+    """Prime factorizations [(prime, degree), ...] of a batch of numbers, in the order of numbers
+
+    Examples:
+        >>> parallel_factors([360, 2 ** 64 + 1], workers=2)
+        [[(2, 3), (3, 2), (5, 1)], [(274177, 1), (67280421310721, 1)]]
+    """
+    return [f for chunk in map_chunks(_factors_chunk, numbers, workers) for f in chunk]
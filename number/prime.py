@@ -2,24 +2,67 @@
 A module with auxiliary functions for working with all around prime numbers
 
 """
+import decimal
 import itertools
 import math
-from functools import reduce
-
-
-# def sieve_of_eratosthenes(limit):
-#     uneven_limit = math.ceil(limit / 2) - 1
-#     a = [True] * uneven_limit  # Initialize the primality list
-#     yield 2
-#     i = 3
-#     cross_limit = int(math.sqrt(limit))
-#     for is_prime_number in a:
-#         if is_prime_number:
-#             yield i
-#             if i <= cross_limit:
-#                 for n in range(i * i // 2 - 1, uneven_limit, i):  # Mark factors non-prime
-#                     a[n] = False
-#         i += 2
+import random
+from array import array
+from bisect import bisect_left
+from typing import Callable, Optional
+
+
+SEGMENT_SIZE = 1 << 15  # odd numbers per sieve window, 32 KiB of flags fits into the L1/L2 cache
+
+
+def _base_primes(limit):
+    """Odd primes in range [3, limit], sieved at once. Only used for sieving primes <= sqrt(n).
+    """
+    if limit < 3:
+        return []
+    size = (limit - 1) // 2  # flags[i] stands for the odd number 2 * i + 3
+    flags = bytearray(b'\x01') * size
+    for i in range((math.isqrt(limit) - 1) // 2):
+        if flags[i]:
+            p = 2 * i + 3
+            start = (p * p - 3) // 2
+            flags[start::p] = bytes(len(range(start, size, p)))
+    return list(itertools.compress(range(3, 2 * size + 3, 2), flags))
+
+
+def _odd_segments(lo, hi, segment_size=SEGMENT_SIZE):
+    """Segmented sieve over the odd numbers in range [max(lo, 3), hi).
+
+    Memory usage is O(segment_size) for the window plus O(sqrt(hi)) for the base primes.
+
+    Args:
+        lo: lower bound, inclusive
+        hi: upper bound, exclusive
+        segment_size: number of odd numbers in one window
+
+    Returns:
+        generator of (first, flags) tuples, where flags[i] == 1 iff first + 2 * i is prime
+    """
+    first = max(lo, 3) | 1
+    if first >= hi:
+        return
+    base_primes = _base_primes(math.isqrt(hi - 1))
+    while first < hi:
+        last = min(first + 2 * segment_size, hi)  # exclusive
+        size = (last - first + 1) // 2
+        flags = bytearray(b'\x01') * size
+        for p in base_primes:
+            start = p * p
+            if start >= last:
+                break
+            if start < first:
+                start = first + (-first) % p
+                if not start & 1:
+                    start += p
+            i = (start - first) // 2
+            flags[i::p] = bytes(len(range(i, size, p)))
+        yield first, flags
+        first = last + (not last & 1)
+
 
 def sieve_of_eratosthenes(limit):
     """Generate prime numbers in range [2,limit]
@@ -29,181 +72,669 @@ def sieve_of_eratosthenes(limit):
 
     Returns:
         generator of prime numbers
+
+    Examples:
+        >>> list(sieve_of_eratosthenes(19))
+        [2, 3, 5, 7, 11, 13, 17, 19]
     """
-    yield 2
-    sieve_iterator = iter(range(3, limit, 2))
+    return primes_in_range(2, limit + 1)
 
-    def lazy_sieve_of_eratosthenes(sieve_iterator):
-        next_prime = next(sieve_iterator)
-        yield next_prime
-        sq_prime = next_prime ** 2
-        for prime in sieve_iterator:
-            if prime < sq_prime:
-                yield prime
+
+def primes_in_range(lo, hi):
+    """Generate prime numbers in range [lo, hi)
+
+    Args:
+        lo: lower bound, inclusive
+        hi: upper bound, exclusive
+
+    Returns:
+        generator of prime numbers
+
+    Examples:
+        >>> list(primes_in_range(90, 110))
+        [97, 101, 103, 107, 109]
+    """
+    if lo <= 2 < hi:
+        yield 2
+    for first, flags in _odd_segments(lo, hi):
+        yield from itertools.compress(range(first, first + 2 * len(flags), 2), flags)
+
+
+def prime_count(n):
+    """Count prime numbers in range [2, n], i.e. the prime-counting function pi(n)
+
+    Examples:
+        >>> prime_count(100)
+        25
+    """
+    if n < 2:
+        return 0
+    return 1 + sum(flags.count(1) for _, flags in _odd_segments(3, n + 1))
+
+
+_WHEEL_PRIMES = (2, 3, 5, 7)
+_WHEEL = 2 * 3 * 5 * 7
+_WHEEL_RESIDUES = tuple(r for r in range(1, _WHEEL + 1) if math.gcd(r, _WHEEL) == 1)  # 48 of 210 numbers
+_WHEEL_GAPS = tuple(b - a for a, b in zip(_WHEEL_RESIDUES, _WHEEL_RESIDUES[1:] + (_WHEEL + 1,)))
+
+
+def _wheel_position(n):
+    """The smallest number >= n coprime to 2, 3, 5 and 7 and its index into _WHEEL_GAPS"""
+    turn, r = divmod(n - 1, _WHEEL)
+    i = bisect_left(_WHEEL_RESIDUES, r + 1)
+    if i == len(_WHEEL_RESIDUES):
+        turn, i = turn + 1, 0
+    return turn * _WHEEL + _WHEEL_RESIDUES[i], i
+
+
+def lazy_sieve_of_eratosthenes(start=2):
+    """Generate prime numbers >= start without an upper bound
+
+    Incremental sieve over a 2*3*5*7 wheel, which skips 77% of the candidates. Every base prime p enters
+    the map of upcoming composites only when the candidates reach p * p, so the memory is O(pi(sqrt(n)))
+    for the current candidate n. The base primes come from a second lazy sieve of the same kind.
+
+    Args:
+        start: the smallest number to consider, the sieve resumes there without generating smaller primes
+
+    Returns:
+        endless generator of prime numbers
+
+    Examples:
+        >>> list(itertools.islice(lazy_sieve_of_eratosthenes(), 12))
+        [2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37]
+        >>> list(itertools.islice(lazy_sieve_of_eratosthenes(10 ** 9), 3))
+        [1000000007, 1000000009, 1000000021]
+    """
+    for p in _WHEEL_PRIMES:
+        if p >= start:
+            yield p
+    gaps, wheel_size = _WHEEL_GAPS, len(_WHEEL_GAPS)
+    n, i = _wheel_position(max(start, 11))
+    composites = {}  # upcoming composite -> (base prime, wheel index of its cofactor)
+
+    def schedule(composite, p, j):
+        while composite in composites:  # another base prime has the same multiple scheduled
+            composite += p * gaps[j]
+            j = j + 1 if j + 1 < wheel_size else 0
+        composites[composite] = p, j
+
+    base_primes = None  # created when the candidates reach 11**2, otherwise the recursion would never end
+    p = 11
+    while p * p < n:  # resuming: base primes below sqrt(n) continue at their first multiple >= n
+        cofactor, j = _wheel_position(max(p, -(-n // p)))
+        schedule(p * cofactor, p, j)
+        if base_primes is None:
+            base_primes = lazy_sieve_of_eratosthenes(13)
+        p = next(base_primes)
+    square = p * p
+    while True:
+        entry = composites.pop(n, None)
+        if entry is not None:
+            q, j = entry
+            schedule(n + q * gaps[j], q, j + 1 if j + 1 < wheel_size else 0)
+        elif n < square:
+            yield n
+        else:  # n is the square of the next base prime, its multiples p * m follow the wheel of m
+            j = _wheel_position(p)[1]
+            schedule(n + p * gaps[j], p, j + 1 if j + 1 < wheel_size else 0)
+            if base_primes is None:
+                base_primes = lazy_sieve_of_eratosthenes(13)
+            p = next(base_primes)
+            square = p * p
+        n += gaps[i]
+        i = i + 1 if i + 1 < wheel_size else 0
+
+
+class SPFTable:
+    """Smallest prime factor of every number in range [0, limit], limit < 2**32
+
+    The table is one compact array('I'), factorizing any k <= limit takes O(log k) without trial division.
+    Arithmetic functions over the whole range are derived from the same table.
+
+    Examples:
+        >>> table = SPFTable(100)
+        >>> table.spf[91], table[90], list(table.factors(90))
+        (7, [2, 3, 3, 5], [(2, 1), (3, 2), (5, 1)])
+        >>> list(table.totient()[:10])
+        [0, 1, 1, 2, 2, 4, 2, 6, 4, 6]
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        spf = array('I', range(limit + 1))
+        # A slice assignment per prime runs in C and beats a linear sieve driven by a Python loop.
+        # Going from the largest prime down, the smallest prime factor is the one written last.
+        for p in reversed((2,) + tuple(_base_primes(math.isqrt(limit)))):
+            start = p * p
+            spf[start::p] = array('I', [p]) * len(range(start, limit + 1, p))
+        self.spf = spf
+        self._parts = None
+
+    def __len__(self):
+        return self.limit + 1
+
+    def __getitem__(self, k):
+        return self.factorize(k)
+
+    def factorize(self, k: int) -> list:
+        """Prime factors of k with multiplicity, in ascending order"""
+        spf = self.spf
+        result = []
+        while k > 1:
+            p = spf[k]
+            result.append(p)
+            k //= p
+        return result
+
+    def factors(self, k: int):
+        """Generate (prime, degree) tuples of k, the same as prime.factors(k)"""
+        for prime, group in itertools.groupby(self.factorize(k)):
+            yield prime, sum(1 for _ in group)
+
+    def divisors(self, k: int) -> 'Divisors':
+        """Divisors of k generated from the table factorization"""
+        return Divisors(self.factors(k))
+
+    def _prime_power_parts(self):
+        """For every n: the exponent of spf[n] in n and n without that prime power"""
+        if self._parts is None:
+            spf = self.spf
+            size = self.limit + 1
+            exponent = array('B', bytes(size))
+            rest = array('I', range(2)[:size]) + array('I', [0]) * (size - 2)
+            for n in range(2, size):
+                p = spf[n]
+                m = n // p
+                if spf[m] == p:
+                    exponent[n] = exponent[m] + 1
+                    rest[n] = rest[m]
+                else:
+                    exponent[n] = 1
+                    rest[n] = m
+            self._parts = exponent, rest
+        return self._parts
+
+    def multiplicative(self, prime_power: Callable[[int, int], int], typecode: Optional[str] = 'Q'):
+        """Values of a multiplicative function f over the whole range, f(0) is set to 0
+
+        :param prime_power: f(p ** e) as a function of p and e
+        :param typecode: array type of the result, None for a list of unbounded ints
+        :return:
+            array of f(n) for n in range [0, limit]
+        """
+        spf = self.spf
+        exponent, rest = self._prime_power_parts()
+        head = [0, 1][:self.limit + 1]
+        if typecode is None:
+            result = head + [0] * (self.limit - 1)
+        else:
+            result = array(typecode, head) + array(typecode, [0]) * (self.limit - 1)
+        for n in range(2, self.limit + 1):
+            r = rest[n]
+            if r == 1:
+                result[n] = prime_power(spf[n], exponent[n])
             else:
-                break
-        yield from lazy_sieve_of_eratosthenes(x for x in sieve_iterator if x % next_prime != 0)
+                result[n] = result[r] * result[n // r]
+        return result
 
-    yield from lazy_sieve_of_eratosthenes(sieve_iterator)
+    def omega(self) -> array:
+        """Number of distinct prime factors of every n"""
+        _, rest = self._prime_power_parts()
+        result = array('B', bytes(self.limit + 1))
+        for n in range(2, self.limit + 1):
+            result[n] = result[rest[n]] + 1
+        return result
+
+    def big_omega(self) -> array:
+        """Number of prime factors with multiplicity of every n"""
+        spf = self.spf
+        result = array('B', bytes(self.limit + 1))
+        for n in range(2, self.limit + 1):
+            result[n] = result[n // spf[n]] + 1
+        return result
+
+    def divisor_count(self) -> array:
+        """Number of divisors of every n"""
+        return self.multiplicative(lambda p, e: e + 1, 'I')
+
+    def sigma(self) -> array:
+        """Sum of divisors of every n"""
+        return self.multiplicative(lambda p, e: (p ** (e + 1) - 1) // (p - 1))
+
+    def totient(self) -> array:
+        """Euler's totient function of every n"""
+        return self.multiplicative(lambda p, e: p ** (e - 1) * (p - 1), 'I')
+
+
+_ONLY_ONE = bytes(i == 1 for i in range(256))  # translate table: 1 -> 1, anything else -> 0
 
 
 def sieve_of_factors(limit):
-    limit += 1
-    a = [0] * limit  # Initialize the count_factors_list
-    i = factor = 2
-    while i < limit:
-        a[i] = 1
-        i *= factor
-
-    factor = 3
-    while factor < limit:
-        i = factor
-        if a[i] == 0:
-            while i < limit:
-                a[i] = 1
-                i *= factor
-        factor += 2
-    return a
+    """Mark prime powers p**k, k >= 1, in range [0, limit]
+
+    Returns:
+        bytearray, 1 for prime powers, 0 otherwise
+    """
+    return bytearray(SPFTable(limit).omega()).translate(_ONLY_ONE)
 
 
 def sieve_of_factors2(n):
-    sieve = [0 for _ in range(0, n)]
-    for i in range(2, n):
-        if sieve[i] == 0:
-            q = i
-            while q < n:
-                for r in range(q, n, q):
-                    sieve[r] += 1
-                q *= i
-    return sieve
+    """Number of prime factors with multiplicity of every number in range [0, n)
+
+    Returns:
+        array of counts
+    """
+    return SPFTable(n - 1).big_omega()
 
 
 def prime_factorizations(n):
-    sieve = [[] for _ in range(0, n)]
-    for i in range(2, n):
-        if not sieve[i]:
-            q = i
-            while q < n:
-                for r in range(q, n, q):
-                    sieve[r].append(i)
-                q *= i
-    return sieve
+    """Prime factorizations of every number in range [0, n)
+
+    Returns:
+        SPFTable, the k-th item is the list of prime factors of k with multiplicity
+    """
+    return SPFTable(n - 1)
+
+
+# Deterministic Miller-Rabin bases: (n upper bound, bases), see https://oeis.org/A014233
+_MILLER_RABIN_BASES = (
+    (2047, (2,)),
+    (1373653, (2, 3)),
+    (25326001, (2, 3, 5)),
+    (3215031751, (2, 3, 5, 7)),
+    (2152302898747, (2, 3, 5, 7, 11)),
+    (3474749660383, (2, 3, 5, 7, 11, 13)),
+    (341550071728321, (2, 3, 5, 7, 11, 13, 17)),
+    (3825123056546413051, (2, 3, 5, 7, 11, 13, 17, 19, 23)),
+    (318665857834031151167461, (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37)),
+    (3317044064679887385961981, (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)),
+)
+MILLER_RABIN_ROUNDS = 24  # random bases on top of the fixed ones for n >= 3.3 * 10**24
+SMALL_PRIME_LIMIT = 1000
+_SMALL_PRIMES = (2,) + tuple(_base_primes(SMALL_PRIME_LIMIT))
+
+
+def _miller_rabin(n, bases):
+    """Miller-Rabin test of an odd n > max(bases), False means n is definitely composite"""
+    d = n - 1
+    s = (d & -d).bit_length() - 1
+    d >>= s
+    for a in bases:
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
 
 
 def is_prime(n):
-    if n == 1:
-        return False
-    elif n < 4:
-        return True
-    elif n % 2 == 0:
-        return False
-    elif n < 9:
-        return True
-    elif n % 3 == 0:
+    """Check if n is a prime number
+
+    Small factors are removed by trial division, then n is tested with Miller-Rabin: deterministically
+    for n < 3.3 * 10**24, with additional random bases (error probability below 4**-MILLER_RABIN_ROUNDS) above.
+
+    Examples:
+        >>> [n for n in range(20) if is_prime(n)]
+        [2, 3, 5, 7, 11, 13, 17, 19]
+        >>> is_prime(2 ** 89 - 1), is_prime(2 ** 64 + 1)
+        (True, False)
+    """
+    if n < 2:
         return False
-    else:
-        r = int(math.sqrt(n))
-        f = 5
-        while f <= r:
-            if n % f == 0 or n % (f + 2) == 0:
-                return False
-            f += 6
-        return True
+    for p in _SMALL_PRIMES:
+        if n % p == 0:
+            return n == p
+        if p * p > n:
+            return True
+    for limit, bases in _MILLER_RABIN_BASES:
+        if n < limit:
+            return _miller_rabin(n, bases)
+    return (_miller_rabin(n, _MILLER_RABIN_BASES[-1][1]) and
+            _miller_rabin(n, (random.randrange(2, n - 1) for _ in range(MILLER_RABIN_ROUNDS))))
 
 
-def goldbach_conjecture(odd_composite):
-    for i in itertools.count(1):
-        diff = odd_composite - 2 * i * i
-        if diff < 1:
+def _pollard_brent(n):
+    """Find a nontrivial factor of an odd composite n with Brent's variant of Pollard's rho.
+
+    Differences of the sequence values are multiplied modulo n in batches, so that only one gcd
+    is computed per batch.
+    """
+    batch = 128
+    while True:
+        y, c = random.randrange(1, n), random.randrange(1, n)
+        g = r = q = 1
+        while g == 1:
+            x = y
+            for _ in range(r):
+                y = (y * y + c) % n
+            k = 0
+            while k < r and g == 1:
+                ys = y
+                for _ in range(min(batch, r - k)):
+                    y = (y * y + c) % n
+                    q = q * abs(x - y) % n
+                g = math.gcd(q, n)
+                k += batch
+            r <<= 1
+        if g == n:  # the batch overshot, step through it again one by one
+            g = 1
+            while g == 1:
+                ys = (ys * ys + c) % n
+                g = math.gcd(abs(x - ys), n)
+        if g != n:
+            return g
+
+
+def _prime_factors(n):
+    """Prime factors of n > 0 with multiplicity, not ordered"""
+    result = []
+    for p in _SMALL_PRIMES:
+        if p * p > n:
             break
-        if is_prime(diff):
-            return True
-    return False
+        while n % p == 0:
+            result.append(p)
+            n //= p
+    composites = [n] if n > 1 else []
+    while composites:
+        n = composites.pop()
+        if n < SMALL_PRIME_LIMIT ** 2 or is_prime(n):
+            result.append(n)
+        else:
+            d = _pollard_brent(n)
+            composites += (d, n // d)
+    return result
 
 
-def factors(n):
-    factor = 2
-    if n % factor == 0:
-        n //= factor
-        degree = 1
-        while n % factor == 0:
-            n //= factor
-            degree += 1
-        yield factor, degree
+_FLAG_DIGITS = bytes.maketrans(b'\x00\x01', b'01')  # translate tables between 0/1 flags and binary digits
+_DIGIT_FLAGS = bytes.maketrans(b'01', b'\x00\x01')
+
 
-    factor = 3
-    max_factor = math.sqrt(n)
-    while n > 1 and factor <= max_factor:
-        if n % factor == 0:
+def _prime_flags(limit):
+    """bytearray of limit + 1 flags, flags[n] == 1 iff n is a prime number"""
+    flags = bytearray(max(limit + 1, 0))
+    if limit >= 2:
+        flags[2] = 1
+    for first, segment in _odd_segments(3, limit + 1):
+        flags[first:first + 2 * len(segment):2] = segment
+    return flags
 
-            n //= factor
 
-            degree = 1
-            while n % factor == 0:
-                n //= factor
-                degree += 1
+def _doubled_squares(limit):
+    """2 * k**2 for k >= 1, up to limit"""
+    return [2 * k * k for k in range(1, math.isqrt(max(limit, 0) // 2) + 1)]
 
-            max_factor = math.sqrt(n)
-            yield factor, degree
-        factor += 2
-    if n != 1:
-        yield n, 1
+
+def goldbach_conjecture(odd_composite):
+    """Check if odd_composite = p + 2 * k**2 for a prime p and k >= 1 (Goldbach's other conjecture)
+
+    For many numbers use goldbach_search(), which sieves once for all of them.
+    """
+    return any(is_prime(odd_composite - square) for square in _doubled_squares(odd_composite - 2))
+
+
+def goldbach_search(limit):
+    """Find the smallest odd composite number, which is not a sum of a prime and twice a square
+
+    The prime numbers up to limit are sieved once into a big integer bitset, which is shifted by every
+    doubled square and or-ed into the bitset of representable numbers, so each square costs one pass
+    over limit / 64 machine words.
+
+    Args:
+        limit: max value to check
+
+    Returns:
+        (the smallest counterexample <= limit or None, bytearray of limit + 1 flags,
+        1 for numbers n = p + 2 * k**2)
+
+    Examples:
+        >>> counterexample, representable = goldbach_search(10000)
+        >>> counterexample, [n for n in range(20) if representable[n]]
+        (5777, [4, 5, 7, 9, 10, 11, 13, 15, 19])
+    """
+    primes = int(_prime_flags(limit).translate(_FLAG_DIGITS)[::-1] or b'0', 2)  # bit n is set iff n is prime
+    representable = 0
+    for square in _doubled_squares(limit):
+        representable |= primes << square
+    size = max(limit + 1, 0)
+    representable &= (1 << size) - 1
+    odd = ((1 << 2 * (size // 2)) - 1) // 3 << 1  # bits of odd numbers in range [0, limit]
+    missing = odd & ~(primes | representable) & ~2  # odd numbers > 1, which are neither prime nor representable
+    counterexample = (missing & -missing).bit_length() - 1 if missing else None
+    digits = format(representable, 'b').encode()[::-1].ljust(size, b'0')
+    return counterexample, bytearray(digits[:size].translate(_DIGIT_FLAGS))
+
+
+def goldbach_pairs(limit):
+    """Number of prime pairs p <= q with p + q = n for every n in range [0, limit] (Goldbach partitions)
+
+    The counts of all n are the coefficients of the square of the polynomial sum(x**p), which is multiplied
+    as one big number with a fixed number of digits per coefficient, instead of pairing every two prime numbers.
+    decimal multiplies huge numbers with a number-theoretic transform, much faster than int for this size.
+
+    Returns:
+        array of counts
+
+    Examples:
+        >>> counts = goldbach_pairs(100)
+        >>> list(counts[:12]), counts[100]
+        ([0, 0, 0, 0, 1, 1, 1, 1, 1, 1, 2, 0], 6)
+    """
+    size = max(limit + 1, 0)
+    flags = _prime_flags(limit)
+    counts = array('I', bytes(4 * size))
+    if size <= 4:
+        return counts
+    counts[4] = 1  # 2 + 2, every other pair of an even number consists of odd primes
+    counts[5::2] = array('I', iter(flags[3:size - 2:2]))  # odd numbers 2 + q
+    # odd prime 2i + 1 is the term y**i, (2i + 1) + (2j + 1) = n is the term y**(n / 2 - 1) of the square
+    odd_flags = flags[1::2]
+    width = len(str(sum(odd_flags)))  # digits per coefficient, no coefficient exceeds the number of odd primes
+    digits = bytearray(b'0' * (width * len(odd_flags)))
+    digits[width - 1::width] = odd_flags[::-1].translate(_FLAG_DIGITS)
+    context = decimal.Context(prec=decimal.MAX_PREC, Emax=decimal.MAX_EMAX)
+    polynomial = decimal.Decimal(digits.decode())
+    total = 2 * len(digits)
+    square = str(context.multiply(polynomial, polynomial)).rjust(total, '0')
+    for n in range(6, size, 2):
+        end = total - width * (n // 2 - 1)
+        counts[n] = (int(square[end - width:end]) + flags[n // 2]) // 2  # ordered pairs, p == q is counted once
+    return counts
+
+
+def factors(n):
+    """Generate prime factorization of n > 0 in ascending order of prime numbers
+
+    Args:
+        n: number to factorize
+
+    Returns:
+        generator of (prime, degree) tuples
+
+    Examples:
+        >>> list(factors(360))
+        [(2, 3), (3, 2), (5, 1)]
+        >>> list(factors(2 ** 64 + 1))
+        [(274177, 1), (67280421310721, 1)]
+    """
+    primes = _prime_factors(n)
+    primes.sort()
+    for prime, group in itertools.groupby(primes):
+        yield prime, sum(1 for _ in group)
 
 
 def count_factors(n):
-    number_factors = 0
-    factor = 2
-    if n % factor == 0:
-        number_factors = 1
-        n //= factor
-        while n % factor == 0:
-            n //= factor
-
-    factor = 3
-    max_factor = math.sqrt(n)
-    while n > 1 and factor <= max_factor:
-        if n % factor == 0:
-            number_factors += 1
-            n //= factor
-            while n % factor == 0:
-                n //= factor
-            max_factor = math.sqrt(n)
-        factor += 2
-    if n != 1:
-        number_factors += 1
-    return number_factors
+    """Count distinct prime factors of n > 0"""
+    return len(set(_prime_factors(n)))
+
+
+class Divisors:
+    """Divisors of a number generated from its prime factorization, in O(d(n)) multiplications
+    without trial division
+
+    Examples:
+        >>> d = Divisors.of(360)
+        >>> d.n, len(d), d.sigma()
+        (360, 24, 1170)
+        >>> d.sorted()[:8]
+        [1, 2, 3, 4, 5, 6, 8, 9]
+        >>> Divisors([(2, 2), (7, 1)]).sorted()
+        [1, 2, 4, 7, 14, 28]
+    """
+
+    def __init__(self, factorization):
+        """
+        Args:
+            factorization: (prime, degree) tuples of distinct primes, like the output of factors()
+        """
+        self.factorization = tuple(factorization)
+        self.n = 1
+        for p, e in self.factorization:
+            self.n *= p ** e
+        self._divisors = None
+
+    @classmethod
+    def of(cls, n, table=None):
+        """Divisors of n > 0, factorized by an SPFTable if given, otherwise by factors()"""
+        return cls(factors(n) if table is None else table.factors(n))
+
+    def _all(self):
+        if self._divisors is None:
+            divisors = [1]
+            for p, e in self.factorization:
+                # the divisors so far times p, p ** 2, ..., p ** e, every power from the block of the previous one
+                block = len(divisors)
+                for start in range(0, e * block, block):
+                    divisors.extend(map(p.__mul__, itertools.islice(divisors, start, start + block)))
+            self._divisors = divisors
+        return self._divisors
+
+    def __iter__(self):
+        """Generate all divisors, not sorted"""
+        return iter(self._all())
+
+    def __len__(self):
+        return self.count()
+
+    def sorted(self):
+        """All divisors in ascending order"""
+        return sorted(self._all())
+
+    def count(self):
+        """Number of divisors, computed from the exponents only"""
+        result = 1
+        for _, e in self.factorization:
+            result *= e + 1
+        return result
+
+    def sigma(self, k=1):
+        """Sum of the k-th powers of the divisors, computed from the exponents only"""
+        if k == 0:
+            return self.count()
+        result = 1
+        for p, e in self.factorization:
+            q = p ** k
+            result *= (q ** (e + 1) - 1) // (q - 1)
+        return result
 
 
 def all_factors(n, start_at=1):
-    return set(p for p in ((i, n // i) for i in range(start_at, int(n ** 0.5) + 1) if n % i == 0))
+    """Set of pairs (d, n // d) of divisors d of n, which satisfy start_at <= d <= sqrt(n)
+
+    Examples:
+        >>> sorted(all_factors(36, 2))
+        [(2, 18), (3, 12), (4, 9), (6, 6)]
+    """
+    if n < 1:
+        return set()
+    divisors = Divisors.of(n).sorted()
+    return {(d, n // d) for d in itertools.islice(divisors, (len(divisors) + 1) // 2) if d >= start_at}
 
 
 def find_prime_factors(k, all_primes):
-    primes = tuple(prime for prime in all_primes if prime <= k and k % prime == 0)
-    number_of_coefficients = len(primes)
-    degrees = list(1 for _ in range(number_of_coefficients))
-    for i in range(number_of_coefficients):
-        if primes[i] > math.sqrt(k):
-            break
-        degrees[i] = int(math.log(k, primes[i]))
-    return zip(primes, degrees)
+    """Generate (prime, degree) tuples of the prime factors of k > 0 by trial division with all_primes
+
+    Args:
+        k: number to factorize
+        all_primes: ascending prime numbers, e.g. the endless lazy_sieve_of_eratosthenes(). They are consumed
+            only until the square of the next one exceeds the not yet factorized part of k, which is prime then.
+            If they run out before, the factors among them are generated.
+
+    Examples:
+        >>> list(find_prime_factors(360, lazy_sieve_of_eratosthenes()))
+        [(2, 3), (3, 2), (5, 1)]
+        >>> list(find_prime_factors(2 * 1000003, lazy_sieve_of_eratosthenes()))
+        [(2, 1), (1000003, 1)]
+    """
+    for prime in all_primes:
+        if prime * prime > k:
+            if k > 1:
+                yield k, 1
+            return
+        degree = 0
+        while k % prime == 0:
+            k //= prime
+            degree += 1
+        if degree:
+            yield prime, degree
 
 
 def proper_divisors(n):
-    if is_prime(n):
-        return (1,)
-    divisors = set(reduce(list.__add__, ([i, n // i] for i in range(2, int(n ** 0.5) + 1) if n % i == 0)))
-    divisors.add(1)
+    """Set of the divisors of n > 0 except n itself
+
+    Examples:
+        >>> sorted(proper_divisors(28)), proper_divisors(13)
+        ([1, 2, 4, 7, 14], {1})
+    """
+    divisors = set(Divisors.of(n))
+    divisors.discard(n)
     return divisors
 
 
-def factorize(number, prime_numbers_generator):
+def factorize(number, prime_numbers_generator=None):
+    """Generate prime factors of number with multiplicity, in ascending order
+
+    Args:
+        number: number to factorize
+        prime_numbers_generator: ascending prime numbers to try as factors, can be endless like
+            lazy_sieve_of_eratosthenes(). If omitted, the factors are found with Pollard's rho algorithm.
+
+    Returns:
+        generator of prime factors. If prime_numbers_generator is exhausted before number is
+        fully factorized, the not factorized rest is the return value of the generator.
+
+    Examples:
+        >>> list(factorize(360))
+        [2, 2, 2, 3, 3, 5]
+        >>> list(factorize(360, sieve_of_eratosthenes(10)))
+        [2, 2, 2, 3, 3, 5]
+        >>> list(factorize(2 ** 5 * 1000003, lazy_sieve_of_eratosthenes()))  # stops at the prime rest
+        [2, 2, 2, 2, 2, 1000003]
+    """
+    if prime_numbers_generator is None:
+        for prime, degree in factors(number):
+            yield from itertools.repeat(prime, degree)
+        return
+    if number == 1:
+        return
+    if is_prime(number):
+        yield number
+        return
     for prime in prime_numbers_generator:
         if number % prime == 0:
-            yield prime
-            if number != prime:
-                yield from factorize(number // prime, prime_numbers_generator)
-            break
+            while number % prime == 0:
+                yield prime
+                number //= prime
+            if number == 1:
+                return
+            if is_prime(number):
+                yield number
+                return
     else:
         return number
 
@@ -212,10 +743,8 @@ if __name__ == "__main__":
     # print(sieve_of_factors(100))
     # print(sieve_of_factors2(100))
     # print(all_factors(999,2))
-    # all_primes = lazy_sieve_of_eratosthenes(999)
-    # print(tuple(all_primes))
-    # print(tuple(find_prime_factors(999, all_primes)))
-    prime_iter = sieve_of_eratosthenes(20)
+    # print(tuple(find_prime_factors(999, lazy_sieve_of_eratosthenes())))
+    prime_iter = lazy_sieve_of_eratosthenes()
     print(prime_iter)
     for _ in range(100):
         print(next(prime_iter))
@@ -0,0 +1,274 @@
+"""
+A persistent table of prime numbers, stored as a packed bitmap of odd numbers
+
+The table is sieved once, saved to disk and memory-mapped afterwards, so that several processes share
+the same pages instead of sieving again at startup.
+
+"""
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from bisect import bisect_left
+
+from pzeug.number.prime import SEGMENT_SIZE, _odd_segments
+
+BLOCK_BYTES = 64  # bytes per rank block, i.e. 512 odd numbers
+_HEADER = struct.Struct('<8sQQ')  # magic, limit, number of blocks
+_MAGIC = b'PZPRIME1'
+_BYTE_BITS = bytes(bin(i).count('1') for i in range(256))
+# translate tables which map a 0/1 flag to the bit it occupies inside a packed byte
+_FLAG_TO_BIT = tuple(bytes((1 << bit) if i == 1 else 0 for i in range(256)) for bit in range(8))
+
+
+def _pack_flags(flags):
+    """Pack a bytearray of 0/1 flags (length divisible by 8) into bits, least significant bit first.
+    """
+    packed = 0
+    for bit in range(8):
+        packed |= int.from_bytes(flags[bit::8].translate(_FLAG_TO_BIT[bit]), 'little')
+    return packed.to_bytes(len(flags) // 8, 'little')
+
+
+def _lowest_bit(x):
+    return (x & -x).bit_length() - 1
+
+
+class PrimeTable:
+    """Prime numbers in range [2, limit] with O(1) primality lookups and O(log n) pi(n) and nth_prime(n)
+
+    Bit i of the bitmap is set iff 2 * i + 1 is prime. Every BLOCK_BYTES of the bitmap have a precomputed
+    count of the set bits in front of them (rank index), which is used by pi(n) and, through a binary search,
+    by nth_prime(n).
+
+    Examples:
+        >>> table = PrimeTable(100)
+        >>> table.is_prime(97), table.pi(100), table.nth_prime(25)
+        (True, 25, 97)
+        >>> table.next_prime(13), table.prev_prime(13)
+        (17, 11)
+    """
+
+    def __init__(self, limit: int):
+        """Sieve all prime numbers up to limit into memory
+
+        :param limit: max value to be covered by the table
+        """
+        self.limit = limit
+        self._mmap = None
+        bits = bytearray()
+        pending = bytearray(1)  # the number 1 is not a prime
+        for _, flags in _odd_segments(3, limit + 1, SEGMENT_SIZE):
+            pending += flags
+            full = len(pending) - len(pending) % 8
+            bits += _pack_flags(pending[:full])
+            del pending[:full]
+        pending += bytes(-len(pending) % 8)
+        bits += _pack_flags(pending)
+        bits += bytes(-len(bits) % BLOCK_BYTES)
+
+        index = array('Q', [0])
+        count = 0
+        for offset in range(0, len(bits), BLOCK_BYTES):
+            count += int.from_bytes(bits[offset:offset + BLOCK_BYTES], 'little').bit_count()
+            index.append(count)
+        self._bits = bits
+        self._index = index
+
+    @classmethod
+    def load(cls, path: str) -> 'PrimeTable':
+        """Memory-map a table previously stored with save(). The pages are shared between all processes
+        mapping the same file.
+
+        :param path: file path
+        :return:
+            read-only PrimeTable
+        :raises
+            ValueError if the file is not a prime table
+        """
+        table = cls.__new__(cls)
+        with open(path, 'rb') as f:
+            table._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(table._mmap) < _HEADER.size or table._mmap[:len(_MAGIC)] != _MAGIC:
+            table._mmap.close()
+            raise ValueError("'{}' is not a prime table".format(path))
+        _, table.limit, blocks = _HEADER.unpack_from(table._mmap)
+        index_end = _HEADER.size + 8 * (blocks + 1)
+        view = memoryview(table._mmap)
+        if sys.byteorder == 'little':
+            table._index = view[_HEADER.size:index_end].cast('Q')
+        else:
+            table._index = array('Q', view[_HEADER.size:index_end])
+            table._index.byteswap()
+        table._bits = view[index_end:index_end + blocks * BLOCK_BYTES]
+        view.release()
+        return table
+
+    @classmethod
+    def cached(cls, path: str, limit: int) -> 'PrimeTable':
+        """Load the table from path if it covers limit, otherwise sieve it, save it to path and load it.
+
+        Concurrent callers never see a partially written file, because the table is written
+        into a temporary file first and then atomically renamed.
+
+        :param path: file path
+        :param limit: min value to be covered by the table
+        :return:
+            memory-mapped PrimeTable
+        """
+        try:
+            table = cls.load(path)
+        except (FileNotFoundError, ValueError):
+            pass
+        else:
+            if table.limit >= limit:
+                return table
+            table.close()
+        cls(limit).save(path)
+        return cls.load(path)
+
+    def save(self, path: str):
+        """Store the table into a file, which can be memory-mapped with load()
+
+        :param path: file path
+        """
+        index = array('Q', self._index)
+        if sys.byteorder != 'little':
+            index.byteswap()
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.prime_table')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(_HEADER.pack(_MAGIC, self.limit, len(self._bits) // BLOCK_BYTES))
+                index.tofile(f)
+                f.write(self._bits)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def close(self):
+        """Release the memory map, if the table has been loaded from a file
+        """
+        if self._mmap is not None:
+            if isinstance(self._index, memoryview):
+                self._index.release()
+            self._bits.release()
+            self._mmap.close()
+            self._mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self):
+        return self.pi(self.limit)
+
+    def __contains__(self, n):
+        return self.is_prime(n)
+
+    def _check(self, n):
+        if n > self.limit:
+            raise ValueError("{} exceeds the limit of the prime table {}".format(n, self.limit))
+
+    def _rank(self, i):
+        """Number of set bits in range [0, i)"""
+        block, rest = divmod(i, BLOCK_BYTES * 8)
+        byte = block * BLOCK_BYTES + rest // 8
+        count = self._index[block]
+        count += int.from_bytes(self._bits[block * BLOCK_BYTES:byte], 'little').bit_count()
+        if rest % 8:
+            count += _BYTE_BITS[self._bits[byte] & ((1 << rest % 8) - 1)]
+        return count
+
+    def _select(self, k):
+        """Position of the k-th set bit, counting from 1"""
+        block = bisect_left(self._index, k) - 1
+        k -= self._index[block]
+        byte = block * BLOCK_BYTES
+        while _BYTE_BITS[self._bits[byte]] < k:
+            k -= _BYTE_BITS[self._bits[byte]]
+            byte += 1
+        value = self._bits[byte]
+        for _ in range(k - 1):
+            value &= value - 1
+        return 8 * byte + _lowest_bit(value)
+
+    def is_prime(self, n: int) -> bool:
+        """Check if n is a prime number in O(1)
+
+        :raises
+            ValueError if n exceeds the limit of the table
+        """
+        self._check(n)
+        if n & 1 == 0 or n < 2:
+            return n == 2
+        i = n >> 1
+        return bool(self._bits[i >> 3] >> (i & 7) & 1)
+
+    def pi(self, n: int) -> int:
+        """Count prime numbers in range [2, n]
+
+        :raises
+            ValueError if n exceeds the limit of the table
+        """
+        self._check(n)
+        if n < 2:
+            return 0
+        return 1 + self._rank((n + 1) // 2)
+
+    def nth_prime(self, n: int) -> int:
+        """Return the n-th prime number, nth_prime(1) == 2
+
+        :raises
+            ValueError if n < 1 or the n-th prime number exceeds the limit of the table
+        """
+        if n < 1 or n > len(self):
+            raise ValueError("The prime table has no {}-th prime number".format(n))
+        if n == 1:
+            return 2
+        return 2 * self._select(n - 1) + 1
+
+    def next_prime(self, n: int) -> int:
+        """Return the smallest prime number > n
+
+        :raises
+            ValueError if no such prime number is within the limit of the table
+        """
+        if n < 2:
+            self._check(2)
+            return 2
+        i = (n + 1) >> 1  # bit of the first odd number > n
+        byte = i >> 3
+        value = self._bits[byte] >> (i & 7) << (i & 7) if byte < len(self._bits) else 0
+        while not value:
+            byte += 1
+            if byte >= len(self._bits):
+                break
+            value = self._bits[byte]
+        p = 2 * (8 * byte + _lowest_bit(value)) + 1 if value else self.limit + 1
+        self._check(p)
+        return p
+
+    def prev_prime(self, n: int) -> int:
+        """Return the largest prime number < n
+
+        :raises
+            ValueError if n <= 2 or n exceeds the limit of the table
+        """
+        if n <= 2:
+            raise ValueError("There are no prime numbers < {}".format(n))
+        self._check(n - 1)
+        i = (n >> 1) - 1  # bit of the last odd number < n
+        byte = i >> 3
+        value = self._bits[byte] & ((2 << (i & 7)) - 1)
+        while not value and byte:
+            byte -= 1
+            value = self._bits[byte]
+        if not value:
+            return 2
+        return 2 * (8 * byte + value.bit_length() - 1) + 1
@@ -2,6 +2,10 @@
 A module with auxiliary functions for working with [infinite] sequences
 
 """
+import math
+from typing import Iterator, Optional
+
+from pzeug.number.op import is_perfect_square
 
 
 def fibonacci():
@@ -15,19 +19,131 @@ def fibonacci():
         yield b
 
 
-def pentagonal_numbers(n=1):
-    while True:
-        yield n * (3 * n - 1) // 2
+def _fib_pair(n: int, m: Optional[int] = None) -> (int, int):
+    """(F(n), F(n + 1)) by fast doubling: F(2k) = F(k) * (2F(k + 1) - F(k)), F(2k + 1) = F(k)^2 + F(k + 1)^2"""
+    a, b = 0, 1
+    for bit in bin(n)[2:]:
+        c = a * (2 * b - a)
+        d = a * a + b * b
+        if m is not None:
+            c %= m
+            d %= m
+        if bit == '1':
+            a, b = d, c + d
+        else:
+            a, b = c, d
+    if m is not None:
+        b %= m
+    return a, b
+
+
+def fib(n: int) -> int:
+    """n-th Fibonacci number, F(0) = 0, F(1) = F(2) = 1, in O(log n) multiplications
+
+    Examples:
+        >>> [fib(n) for n in range(10)], fib(100)
+        ([0, 1, 1, 2, 3, 5, 8, 13, 21, 34], 354224848179261915075)
+    """
+    if n < 0:
+        raise ValueError("Fibonacci numbers are defined for n >= 0, supplied n={}".format(n))
+    return _fib_pair(n)[0]
+
+
+def fib_mod(n: int, m: int) -> int:
+    """n-th Fibonacci number modulo m, without big integers
+
+    Examples:
+        >>> fib_mod(10 ** 18, 10 ** 9 + 7)
+        209783453
+    """
+    if n < 0:
+        raise ValueError("Fibonacci numbers are defined for n >= 0, supplied n={}".format(n))
+    return _fib_pair(n, m)[0] % m
+
+
+def fib_range(lo: int, hi: Optional[int] = None) -> Iterator[int]:
+    """Generate Fibonacci numbers F(lo), F(lo + 1), ..., F(hi - 1), endless if hi is None
+
+    Examples:
+        >>> list(fib_range(10, 15))
+        [55, 89, 144, 233, 377]
+    """
+    a, b = _fib_pair(lo)
+    n = lo
+    while hi is None or n < hi:
+        yield a
+        a, b = b, a + b
         n += 1
 
 
+def is_fibonacci(x: int) -> bool:
+    """Check if x is a Fibonacci number, i.e. 5x^2 + 4 or 5x^2 - 4 is a perfect square
+
+    Examples:
+        >>> [x for x in range(100) if is_fibonacci(x)]
+        [0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89]
+    """
+    return x >= 0 and (is_perfect_square(5 * x * x + 4) or is_perfect_square(5 * x * x - 4))
+
+
+class PolygonalNumbers:
+    """Figurate numbers P(n) = ((s - 2) * n^2 - (s - 4) * n) / 2 of polygons with s sides, n >= 0,
+    with O(1) random access and membership tests via integer square roots
+
+    Examples:
+        >>> PENTAGONAL.nth(4), PENTAGONAL.index_of(22), PENTAGONAL.is_member(23)
+        (22, 4, False)
+        >>> # the next number after 40755, which is triangular, pentagonal and hexagonal
+        >>> next(h for h in HEXAGONAL.take_range(144) if PENTAGONAL.is_member(h) and TRIANGLE.is_member(h))
+        1533776805
+    """
+    __slots__ = ('sides',)
+
+    def __init__(self, sides: int):
+        if sides < 3:
+            raise ValueError("A polygon has at least 3 sides, supplied {}".format(sides))
+        self.sides = sides
+
+    def nth(self, n: int) -> int:
+        return ((self.sides - 2) * n * n - (self.sides - 4) * n) // 2
+
+    def index_of(self, x: int) -> Optional[int]:
+        """n >= 0 with nth(n) == x, None if x is not a member of the sequence"""
+        if x <= 0:
+            return 0 if x == 0 else None
+        s = self.sides
+        discriminant = (s - 4) ** 2 + 8 * (s - 2) * x
+        root = math.isqrt(discriminant)
+        if root * root != discriminant:
+            return None
+        n, remainder = divmod(root + s - 4, 2 * (s - 2))
+        return None if remainder else n
+
+    def is_member(self, x: int) -> bool:
+        return self.index_of(x) is not None
+
+    def take_range(self, lo: int, hi: Optional[int] = None) -> Iterator[int]:
+        """Generate P(lo), P(lo + 1), ..., P(hi - 1), endless if hi is None"""
+        x = self.nth(lo)
+        n = lo
+        while hi is None or n < hi:
+            yield x
+            x += (self.sides - 2) * n + 1
+            n += 1
+
+
+TRIANGLE = PolygonalNumbers(3)
+PENTAGONAL = PolygonalNumbers(5)
+HEXAGONAL = PolygonalNumbers(6)
+
+
+def pentagonal_numbers(n=1):
+    return PENTAGONAL.take_range(n)
+
+
 def triangle_numbers(n=1):
-    while True:
-        yield n * (n + 1) // 2
-        n += 1
+    return TRIANGLE.take_range(n)
 
 
 def hexagonal_numbers(n=1):
-    while True:
-        yield n * (2 * n - 1)
-        n += 1
+    return HEXAGONAL.take_range(n)
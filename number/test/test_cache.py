@@ -0,0 +1,87 @@
+import math
+import threading
+import unittest
+
+import number.cache as cache
+
+
+class TestCache(unittest.TestCase):
+
+    def test_lru_eviction(self):
+        lru = cache.LRUCache(maxsize=3)
+        for i in range(5):
+            lru.put(i, i * i)
+        self.assertEqual(len(lru), 3)
+        self.assertIsNone(lru.get(0))
+        self.assertEqual(lru.get(2), 4)
+        lru.put(5, 25)  # 3 is the least recently used one now
+        self.assertNotIn(3, lru)
+        self.assertEqual(lru.info(), cache.CacheInfo(hits=1, misses=1, maxsize=3, currsize=3))
+        lru.clear()
+        self.assertEqual(lru.info(), cache.CacheInfo(hits=0, misses=0, maxsize=3, currsize=0))
+
+    def test_byte_bound(self):
+        lru = cache.LRUCache(maxsize=None, maxbytes=10 ** 4)
+        for i in range(100):
+            lru.put(i, 3 ** (1000 + i))  # about 200 bytes each
+            self.assertLessEqual(lru.nbytes, 10 ** 4)
+        self.assertEqual(lru.nbytes, sum(cache.value_size(3 ** (1000 + i)) for i in range(100) if i in lru))
+        self.assertIn(99, lru)
+        self.assertNotIn(0, lru)
+        lru.put(99, 1)  # replacing a value releases its size
+        self.assertLess(lru.nbytes, 10 ** 4 - 150)
+        lru.put('huge', 2 ** (8 * 10 ** 4))  # larger than the whole bound, not cached
+        self.assertNotIn('huge', lru)
+        self.assertIn(99, lru)
+        lru.clear()
+        self.assertEqual((len(lru), lru.nbytes), (0, 0))
+
+        @cache.memoize(maxsize=1000, maxbytes=10 ** 5)
+        def binomial(n, k):
+            return math.comb(n, k)
+
+        for n in range(2000, 42000, 400):  # 0.25 to 5 KB each, 250 KB in total
+            binomial(n, n // 2)
+        self.assertLessEqual(binomial.cache.nbytes, 10 ** 5)
+        self.assertLess(binomial.cache_info().currsize, 100)
+
+    def test_memoize(self):
+        calls = []
+
+        @cache.memoize(maxsize=100)
+        def f(x, y=0):
+            calls.append(x)
+            return x + y
+
+        def worker():
+            for i in range(200):
+                f(i % 50, y=1)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(f(3, y=1), 4)
+        self.assertEqual(f.cache_info().currsize, 50)
+        self.assertEqual(sorted(set(calls)), list(range(50)))
+        cache.clear_all()
+        self.assertEqual(f.cache_info().currsize, 0)
+
+        @cache.memoize()
+        def g(*args, **kwargs):
+            return args, kwargs
+
+        self.assertEqual(g(1, k=2), ((1,), {'k': 2}))
+        self.assertEqual(g((1,), (('k', 2),)), (((1,), (('k', 2),)), {}))
+        self.assertEqual(g(1, (('k', 2),)), ((1, (('k', 2),)), {}))
+
+
+def load_tests(loader, tests, ignore):
+    import doctest
+    tests.addTests(doctest.DocTestSuite(cache))
+    return tests
+
+
+if __name__ == '__main__':
+    unittest.main()
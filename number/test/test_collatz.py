@@ -0,0 +1,33 @@
+import unittest
+
+import number.collatz as collatz
+
+
+class TestCollatz(unittest.TestCase):
+
+    def test_lengths(self):
+        expected = [len(list(collatz.collatz_sequence(n))) for n in range(1, 3000)]
+        self.assertEqual(collatz.collatz_lengths(range(1, 3000), collatz.CollatzCache(50)), expected)
+        self.assertEqual(collatz.collatz_lengths(range(1, 3000)), expected)
+        self.assertEqual(collatz.longest_under(3000), (2919, 217))
+
+    def test_long_trajectory(self):
+        n = 2 ** 5000 - 1  # thousands of steps, too deep for a recursive generator
+        self.assertEqual(collatz.collatz_length(n), len(list(collatz.collatz_sequence(n))))
+
+    def test_invalid(self):
+        for n in (0, -1, -7):
+            with self.assertRaises(ValueError):
+                collatz.collatz_length(n)
+            with self.assertRaises(ValueError):
+                collatz.CollatzCache(10).length(n)
+
+
+def load_tests(loader, tests, ignore):
+    import doctest
+    tests.addTests(doctest.DocTestSuite(collatz))
+    return tests
+
+
+if __name__ == '__main__':
+    unittest.main()
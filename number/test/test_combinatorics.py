@@ -0,0 +1,37 @@
+import math
+import unittest
+
+import number.combinatorics as combinatorics
+
+
+class TestModCombinatorics(unittest.TestCase):
+
+    def test_small_primes(self):
+        for p in (2, 3, 13):
+            mc = combinatorics.ModCombinatorics(p, p - 1)
+            for n in range(100):
+                self.assertEqual([mc.ncr(n, k) for k in range(-1, n + 2)],
+                                 [0] + [math.comb(n, k) % p for k in range(n + 1)] + [0])
+                self.assertEqual([mc.npr(n, k) for k in range(n + 1)], [math.perm(n, k) % p for k in range(n + 1)])
+
+    def test_large_prime(self):
+        p = 998244353
+        mc = combinatorics.ModCombinatorics(p, 2000)
+        queries = [(n, k) for n in range(0, 2001, 97) for k in range(0, n + 1, 13)]
+        self.assertEqual(mc.ncr_many(queries), [math.comb(n, k) % p for n, k in queries])
+        self.assertEqual(mc.multinomial([10, 20, 30]),
+                         math.factorial(60) // (math.factorial(10) * math.factorial(20) * math.factorial(30)) % p)
+        with self.assertRaises(ValueError):
+            mc.ncr(p + 5000, 1)  # the base p digit 5000 is beyond the table
+        with self.assertRaises(ValueError):
+            combinatorics.ModCombinatorics(91, 10)
+
+
+def load_tests(loader, tests, ignore):
+    import doctest
+    tests.addTests(doctest.DocTestSuite(combinatorics))
+    return tests
+
+
+if __name__ == '__main__':
+    unittest.main()
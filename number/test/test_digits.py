@@ -0,0 +1,49 @@
+import itertools
+import unittest
+
+import number.digits as digits
+
+
+class TestDigits(unittest.TestCase):
+
+    def test_conversions(self):
+        for base in (2, 3, 10, 16):
+            for n in list(range(300)) + [base ** 20 - 1, base ** 20]:
+                d = digits.to_digits(n, base)
+                self.assertEqual(digits.from_digits(d, base), n)
+                self.assertEqual(len(d), digits.num_digits(n, base))
+                self.assertEqual(digits.reverse(n, base), digits.from_digits(d[::-1], base))
+                self.assertEqual(digits.is_palindrome(n, base), d == d[::-1])
+
+    def test_palindromes(self):
+        for base in (2, 10):
+            expected = [n for n in range(5000) if digits.is_palindrome(n, base)]
+            self.assertEqual(digits.palindromes_in_range(0, 5000, base), expected)
+            self.assertEqual(digits.palindromes_in_range(77, 1234, base), [n for n in expected if 77 <= n < 1234])
+        self.assertEqual(list(digits.palindromes(5, descending=True))[:2], [99999, 99899])
+        self.assertEqual(list(digits.palindromes(5, start=998)), [99899, 99999])
+        self.assertEqual(list(digits.palindromes(5, descending=True, start=101)), [10101, 10001])
+        self.assertEqual(list(digits.palindromes(1, start=7)), [7, 8, 9])
+        # a narrow window at a large offset, where walking all palindromes of the length would take hours
+        self.assertEqual(digits.palindromes_in_range(10 ** 20, 10 ** 20 + 10 ** 5), [100000000000000000001])
+        self.assertEqual(digits.palindromes_in_range(123456789 * 10 ** 9, 123456790 * 10 ** 9),
+                         [123456789987654321])
+        self.assertEqual(digits.palindromes_in_range(10 ** 12 - 10 ** 4, 10 ** 12 + 10 ** 4, 2),
+                         [n for n in range(10 ** 12 - 10 ** 4, 10 ** 12 + 10 ** 4) if digits.is_palindrome(n, 2)])
+
+    def test_permutations(self):
+        items = [3, 1, 3, 2, 1]
+        self.assertEqual(list(digits.distinct_permutations(items)), sorted(set(itertools.permutations(items))))
+        self.assertEqual(list(digits.digit_permutations(100)), [1, 10, 100])
+        self.assertEqual(list(digits.rotations(1234)), [2341, 3412, 4123])
+        self.assertEqual(list(digits.rotations(0b1011, base=2)), [0b0111, 0b1110, 0b1101])
+
+
+def load_tests(loader, tests, ignore):
+    import doctest
+    tests.addTests(doctest.DocTestSuite(digits))
+    return tests
+
+
+if __name__ == '__main__':
+    unittest.main()
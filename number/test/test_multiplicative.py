@@ -0,0 +1,43 @@
+import math
+import unittest
+
+import number.multiplicative as multiplicative
+import number.prime as prime
+
+
+class TestMultiplicative(unittest.TestCase):
+
+    def test_sieves(self):
+        n = 1000
+        divisors = [[d for d in range(1, k + 1) if k % d == 0] for k in range(n + 1)]
+        table = prime.SPFTable(n)
+        self.assertEqual(list(multiplicative.totients(n, table)),
+                         [sum(math.gcd(k, i) == 1 for i in range(1, k + 1)) for k in range(n + 1)])
+        self.assertEqual(list(multiplicative.totients(n)), [multiplicative.totient(k) for k in range(n + 1)])
+        self.assertEqual(list(multiplicative.divisor_counts(n, table)), [len(d) for d in divisors])
+        self.assertEqual(list(multiplicative.divisor_sigma(n, 0, table)), [len(d) for d in divisors])
+        self.assertEqual(list(multiplicative.divisor_sigma(n, 3, table)), [sum(x ** 3 for x in d) for d in divisors])
+        self.assertEqual(list(multiplicative.aliquot_sums(n, table)), [sum(d[:-1]) for d in divisors])
+        self.assertEqual(list(multiplicative.mobius(30, table)),
+                         [0, 1, -1, -1, 0, -1, 1, -1, 0, 0, 1, -1, 0, -1, 1, 1, 0, -1, 0, -1, 0, 1, 1, -1, 0, 0, 1,
+                          0, 0, -1, -1])
+        with self.assertRaises(ValueError):
+            multiplicative.totients(n + 1, table)
+
+    def test_large_sigma(self):
+        sigma = multiplicative.divisor_sigma(100, 10)
+        self.assertIsInstance(sigma, list)
+        self.assertEqual(sigma[100], sum(d ** 10 for d in range(1, 101) if 100 % d == 0))
+        # a shared table larger than n is sieved up to its own limit
+        sigma = multiplicative.divisor_sigma(10, 15, table=prime.SPFTable(1000))
+        self.assertEqual(list(sigma), [0] + [sum(d ** 15 for d in range(1, m + 1) if m % d == 0) for m in range(1, 11)])
+
+
+def load_tests(loader, tests, ignore):
+    import doctest
+    tests.addTests(doctest.DocTestSuite(multiplicative))
+    return tests
+
+
+if __name__ == '__main__':
+    unittest.main()
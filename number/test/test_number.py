@@ -12,6 +12,56 @@ class TestNumber(unittest.TestCase):
         self.assertEqual(reduce(number.lcm, [40, 12, 20]), 120)
         self.assertEqual(reduce(number.lcm, list(range(1, 6)) + [20]), 60)
 
+    def test_gcd(self):
+        self.assertEqual([number.gcd(4, -6), number.gcd(-4, 6), number.gcd(-4, 0), number.gcd(0, 0)], [-2, 2, -4, 0])
+        numbers = [2 ** 5 * 3 ** 2 * 7 * k for k in range(1, 3000, 2)]
+        self.assertEqual(number.gcd_many(numbers), 2 ** 5 * 3 ** 2 * 7)
+        self.assertEqual(number.gcd_many([]), 0)
+        self.assertEqual(number.lcm_many(range(1, 21)), reduce(number.lcm, range(1, 21)))
+        self.assertEqual(number.lcm_many([]), 1)
+        self.assertEqual(number.lcm_many([3, 0, 5]), 0)
+        for k in range(1, 60):
+            self.assertEqual(number.lcm_range(k), reduce(number.lcm, range(1, k + 1)))
+        self.assertEqual(number.lcm_range(0), 1)
+        self.assertEqual(number.smallest_num_divisible_by_each_to(20), 232792560)
+
+    def test_batch_gcd(self):
+        primes = [1000003, 1000033, 1000037, 1000039, 1000081, 1000099, 1000117]
+        moduli = [primes[0] * primes[1], primes[2] * primes[3], primes[1] * primes[4], primes[5] * primes[6],
+                  primes[3] * primes[4], 1]
+        expected = [number.gcd(n, reduce(lambda a, b: a * b, moduli[:i] + moduli[i + 1:], 1)) for i, n in
+                    enumerate(moduli)]
+        self.assertEqual(number.batch_gcd(moduli), expected)
+        self.assertEqual(expected, [primes[1], primes[3], primes[1] * primes[4], 1, primes[3] * primes[4], 1])
+        self.assertEqual(number.batch_gcd([]), [])
+        self.assertEqual(number.batch_gcd([35]), [1])
+
+    def test_binomial_coefficient(self):
+        self.assertEqual([number.binomial_coefficient(5, k) for k in range(6)], [1, 5, 10, 10, 5, 1])
+        self.assertEqual(number.binomial_coefficient(10 ** 6, 3), 10 ** 6 * (10 ** 6 - 1) * (10 ** 6 - 2) // 6)
+        self.assertLessEqual(len(number.binomial_coefficient.cache), number.binomial_coefficient.cache.maxsize)
+        with self.assertRaises(ValueError):
+            number.binomial_coefficient(2, 3)
+
+    def test_digits(self):
+        self.assertEqual(number.reverse(1230), 321)
+        self.assertEqual(list(number.digits_in_number(1230)), [0, 3, 2, 1])
+        self.assertEqual(number.digits_to_number([1, 2, 3, 0]), 1230)
+        self.assertEqual(list(number.combinations(121)), [112, 121, 211])
+        self.assertEqual(list(number.circulars(number.digits_in_number(1193))), [1931, 9311, 3119])
+
+    def test_largest_palindrome(self):
+        self.assertEqual(number.largest_palindrome(10, 99), (9009, 91, 99))
+        self.assertEqual(number.largest_palindrome(100, 999), (906609, 913, 993))
+        self.assertEqual(number.largest_palindrome(1, 9), (9, 1, 9))
+        self.assertEqual(number.largest_palindrome(0, 9), (9, 1, 9))
+        self.assertEqual(number.largest_palindrome(0, 0), (0, 0, 0))
+
+    def test_prim_root(self):
+        self.assertEqual(number.prim_root(7), [3, 5])
+        self.assertEqual(number.prim_root(8), [])
+        self.assertEqual(len(number.prim_root(761)), 288)  # totient(totient(761))
+
 
 def load_tests(loader, tests, ignore):
     import doctest
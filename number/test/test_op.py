@@ -0,0 +1,41 @@
+import math
+import unittest
+
+import number.op as op
+
+
+class TestOp(unittest.TestCase):
+
+    def test_factorial(self):
+        for n in list(range(200)) + [1000, 4321]:
+            self.assertEqual(op.factorial(n), math.factorial(n))
+        self.assertEqual(op.cached_factorial(30), math.factorial(30))
+
+    def test_roots(self):
+        for x in list(range(300)) + [10 ** 50 - 1, 10 ** 50, 10 ** 50 + 1, 2 ** 521 - 1]:
+            a, r = op.exact_sqrt(x)
+            self.assertEqual((a, r), op._long_hand_sqrt(x))
+            self.assertEqual(op.is_perfect_square(x), r == 0)
+            for k in range(1, 8):
+                root = op.iroot(x, k)
+                self.assertTrue(root ** k <= x < (root + 1) ** k)
+        with self.assertRaises(ValueError):
+            op.iroot(-1, 3)
+
+    def test_perfect_power(self):
+        self.assertEqual(op.perfect_power(2 ** 64), (2, 64))
+        self.assertEqual(op.perfect_power(12 ** 35), (12, 35))
+        self.assertEqual(op.perfect_power(2 ** 61 - 1), (2 ** 61 - 1, 1))
+        self.assertEqual(op.perfect_power(3 ** 35 * 2 ** 21), (3 ** 5 * 2 ** 3, 7))
+        self.assertEqual([x for x in range(2, 130) if op.is_perfect_power(x)],
+                         [4, 8, 9, 16, 25, 27, 32, 36, 49, 64, 81, 100, 121, 125, 128])
+
+
+def load_tests(loader, tests, ignore):
+    import doctest
+    tests.addTests(doctest.DocTestSuite(op))
+    return tests
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import operator
+import os
+import tempfile
+import unittest
+
+import number.parallel as parallel
+import number.prime as prime
+import number.prime_table as prime_table
+
+
+class TestParallel(unittest.TestCase):
+
+    def test_map(self):
+        numbers = range(10 ** 5, 10 ** 5 + 3000)
+        expected = [prime.is_prime(n) for n in numbers]
+        for workers in (1, 3):
+            self.assertEqual(parallel.parallel_map(prime.is_prime, numbers, workers=workers), expected)
+            self.assertEqual(parallel.parallel_map(prime.is_prime, list(numbers), workers=workers), expected)
+        self.assertEqual(parallel.parallel_map(prime.is_prime, [], workers=3), [])
+        self.assertEqual(parallel.parallel_reduce(prime.count_factors, range(2, 3000), operator.add, 0, workers=3),
+                         sum(prime.count_factors(n) for n in range(2, 3000)))
+
+    def test_shared_tables(self):
+        spf = prime.SPFTable(5000)
+        self.assertEqual(parallel.parallel_map(prime.SPFTable.factorize, range(5001), workers=3, table=spf),
+                         [spf.factorize(n) for n in range(5001)])
+        table = prime_table.PrimeTable(5000)
+        expected = [table.pi(n) for n in range(5001)]
+        self.assertEqual(parallel.parallel_map(prime_table.PrimeTable.pi, range(5001), workers=3, table=table),
+                         expected)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'primes.bin')
+            table.save(path)
+            with prime_table.PrimeTable.load(path) as loaded:
+                self.assertEqual(parallel.parallel_map(prime_table.PrimeTable.pi, range(5001), workers=3,
+                                                       table=loaded), expected)
+        self.assertRaises(ValueError, parallel.SharedTable, [1, 2, 3])
+
+    def test_range_functions(self):
+        for workers in (1, 3):
+            self.assertEqual(parallel.parallel_primes_in_range(0, 20000, workers=workers),
+                             list(prime.primes_in_range(0, 20000)))
+            self.assertEqual([parallel.parallel_prime_count(n, workers=workers) for n in range(0, 30)],
+                             [prime.prime_count(n) for n in range(0, 30)])
+            self.assertEqual(parallel.parallel_factors(range(1, 500), workers=workers),
+                             [list(prime.factors(n)) for n in range(1, 500)])
+
+
+def load_tests(loader, tests, ignore):
+    import doctest
+    tests.addTests(doctest.DocTestSuite(parallel))
+    return tests
+
+
+if __name__ == '__main__':
+    unittest.main()
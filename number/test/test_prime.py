@@ -0,0 +1,178 @@
+import itertools
+import os
+import tempfile
+import unittest
+
+import number.prime as prime
+import number.prime_table as prime_table
+
+
+def naive_primes(n):
+    return [k for k in range(2, n + 1) if all(k % d for d in range(2, int(k ** 0.5) + 1))]
+
+
+class TestPrime(unittest.TestCase):
+
+    def test_sieve_of_eratosthenes(self):
+        for limit in range(0, 200):
+            self.assertEqual(list(prime.sieve_of_eratosthenes(limit)), naive_primes(limit))
+        self.assertEqual(list(prime.sieve_of_eratosthenes(20000)), naive_primes(20000))
+
+    def test_primes_in_range(self):
+        self.assertEqual(list(prime.primes_in_range(0, 3)), [2])
+        self.assertEqual(list(prime.primes_in_range(14, 17)), [])
+        self.assertEqual(list(prime.primes_in_range(10 ** 9, 10 ** 9 + 100)), [1000000007, 1000000009, 1000000021,
+                                                                                1000000033, 1000000087, 1000000093,
+                                                                                1000000097])
+        # windows smaller than the range
+        segments = prime._odd_segments(3, 1000, segment_size=7)
+        self.assertEqual([f + 2 * i for f, flags in segments for i, flag in enumerate(flags) if flag],
+                         naive_primes(999)[1:])
+
+    def test_lazy_sieve_of_eratosthenes(self):
+        primes = naive_primes(20000)
+        self.assertEqual(list(itertools.islice(prime.lazy_sieve_of_eratosthenes(), len(primes))), primes)
+        for start in (-1, 0, 2, 3, 8, 11, 12, 120, 121, 122, 209, 210, 211, 212, 10 ** 6 + 1, 10 ** 12):
+            self.assertEqual(list(itertools.islice(prime.lazy_sieve_of_eratosthenes(start), 300)),
+                             list(itertools.islice(prime.primes_in_range(start, 10 ** 13), 300)))
+
+    def test_prime_count(self):
+        self.assertEqual(prime.prime_count(1), 0)
+        self.assertEqual(prime.prime_count(2), 1)
+        self.assertEqual(prime.prime_count(10 ** 6), 78498)
+
+    def test_is_prime(self):
+        primes = set(naive_primes(20000))
+        self.assertEqual([n for n in range(-3, 20001) if prime.is_prime(n)], sorted(primes))
+        # strong pseudoprimes to the deterministic bases of the previous interval
+        for n in (3215031751, 3825123056546413051, 318665857834031151167461, 3317044064679887385961981):
+            self.assertFalse(prime.is_prime(n))
+        self.assertTrue(prime.is_prime(2 ** 127 - 1))
+        self.assertFalse(prime.is_prime((2 ** 61 - 1) * (2 ** 89 - 1)))
+
+    def test_factors(self):
+        self.assertEqual(list(prime.factors(1)), [])
+        self.assertEqual(list(prime.factors(2 ** 10 * 3 ** 5 * 1000003)), [(2, 10), (3, 5), (1000003, 1)])
+        self.assertEqual(list(prime.factors(600851475143 * (2 ** 61 - 1))),
+                         [(71, 1), (839, 1), (1471, 1), (6857, 1), (2 ** 61 - 1, 1)])
+        self.assertEqual(list(prime.factors(1000003 ** 2 * 999983 ** 3)), [(999983, 3), (1000003, 2)])
+        self.assertEqual(prime.count_factors(2 ** 10 * 3 ** 5 * 1000003), 3)
+
+    def test_factorize(self):
+        for n in range(1, 2000):
+            expected = [p for p, degree in prime.factors(n) for _ in range(degree)]
+            self.assertEqual(list(prime.factorize(n)), expected)
+            self.assertEqual(list(prime.factorize(n, prime.sieve_of_eratosthenes(50))), expected)
+            self.assertEqual(list(prime.factorize(n, prime.lazy_sieve_of_eratosthenes())), expected)
+            self.assertEqual(list(prime.find_prime_factors(n, prime.lazy_sieve_of_eratosthenes())),
+                             list(prime.factors(n)))
+        self.assertEqual(list(prime.find_prime_factors(2 ** 3 * 7 * 53, prime.sieve_of_eratosthenes(10))),
+                         [(2, 3), (7, 1)])
+        # a large prime rest is recognized without sieving up to it
+        self.assertEqual(list(prime.find_prime_factors(6 * (10 ** 12 + 39), prime.lazy_sieve_of_eratosthenes())),
+                         [(2, 1), (3, 1), (10 ** 12 + 39, 1)])
+
+    def test_divisors(self):
+        table = prime.SPFTable(2000)
+        for n in range(1, 2001):
+            expected = [d for d in range(1, n + 1) if n % d == 0]
+            divisors = prime.Divisors.of(n)
+            self.assertEqual(divisors.sorted(), expected)
+            self.assertEqual(sorted(divisors), expected)
+            self.assertEqual(table.divisors(n).sorted(), expected)
+            self.assertEqual((divisors.n, len(divisors), divisors.sigma(0)), (n, len(expected), len(expected)))
+            self.assertEqual(divisors.sigma(2), sum(d * d for d in expected))
+            self.assertEqual(prime.proper_divisors(n), set(expected[:-1]))
+            self.assertEqual(prime.all_factors(n, 3), {(d, n // d) for d in expected if 3 <= d and d * d <= n})
+        n = 2 ** 4 * 3 ** 3 * 5 ** 2 * 7 * 11 * 13 * 17 * 19 * 23 * 29 * (10 ** 12 + 39)
+        divisors = prime.Divisors.of(n).sorted()
+        self.assertEqual(len(divisors), 5 * 4 * 3 * 2 ** 8)
+        self.assertEqual(divisors[-2:], [n // 2, n])
+        self.assertTrue(all(n % d == 0 for d in divisors))
+        self.assertEqual(prime.all_factors(0), set())
+
+    def test_spf_table(self):
+        limit = 2000
+        table = prime.SPFTable(limit)
+        self.assertEqual(len(table), limit + 1)
+        self.assertEqual([k for k in range(2, limit + 1) if table.spf[k] == k], naive_primes(limit))
+        for k in range(1, limit + 1):
+            self.assertEqual(list(table.factors(k)), list(prime.factors(k)))
+        divisors = [[d for d in range(1, k + 1) if k % d == 0] for k in range(limit + 1)]
+        self.assertEqual(list(table.divisor_count()), [len(d) for d in divisors])
+        self.assertEqual(list(table.sigma()), [sum(d) for d in divisors])
+        self.assertEqual(list(table.omega()), [len(list(prime.factors(k))) for k in range(limit + 1)])
+        self.assertEqual(list(table.big_omega()), [len(table[k]) for k in range(limit + 1)])
+        self.assertEqual(list(table.totient())[:13], [0, 1, 1, 2, 2, 4, 2, 6, 4, 6, 4, 10, 4])
+
+    def test_sieve_of_factors(self):
+        self.assertEqual([k for k, flag in enumerate(prime.sieve_of_factors(32)) if flag],
+                         [2, 3, 4, 5, 7, 8, 9, 11, 13, 16, 17, 19, 23, 25, 27, 29, 31, 32])
+        self.assertEqual(list(prime.sieve_of_factors2(13)), [0, 0, 1, 1, 2, 1, 2, 1, 3, 2, 2, 1, 3])
+        self.assertEqual(prime.prime_factorizations(13)[12], [2, 2, 3])
+
+    def test_goldbach(self):
+        primes = set(naive_primes(6000))
+        for limit in (0, 1, 2, 3, 4, 5, 8, 9, 100, 3000):
+            counterexample, representable = prime.goldbach_search(limit)
+            self.assertEqual(len(representable), limit + 1)
+            self.assertEqual([n for n in range(limit + 1) if representable[n]],
+                             [n for n in range(limit + 1) if any(n - 2 * k * k in primes for k in range(1, n))])
+            self.assertIsNone(counterexample)
+            self.assertEqual(list(prime.goldbach_pairs(limit)),
+                             [sum(1 for p in primes if p <= n - p and n - p in primes) for n in range(limit + 1)])
+        self.assertEqual(prime.goldbach_search(5777)[0], 5777)
+        self.assertEqual(prime.goldbach_search(10 ** 5)[0], 5777)
+        self.assertEqual([n for n in range(3, 6000, 2) if not prime.goldbach_conjecture(n) and n not in primes],
+                         [5777, 5993])
+
+
+class TestPrimeTable(unittest.TestCase):
+
+    def test_lookups(self):
+        limit = 3000
+        primes = naive_primes(limit)
+        table = prime_table.PrimeTable(limit)
+        self.assertEqual(len(table), len(primes))
+        self.assertEqual([n for n in range(limit + 1) if table.is_prime(n)], primes)
+        self.assertEqual([table.nth_prime(i) for i in range(1, len(primes) + 1)], primes)
+        self.assertEqual([table.pi(n) for n in range(limit + 1)],
+                         [sum(p <= n for p in primes) for n in range(limit + 1)])
+        self.assertEqual([table.next_prime(p) for p in primes[:-1]], primes[1:])
+        self.assertEqual([table.prev_prime(p) for p in primes[1:]], primes[:-1])
+        self.assertEqual(table.prev_prime(3), 2)
+        with self.assertRaises(ValueError):
+            table.next_prime(primes[-1])
+        with self.assertRaises(ValueError):
+            table.prev_prime(2)
+        with self.assertRaises(ValueError):
+            table.is_prime(limit + 1)
+        with self.assertRaises(ValueError):
+            table.nth_prime(len(primes) + 1)
+
+    def test_persistence(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'primes.bin')
+            with prime_table.PrimeTable.cached(path, 10 ** 5) as table:
+                self.assertEqual(table.pi(10 ** 5), 9592)
+                self.assertEqual(table.nth_prime(9592), 99991)
+            with prime_table.PrimeTable.load(path) as table:
+                self.assertEqual(table.limit, 10 ** 5)
+                self.assertTrue(table.is_prime(99991))
+            with prime_table.PrimeTable.cached(path, 2 * 10 ** 5) as table:
+                self.assertEqual(table.limit, 2 * 10 ** 5)
+            with open(path, 'wb') as f:
+                f.write(b'garbage')
+            with self.assertRaises(ValueError):
+                prime_table.PrimeTable.load(path)
+
+
+def load_tests(loader, tests, ignore):
+    import doctest
+    tests.addTests(doctest.DocTestSuite(prime))
+    tests.addTests(doctest.DocTestSuite(prime_table))
+    return tests
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import itertools
+import unittest
+
+import number.sequence as sequence
+
+
+class TestSequence(unittest.TestCase):
+
+    def test_fib(self):
+        expected = [0] + list(itertools.islice(sequence.fibonacci(), 300))
+        self.assertEqual([sequence.fib(n) for n in range(301)], expected)
+        self.assertEqual(list(sequence.fib_range(0, 301)), expected)
+        self.assertEqual([sequence.fib_mod(n, 97) for n in range(301)], [f % 97 for f in expected])
+        self.assertEqual(sequence.fib_mod(10 ** 6, 10 ** 9), sequence.fib(10 ** 6) % 10 ** 9)
+        self.assertRaises(ValueError, sequence.fib, -1)
+
+    def test_polygonal(self):
+        for polygonal, generator in ((sequence.TRIANGLE, sequence.triangle_numbers),
+                                     (sequence.PENTAGONAL, sequence.pentagonal_numbers),
+                                     (sequence.HEXAGONAL, sequence.hexagonal_numbers)):
+            terms = list(itertools.islice(generator(0), 500))
+            self.assertEqual([polygonal.nth(n) for n in range(500)], terms)
+            self.assertEqual(list(polygonal.take_range(100, 500)), terms[100:])
+            members = set(terms)
+            for x in range(terms[-1] + 1):
+                self.assertEqual(polygonal.is_member(x), x in members, x)
+            self.assertEqual([polygonal.index_of(x) for x in terms], list(range(500)))
+            self.assertIsNone(polygonal.index_of(-1))
+        self.assertEqual(next(sequence.pentagonal_numbers()), 1)
+        self.assertEqual(list(itertools.islice(sequence.triangle_numbers(3), 3)), [6, 10, 15])
+
+
+def load_tests(loader, tests, ignore):
+    import doctest
+    tests.addTests(doctest.DocTestSuite(sequence))
+    return tests
+
+
+if __name__ == '__main__':
+    unittest.main()
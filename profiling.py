@@ -0,0 +1,333 @@
+"""
+Low overhead profiling of function calls: call counts, latency percentiles and memory, aggregated in a registry
+instead of being printed
+
+A profiled function checks one flag of its registry while profiling is disabled, so the decorator can stay on
+hot paths in production. When enabled, every call is counted, but only every n-th call (sample rate 1 / n)
+is timed with perf_counter_ns and, optionally, traced with tracemalloc.
+
+"""
+import csv
+import inspect
+import io
+import json
+import math
+import os
+import random
+import threading
+import time
+import tracemalloc
+from collections import namedtuple
+from functools import wraps
+from typing import Callable, List, Optional
+
+PROFILE_ENV = 'PZEUG_PROFILE'  # initial sample rate of the default registry, profiling is disabled if unset
+RESERVOIR_SIZE = 1024  # latencies kept per function for the percentiles
+
+Summary = namedtuple('Summary', ['name', 'calls', 'sampled', 'total_ns', 'mean_ns', 'min_ns', 'max_ns',
+                                 'p50_ns', 'p90_ns', 'p99_ns', 'memory_peak', 'memory_delta'])
+
+
+class FunctionStats:
+    """Aggregated measurements of one function. Latencies of the sampled calls are kept in a reservoir sample
+    of RESERVOIR_SIZE, so the memory does not grow with the number of calls.
+    """
+    __slots__ = ('name', 'calls', 'sampled', 'total_ns', 'min_ns', 'max_ns', 'samples', 'memory_peak',
+                 'memory_delta')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.reset()
+
+    def reset(self):
+        self.calls = 0
+        self.sampled = 0
+        self.total_ns = 0
+        self.min_ns = None
+        self.max_ns = None
+        self.samples = []
+        self.memory_peak = None
+        self.memory_delta = None
+
+    def add(self, elapsed_ns: int, memory_peak: Optional[int] = None, memory_delta: Optional[int] = None):
+        self.sampled += 1
+        self.total_ns += elapsed_ns
+        self.min_ns = elapsed_ns if self.min_ns is None else min(self.min_ns, elapsed_ns)
+        self.max_ns = elapsed_ns if self.max_ns is None else max(self.max_ns, elapsed_ns)
+        if len(self.samples) < RESERVOIR_SIZE:
+            self.samples.append(elapsed_ns)
+        else:
+            i = random.randrange(self.sampled)
+            if i < RESERVOIR_SIZE:
+                self.samples[i] = elapsed_ns
+        if memory_peak is not None:
+            self.memory_peak = max(self.memory_peak or 0, memory_peak)
+            self.memory_delta = (self.memory_delta or 0) + memory_delta
+
+    def percentiles(self, *qs: float) -> List[Optional[int]]:
+        """Latencies, which the fractions qs of the sampled calls do not exceed (nearest rank), q in range (0, 1]"""
+        ordered = sorted(self.samples)
+        return [ordered[max(math.ceil(q * len(ordered)), 1) - 1] if ordered else None for q in qs]
+
+    def summary(self) -> Summary:
+        mean = self.total_ns // self.sampled if self.sampled else None
+        return Summary(self.name, self.calls, self.sampled, self.total_ns, mean, self.min_ns, self.max_ns,
+                       *self.percentiles(0.5, 0.9, 0.99), self.memory_peak, self.memory_delta)
+
+
+class Registry:
+    """Statistics of all functions profiled into it
+
+    Examples:
+        >>> registry = Registry(sample_rate=1.0)
+        >>> @profile(registry=registry)
+        ... def square(x):
+        ...     return x * x
+        >>> [square(x) for x in range(3)]
+        [0, 1, 4]
+        >>> s = registry.summary()[0]
+        >>> s.name.endswith('square'), s.calls, s.sampled
+        (True, 3, 3)
+    """
+
+    def __init__(self, sample_rate: float = 0.0, memory: bool = False):
+        """
+        :param sample_rate: fraction of the calls to be timed, 0 disables profiling
+        :param memory: trace memory allocations of the sampled calls
+        """
+        self.enabled = False
+        self.memory = False
+        self._period = 0
+        self._started_tracing = False
+        self._stats = {}
+        self._lock = threading.Lock()
+        self.configure(sample_rate, memory)
+
+    def configure(self, sample_rate: float = 1.0, memory: bool = False):
+        """Change the sample rate and the memory tracing
+
+        :param sample_rate: fraction of the calls to be timed, rounded to 1 / n, 0 disables profiling
+        :param memory: trace memory allocations with tracemalloc, which slows down all allocations
+            of the process while active
+        :raises
+            ValueError if sample_rate is not in range [0, 1]
+        """
+        if not 0 <= sample_rate <= 1:
+            raise ValueError("The sample rate must be in range [0, 1], supplied {}".format(sample_rate))
+        self._period = round(1 / sample_rate) if sample_rate else 0
+        self.memory = memory and sample_rate > 0
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        elif not self.memory and self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+        self.enabled = sample_rate > 0
+
+    def stats(self, name: str) -> FunctionStats:
+        """Statistics of the function name, created on first use"""
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = FunctionStats(name)
+            return stats
+
+    def _begin(self, stats: FunctionStats):
+        """Count a call and start the measurement, if it is sampled
+
+        :return:
+            token for _end(), None if the call is not sampled
+        """
+        with self._lock:
+            stats.calls += 1
+            if not self._period or stats.calls % self._period:  # disabled by another thread meanwhile
+                return None
+        if self.memory and tracemalloc.is_tracing():
+            memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        else:
+            memory = None
+        return time.perf_counter_ns(), memory
+
+    def _end(self, stats: FunctionStats, token, elapsed_ns: Optional[int] = None):
+        """Finish the measurement of a sampled call
+
+        :param elapsed_ns: measured time, the time since _begin() by default
+        """
+        start, memory = token
+        if elapsed_ns is None:
+            elapsed_ns = time.perf_counter_ns() - start
+        peak = delta = None
+        if memory is not None and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            peak, delta = max(peak - memory, 0), current - memory
+        with self._lock:
+            stats.add(elapsed_ns, peak, delta)
+
+    def reset(self):
+        """Zero the statistics of all functions"""
+        with self._lock:
+            for stats in self._stats.values():
+                stats.reset()
+
+    def summary(self) -> List[Summary]:
+        """Statistics of the called functions, the largest measured total time first"""
+        with self._lock:
+            rows = [stats.summary() for stats in self._stats.values() if stats.calls]
+        return sorted(rows, key=lambda row: row.total_ns, reverse=True)
+
+    def to_json(self, path: Optional[str] = None) -> str:
+        """Export the summary as a JSON list of objects, times in nanoseconds and memory in bytes
+
+        :param path: file to write the JSON into
+        """
+        text = json.dumps([row._asdict() for row in self.summary()], indent=2)
+        if path is not None:
+            with open(path, 'w') as f:
+                f.write(text)
+        return text
+
+    def to_csv(self, path: Optional[str] = None) -> str:
+        """Export the summary as CSV with a header of the Summary fields
+
+        :param path: file to write the CSV into
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        writer.writerow(Summary._fields)
+        writer.writerows(self.summary())
+        text = buffer.getvalue()
+        if path is not None:
+            with open(path, 'w', newline='') as f:
+                f.write(text)
+        return text
+
+
+REGISTRY = Registry(float(os.environ.get(PROFILE_ENV) or 0))
+
+
+def _timed_generator(generator, registry, stats, token, elapsed=0):
+    """Forward generator and record the time spent inside it, until it is exhausted or closed
+
+    :param token: of registry._begin()
+    :param elapsed: time already spent on the call, e.g. in a function returning the generator
+    """
+    method, value = generator.send, None
+    try:
+        while True:
+            start = time.perf_counter_ns()
+            try:
+                item = method(value)
+            finally:
+                elapsed += time.perf_counter_ns() - start
+            try:
+                method, value = generator.send, (yield item)
+            except GeneratorExit:
+                raise
+            except BaseException as e:
+                method, value = generator.throw, e
+    except StopIteration as e:
+        return e.value
+    finally:
+        generator.close()
+        registry._end(stats, token, elapsed)
+
+
+def _profile_generator(f, registry, stats):
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        generator = f(*args, **kwargs)
+        token = registry._begin(stats) if registry.enabled else None
+        if token is None:
+            return (yield from generator)
+        # only the time spent inside the generator, not between the items
+        return (yield from _timed_generator(generator, registry, stats, token))
+
+    return wrapper
+
+
+def _profile_coroutine(f, registry, stats):
+    @wraps(f)
+    async def wrapper(*args, **kwargs):
+        token = registry._begin(stats) if registry.enabled else None
+        if token is None:
+            return await f(*args, **kwargs)
+        try:
+            return await f(*args, **kwargs)
+        finally:
+            registry._end(stats, token)
+
+    return wrapper
+
+
+def _profile_function(f, registry, stats):
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        if not registry.enabled:
+            return f(*args, **kwargs)
+        token = registry._begin(stats)
+        if token is None:
+            return f(*args, **kwargs)
+        try:
+            result = f(*args, **kwargs)
+        except BaseException:
+            registry._end(stats, token)
+            raise
+        if inspect.isgenerator(result):  # e.g. a function delegating to a generator function
+            return _timed_generator(result, registry, stats, token, time.perf_counter_ns() - token[0])
+        registry._end(stats, token)
+        return result
+
+    return wrapper
+
+
+def profile(f: Optional[Callable] = None, *, name: Optional[str] = None, registry: Optional[Registry] = None):
+    """Decorator, which records calls of a function, a generator function or a coroutine function
+
+    Generators are measured by the time spent inside them until they are exhausted or closed, also if they are
+    returned by a plain function, coroutines by the wall time until they return, including the time they wait.
+
+    :param f: function to profile, can be omitted to pass the keyword arguments
+    :param name: name of the statistics, the qualified function name by default
+    :param registry: where to record, the default REGISTRY configured by enable()
+    :raises
+        ValueError for async generator functions
+
+    Examples:
+        @profile
+        def f(a):
+            pass
+
+        @profile(name='sieve')
+        def primes(n):
+            yield from ...
+    """
+    if f is None:
+        return lambda g: profile(g, name=name, registry=registry)
+    if inspect.isasyncgenfunction(f):
+        raise ValueError("Async generator functions can not be profiled, supplied {}".format(f.__qualname__))
+    registry = registry or REGISTRY
+    stats = registry.stats(name or '{}.{}'.format(f.__module__, f.__qualname__))
+    if inspect.isgeneratorfunction(f):
+        return _profile_generator(f, registry, stats)
+    if inspect.iscoroutinefunction(f):
+        return _profile_coroutine(f, registry, stats)
+    return _profile_function(f, registry, stats)
+
+
+def enable(sample_rate: float = 1.0, memory: bool = False):
+    """Start profiling into the default registry, see Registry.configure()"""
+    REGISTRY.configure(sample_rate, memory)
+
+
+def disable():
+    """Stop profiling into the default registry, the collected statistics are kept"""
+    REGISTRY.configure(0)
+
+
+def summary() -> List[Summary]:
+    return REGISTRY.summary()
+
+
+def reset():
+    REGISTRY.reset()
@@ -0,0 +1,103 @@
+import asyncio
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import aio
+import matrix
+
+
+class TestAio(unittest.TestCase):
+
+    def test_streams(self):
+        async def consume(stream, ticks):
+            items = [x async for x in stream]
+            return items, ticks[0]
+
+        async def ticker(ticks):
+            while True:
+                ticks[0] += 1
+                await asyncio.sleep(0)
+
+        async def main(stream):
+            ticks = [0]
+            task = asyncio.ensure_future(ticker(ticks))
+            try:
+                return await consume(stream, ticks)
+            finally:
+                task.cancel()
+
+        primes, ticks = asyncio.run(main(aio.primes(2, 10 ** 5, every=100)))
+        self.assertEqual(len(primes), 9592)
+        self.assertGreaterEqual(ticks, 90)  # the ticker ran between the batches
+        fibonacci, _ = asyncio.run(main(aio.fibonacci(0, 30, every=7)))
+        self.assertEqual(fibonacci[:10], [0, 1, 1, 2, 3, 5, 8, 13, 21, 34])
+        self.assertEqual(len(fibonacci), 30)
+
+        async def first(stream, n):
+            items = []
+            async for x in stream:
+                items.append(x)
+                if len(items) == n:
+                    return items
+
+        self.assertEqual(asyncio.run(first(aio.primes(10 ** 12), 3)), [1000000000039, 1000000000061, 1000000000063])
+
+    def test_offload(self):
+        async def main():
+            det, x = await aio.gauss([[2, 1], [1, 3]], [[3], [5]], timeout=10)
+            inverse = await aio.invert([[2.0, 1.0], [1.0, 1.0]])
+            factors = await aio.factors(600851475143)
+            primes = await aio.sieve_of_eratosthenes(100)
+            return det, x, inverse, factors, len(primes)
+
+        det, x, inverse, factors, count = asyncio.run(main())
+        self.assertEqual((det, x), (5, [[matrix.Fraction(4, 5)], [matrix.Fraction(7, 5)]]))
+        self.assertEqual(matrix.map_matrix(round, inverse), [[1, -1], [-1, 2]])
+        self.assertEqual(factors, [(71, 1), (839, 1), (1471, 1), (6857, 1)])
+        self.assertEqual(count, 25)
+        with self.assertRaises(ValueError):
+            asyncio.run(aio.invert([[1, 2], [2, 4]]))
+
+    def test_process_executor(self):
+        self.addCleanup(aio.shutdown)
+        aio.set_executor('process', workers=2)
+        self.assertEqual(asyncio.run(aio.factors(2 ** 64 + 1)), [(274177, 1), (67280421310721, 1)])
+        with self.assertRaises(ValueError):
+            aio.set_executor('fiber')
+
+    def test_timeout_and_limiter(self):
+        limiter = aio.Limiter(1)
+        with ThreadPoolExecutor(2) as executor:
+            async def main():
+                with self.assertRaises(asyncio.TimeoutError):
+                    await aio.run(time.sleep, 0.3, timeout=0.05, limiter=limiter, executor=executor)
+                # the interrupted call still runs and holds the only slot
+                self.assertTrue(limiter.locked())
+                with self.assertRaises(asyncio.TimeoutError):
+                    await aio.run(abs, -1, timeout=0.05, limiter=limiter, executor=executor)
+                self.assertEqual(await aio.run(abs, -1, timeout=1, limiter=limiter, executor=executor), 1)
+                self.assertFalse(limiter.locked())
+
+                # a cancelled call, which waits for a free worker, is not run
+                calls = []
+                blockers = [asyncio.ensure_future(aio.run(time.sleep, 0.1, executor=executor)) for _ in range(2)]
+                queued = asyncio.ensure_future(aio.run(calls.append, 1, executor=executor))
+                await asyncio.sleep(0.01)
+                queued.cancel()
+                await asyncio.gather(*blockers)
+                self.assertEqual(calls, [])
+
+            asyncio.run(main())
+        with self.assertRaises(ValueError):
+            aio.Limiter(0)
+
+
+def load_tests(loader, tests, ignore):
+    import doctest
+    tests.addTests(doctest.DocTestSuite(aio))
+    return tests
+
+
+if __name__ == '__main__':
+    unittest.main()
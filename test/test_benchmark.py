@@ -0,0 +1,56 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+import benchmark
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_measure(self):
+        calls = []
+        result = benchmark.measure(calls.append, (1,), repeat=3, warmup=2)
+        self.assertEqual(len(calls), 6)  # warmup, trials and the traced call
+        self.assertTrue(result['min'] <= result['median'] <= result['max'])
+        self.assertIsNotNone(result['memory_peak'])
+        self.assertIsNone(benchmark.measure(calls.append, (1,), repeat=1, memory=False)['memory_peak'])
+
+    def test_run_and_compare(self):
+        results = benchmark.run(['factorial', 'gauss'], repeat=2, warmup=0, quick=True)
+        self.assertEqual([(r['name'], r['size']) for r in results['results']], [('factorial', 1000), ('gauss', 16)])
+        self.assertEqual(benchmark.compare(results, results), [])
+        slower = json.loads(json.dumps(results))
+        slower['results'][1]['median'] *= 2
+        self.assertEqual([(r.name, r.size) for r in benchmark.compare(results, slower)], [('gauss', 16)])
+        self.assertEqual(benchmark.compare(results, slower, threshold=1.5), [])
+        self.assertRaises(ValueError, benchmark.run, ['unknown'])
+
+    def test_main(self):
+        with tempfile.TemporaryDirectory() as directory:
+            baseline = os.path.join(directory, 'baseline.json')
+            current = os.path.join(directory, 'current.json')
+            with contextlib.redirect_stdout(io.StringIO()) as output:
+                self.assertEqual(benchmark.main(['run', 'binomial_coefficient', '--quick', '--repeat', '1',
+                                                 '--output', baseline]), 0)
+                self.assertIn('binomial_coefficient', output.getvalue())
+                with open(baseline) as f:
+                    results = json.load(f)
+                results['results'][0]['median'] *= 10
+                with open(current, 'w') as f:
+                    json.dump(results, f)
+                self.assertEqual(benchmark.main(['compare', baseline, baseline]), 0)
+                self.assertEqual(benchmark.main(['compare', baseline, current]), 1)
+                self.assertIn('REGRESSION binomial_coefficient', output.getvalue())
+
+
+def load_tests(loader, tests, ignore):
+    import doctest
+    tests.addTests(doctest.DocTestSuite(benchmark))
+    return tests
+
+
+if __name__ == '__main__':
+    unittest.main()
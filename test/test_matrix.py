@@ -1,4 +1,5 @@
 import unittest
+from fractions import Fraction
 
 import matrix
 
@@ -93,6 +94,173 @@ class TestMatrix(unittest.TestCase):
             for a in singular_matrices:
                 matrix.invert(a)
 
+    def test_lu_factorization(self):
+        a = matrix.to_rational_matrix([
+            [2, 1, -1],
+            [-3, -1, 2],
+            [-2, 1, 2],
+        ])
+        lu = matrix.LUFactorization(a)
+        self.assertEqual(lu.det(), -1)
+        self.assertEqual(lu.solve([8, -11, -3]), [2, 3, -1])
+        self.assertEqual(lu.solve_many([[8, 1], [-11, 0], [-3, 0]]), [[2, 4], [3, -2], [-1, 5]])
+        self.assertEqual(matrix.matmul(a, lu.inverse()), [[1, 0, 0], [0, 1, 0], [0, 0, 1]])
+        det, x = matrix.gauss(matrix.Matrix.from_lists(a), matrix.Matrix.from_lists([[8], [-11], [-3]]))
+        self.assertEqual((det, x), (-1, matrix.Matrix(3, 1, [2, 3, -1])))
+        with self.assertRaises(ValueError):
+            matrix.LUFactorization([[1, 2], [2, 4]])
+
+    def test_exact(self):
+        a = [
+            [2, 9, 4],
+            [7, 5, 3],
+            [6, 1, 8]
+        ]
+        det, c = matrix.gauss(a, [[15], [15], [15]])
+        self.assertEqual(det, -360)
+        self.assertEqual(c, [[1], [1], [1]])
+        self.assertIsInstance(c[0][0], Fraction)
+        self.assertEqual(matrix.matmul(a, matrix.invert(a)), [[1, 0, 0], [0, 1, 0], [0, 0, 1]])
+        self.assertEqual(matrix.exact_det([[Fraction(1, 2), 1], [1, Fraction(1, 3)]]), Fraction(-5, 6))
+        self.assertEqual(matrix.exact_det([[1, 2], [2, 4]]), 0)
+        # a zero leading entry requires a row swap
+        self.assertEqual(matrix.exact_solve([[0, 1], [1, 0]], [[2], [3]]), (-1, [[3], [2]]))
+
+    def test_matmul(self):
+        a = [[1, 2, 3], [4, 5, 6]]
+        b = [[7, 8], [9, 10], [11, 12]]
+        product = [[58, 64], [139, 154]]
+        self.assertEqual(matrix.matmul(a, b), product)
+        self.assertEqual(matrix.matmul(matrix.Matrix.from_lists(a), b), product)
+        self.assertEqual(matrix.Matrix.from_lists(a, 'd') @ matrix.Matrix.from_lists(b, 'd'),
+                         matrix.Matrix(2, 2, [58.0, 64.0, 139.0, 154.0]))
+        # more columns than one tile
+        a = [[i + j for j in range(5)] for i in range(3)]
+        b = [[i * j % 7 for j in range(2 * matrix.MATMUL_BLOCK + 3)] for i in range(5)]
+        self.assertEqual(matrix.matmul(a, b),
+                         [[sum(a[i][k] * b[k][j] for k in range(5)) for j in range(len(b[0]))] for i in range(3)])
+
+    def test_matrix(self):
+        m = matrix.Matrix.from_lists([[1, 2, 3], [4, 5, 6]])
+        self.assertEqual(m.shape, (2, 3))
+        self.assertEqual(m.transpose().tolist(), [[1, 4], [2, 5], [3, 6]])
+        self.assertEqual(m[1][2], m[1, 2])
+        m[1, 2] = 7
+        self.assertEqual(list(m), [[1, 2, 3], [4, 5, 7]])
+        self.assertEqual(matrix.map_matrix(lambda x: 2 * x, m), [[2, 4, 6], [8, 10, 14]])
+        self.assertEqual(matrix.filled_matrix(2, 1, 5, flat=True), matrix.Matrix(2, 1, [5, 5]))
+        self.assertEqual(matrix.Matrix.identity(2), [[1, 0], [0, 1]])
+        with self.assertRaises(ValueError):
+            matrix.Matrix(2, 2, [1, 2, 3])
+
+    def test_sparse(self):
+        a = [[0, 2, 0], [1, 0, 0], [0, 0, 3]]
+        b = [[1, 2], [0, 0], [4, 0]]
+        csr = matrix.CSRMatrix.from_dense(a)
+        dok = matrix.DOKMatrix.from_dense(b)
+        self.assertEqual(csr.nnz, 3)
+        self.assertEqual(csr.todok().to_dense(), a)
+        self.assertEqual(dok.tocsr().to_dense(), b)
+        self.assertEqual(csr.transpose().to_dense(), [[0, 1, 0], [2, 0, 0], [0, 0, 3]])
+        product = matrix.matmul(a, b)
+        self.assertEqual(matrix.matmul(csr, b), product)
+        self.assertEqual(matrix.matmul(a, dok), product)
+        self.assertEqual((csr @ dok).to_dense(), product)
+        self.assertEqual(csr.dot([1, 2, 3]), [4, 1, 9])
+
+    def test_iterative_solvers(self):
+        n = 50
+        a = matrix.DOKMatrix(n, n)
+        for i in range(n):
+            a[i, i] = 4.0
+            if i:
+                a[i, i - 1] = a[i - 1, i] = -1.0
+        b = [float(i % 7) for i in range(n)]
+        expected = matrix.LUFactorization(a.to_dense()).solve(b)
+        for solver in (matrix.jacobi, matrix.gauss_seidel, matrix.conjugate_gradient):
+            x = solver(a, b, tol=1e-12)
+            self.assertTrue(all(abs(u - v) < 1e-9 for u, v in zip(x, expected)), solver.__name__)
+        with self.assertRaises(ValueError):
+            matrix.jacobi(matrix.DOKMatrix.from_dense([[1, 3], [3, 1]]), [1, 1], max_iter=100)
+        with self.assertRaises(ValueError):
+            matrix.gauss_seidel(matrix.DOKMatrix.from_dense([[0, 1], [1, 0]]), [1, 1])
+
+    def test_matpow(self):
+        for n in (1, 2, 3, 4, 5):
+            a = [[(3 * i + 7 * j) % 11 - 5 for j in range(n)] for i in range(n)]
+            expected = [[int(i == j) for j in range(n)] for i in range(n)]
+            for k in range(12):
+                self.assertEqual(matrix.matpow(a, k), expected)
+                self.assertEqual(matrix.matpow(a, k, mod=97), [[x % 97 for x in row] for row in expected])
+                expected = matrix.matmul(expected, a)
+        self.assertEqual(matrix.matpow(matrix.Matrix.from_lists([[1, 1], [1, 0]]), 10),
+                         matrix.Matrix.from_lists([[89, 55], [55, 34]]))
+        self.assertEqual(matrix.matpow([[5, 3], [2, 7]], 0, mod=1), [[0, 0], [0, 0]])
+        with self.assertRaises(ValueError):
+            matrix.matpow([[1, 2, 3], [4, 5, 6]], 2)
+        with self.assertRaises(ValueError):
+            matrix.matpow([[1]], -1)
+
+    def test_linear_recurrence(self):
+        for coeffs, init in (([2], [3]), ([1, 1], [0, 1]), ([1, 1, 1], [0, 0, 1]),
+                             ([3, -1, 4, 1, -5], [1, 2, 3, 4, 5])):
+            terms = list(init)
+            while len(terms) < 80:
+                terms.append(sum(c * terms[-1 - j] for j, c in enumerate(coeffs)))
+            for method in ('kitamasa', 'matrix'):
+                self.assertEqual([matrix.linear_recurrence_nth(coeffs, init, n, method=method) for n in range(80)],
+                                 terms)
+                self.assertEqual([matrix.linear_recurrence_nth(coeffs, init, n, 1009, method) for n in range(80)],
+                                 [t % 1009 for t in terms])
+        self.assertEqual(matrix.linear_recurrence_nth([1, 1], [0, 1], 10 ** 18, 10 ** 9 + 7), 209783453)
+        with self.assertRaises(ValueError):
+            matrix.linear_recurrence_nth([1, 1], [0], 5)
+        with self.assertRaises(ValueError):
+            matrix.linear_recurrence_nth([1, 1], [0, 1], 5, method='fft')
+
+    def test_backend(self):
+        backend = matrix.get_backend()
+        self.addCleanup(matrix.set_backend, backend)
+        with self.assertRaises(ValueError):
+            matrix.set_backend('fortran')
+        # a pivot below eps is rejected by both backends, LAPACK alone would return ~1e12 sized values
+        self.addCleanup(setattr, matrix, 'scipy_linalg', matrix.scipy_linalg)
+        configurations = (('python', None), ('numpy', matrix.scipy_linalg), ('numpy', None))
+        near_singular = [[1.0, 1.0], [1.0, 1.0 + 1e-12]]
+        for name, lapack in configurations if matrix.numpy is not None else configurations[:1]:
+            matrix.set_backend(name)
+            matrix.scipy_linalg = lapack
+            with self.assertRaises(ValueError):
+                matrix.gauss(near_singular, [[1.0], [2.0]])
+            with self.assertRaises(ValueError):
+                matrix.invert(near_singular)
+            det, x = matrix.gauss(near_singular, [[1.0], [2.0]], eps=1e-14)
+            self.assertAlmostEqual(det / 1e-12, 1.0, places=3)
+            self.assertEqual(len(matrix.invert(near_singular, eps=1e-14)), 2)
+        if matrix.numpy is None:
+            with self.assertRaises(ImportError):
+                matrix.set_backend('numpy')
+            return
+        # larger than a panel of the blocked LU, which runs without SciPy
+        n = 2 * matrix.LU_BLOCK + 5
+        a = [[float((7 * i + 3 * j) % 11 - 5) + (20.0 if i == j else 0.0) for j in range(n)] for i in range(n)]
+        b = [[float(i % 5), 1.0] for i in range(n)]
+        results = []
+        for name, lapack in configurations:
+            matrix.set_backend(name)
+            matrix.scipy_linalg = lapack
+            det, x = matrix.gauss(a, b)
+            results.append([det, x, matrix.invert(a), matrix.matmul(a, a)])
+        python = results[0]
+        for numpy in results[1:]:
+            self.assertAlmostEqual(python[0] / numpy[0], 1.0)
+            for m, n in zip(python[1:], numpy[1:]):
+                for row_m, row_n in zip(m, n):
+                    for x, y in zip(row_m, row_n):
+                        self.assertAlmostEqual(x, y)
+        with self.assertRaises(ValueError):
+            matrix.invert([[1.0, 2.0], [2.0, 4.0]])
+
 
 def load_tests(loader, tests, ignore):
     import doctest
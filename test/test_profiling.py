@@ -0,0 +1,126 @@
+import asyncio
+import csv
+import io
+import json
+import os
+import tempfile
+import unittest
+
+import number.prime as prime
+import profiling
+
+
+class TestProfiling(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = profiling.Registry(sample_rate=1.0)
+
+    def test_function(self):
+        @profiling.profile(name='add', registry=self.registry)
+        def add(a, b):
+            return a + b
+
+        self.assertEqual([add(i, 1) for i in range(100)], list(range(1, 101)))
+        s = self.registry.summary()[0]
+        self.assertEqual((s.name, s.calls, s.sampled), ('add', 100, 100))
+        self.assertTrue(s.min_ns <= s.p50_ns <= s.p90_ns <= s.p99_ns <= s.max_ns)
+        self.assertTrue(s.min_ns <= s.mean_ns <= s.max_ns)
+        self.assertEqual(add.__name__, 'add')
+
+    def test_sampling_and_disabled(self):
+        @profiling.profile(name='f', registry=self.registry)
+        def f():
+            pass
+
+        self.registry.configure(sample_rate=0.1)
+        for _ in range(100):
+            f()
+        self.assertEqual(self.registry.summary()[0][1:3], (100, 10))
+        self.registry.configure(0)
+        self.assertFalse(self.registry.enabled)
+        for _ in range(100):
+            f()
+        self.assertEqual(self.registry.summary()[0][1:3], (100, 10))
+        self.registry.reset()
+        self.assertEqual(self.registry.summary(), [])
+        self.assertRaises(ValueError, self.registry.configure, 2)
+
+    def test_generator(self):
+        @profiling.profile(name='g', registry=self.registry)
+        def g(n):
+            total = 0
+            for i in range(n):
+                total += (yield i) or 0
+            return total
+
+        self.assertEqual(list(g(5)), [0, 1, 2, 3, 4])
+        generator = g(3)
+        self.assertEqual([next(generator), generator.send(10), generator.send(20)], [0, 1, 2])
+        with self.assertRaises(StopIteration) as stop:
+            generator.send(30)
+        self.assertEqual(stop.exception.value, 60)
+        generator = g(3)
+        next(generator)
+        self.assertRaises(KeyError, generator.throw, KeyError('k'))
+        generator = g(10)
+        next(generator)
+        generator.close()
+        self.assertEqual(self.registry.summary()[0][1:3], (4, 4))
+
+    def test_returned_generator(self):
+        sieve = profiling.profile(prime.sieve_of_eratosthenes, name='sieve', registry=self.registry)
+        self.assertEqual(sum(1 for _ in sieve(10 ** 6)), 78498)
+        direct = profiling.profile(prime.primes_in_range, name='direct', registry=self.registry)
+        self.assertEqual(sum(1 for _ in direct(2, 10 ** 6 + 1)), 78498)
+        s = {row.name: row for row in self.registry.summary()}
+        self.assertEqual(s['sieve'].sampled, 1)
+        # the iteration is measured, not only the creation of the generator
+        self.assertGreater(s['sieve'].total_ns, s['direct'].total_ns // 4)
+
+    def test_coroutine(self):
+        @profiling.profile(name='c', registry=self.registry)
+        async def c(x):
+            await asyncio.sleep(0.001)
+            return x
+
+        self.assertEqual(asyncio.run(c(3)), 3)
+        s = self.registry.summary()[0]
+        self.assertEqual(s.calls, 1)
+        self.assertGreaterEqual(s.total_ns, 10 ** 6)
+
+        async def agen():
+            yield 1
+
+        self.assertRaises(ValueError, profiling.profile, agen)
+
+    def test_memory_and_export(self):
+        registry = profiling.Registry(sample_rate=1.0, memory=True)
+
+        @profiling.profile(name='allocate', registry=registry)
+        def allocate(n):
+            return bytearray(n)
+
+        keep = allocate(10 ** 6)
+        registry.configure(0)
+        s = registry.summary()[0]
+        self.assertGreaterEqual(s.memory_peak, 10 ** 6)
+        self.assertGreaterEqual(s.memory_delta, 10 ** 6)
+        self.assertEqual(len(keep), 10 ** 6)
+        self.assertEqual(json.loads(registry.to_json())[0]['name'], 'allocate')
+        rows = list(csv.DictReader(io.StringIO(registry.to_csv())))
+        self.assertEqual((rows[0]['name'], rows[0]['calls']), ('allocate', '1'))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'profile.json')
+            registry.to_json(path)
+            with open(path) as f:
+                self.assertEqual(json.load(f)[0]['calls'], 1)
+
+
+def load_tests(loader, tests, ignore):
+    import doctest
+    tests.addTests(doctest.DocTestSuite(profiling))
+    return tests
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -33,10 +33,11 @@ def is_leap(year):
 
 
 def execution_time(f):
-    """Decorator for measuring execution time of a function
+    """Decorator for measuring execution time of a function, printed after every call.
+    Use profiling.profile to collect statistics without printing, also of generators and coroutines.
 
     Examples:
-        @timing
+        @execution_time
         def f(a):
             pass
     """